@@ -0,0 +1,115 @@
+"""Benchmark chunk-analysis aggregation at increasing item counts.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_aggregation --sizes 10000 20000 40000 80000
+
+Synthetic chunk analyses mention items drawn from a vocabulary with spelling
+variants ("PostgreSQL", "postgresql ", "PostgreSQLs"). ``AnalysisAggregator``
+is timed at each size; time per item should stay flat as the size grows. The
+previous list-based merge (``item not in list``) is timed for comparison up to
+``--legacy-max`` items, and the number of distinct items each keeps is shown.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, Any, List
+
+from sparc_generator.aggregation import AnalysisAggregator, LIST_KEYS, DETAIL_KEYS
+
+ITEMS_PER_CHUNK = 50
+
+
+def _variant(rng: random.Random, base: str) -> str:
+    choice = rng.randrange(4)
+    if choice == 0:
+        return base.lower() + " "
+    if choice == 1:
+        return base.upper()
+    if choice == 2:
+        return base + "s"
+    return base
+
+
+def build_analyses(total_items: int, vocabulary: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Chunk analyses holding ``total_items`` list items in total."""
+    rng = random.Random(seed)
+    keys = LIST_KEYS + DETAIL_KEYS
+    analyses = []
+    for start in range(0, total_items, ITEMS_PER_CHUNK):
+        analysis = {key: [] for key in LIST_KEYS}
+        analysis["implementation_details"] = {key: [] for key in DETAIL_KEYS}
+        for _ in range(min(ITEMS_PER_CHUNK, total_items - start)):
+            key = rng.choice(keys)
+            item = _variant(rng, f"Item {rng.randrange(vocabulary)} Component")
+            if key in LIST_KEYS:
+                analysis[key].append(item)
+            else:
+                analysis["implementation_details"][key].append(item)
+        analyses.append(analysis)
+    return analyses
+
+
+def legacy_aggregate(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The previous exact-match, list-scanning merge."""
+    aggregated = {key: [] for key in LIST_KEYS}
+    aggregated["implementation_details"] = {key: [] for key in DETAIL_KEYS}
+    for analysis in analyses:
+        for key in LIST_KEYS:
+            for item in analysis.get(key, []):
+                if item not in aggregated[key]:
+                    aggregated[key].append(item)
+        for key in DETAIL_KEYS:
+            for item in analysis.get("implementation_details", {}).get(key, []):
+                if item not in aggregated["implementation_details"][key]:
+                    aggregated["implementation_details"][key].append(item)
+    return aggregated
+
+
+def count_items(analysis: Dict[str, Any]) -> int:
+    return (sum(len(analysis[key]) for key in LIST_KEYS)
+            + sum(len(analysis["implementation_details"][key]) for key in DETAIL_KEYS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 40000, 80000],
+                        help="Total items to aggregate")
+    parser.add_argument("--vocabulary-ratio", type=float, default=0.5,
+                        help="Distinct base items as a fraction of the total")
+    parser.add_argument("--legacy-max", type=int, default=40000,
+                        help="Largest size at which to time the list-based merge")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        analyses = build_analyses(size, max(1, int(size * args.vocabulary_ratio)))
+
+        start = time.perf_counter()
+        aggregator = AnalysisAggregator()
+        for analysis in analyses:
+            aggregator.add(analysis)
+        aggregated = aggregator.to_dict()
+        elapsed = time.perf_counter() - start
+
+        result = {
+            "items": size,
+            "wall_time_s": round(elapsed, 4),
+            "us_per_item": round(elapsed / size * 1e6, 2),
+            "distinct_items": count_items(aggregated),
+        }
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            legacy = legacy_aggregate(analyses)
+            legacy_elapsed = time.perf_counter() - start
+            result["legacy_wall_time_s"] = round(legacy_elapsed, 4)
+            result["legacy_us_per_item"] = round(legacy_elapsed / size * 1e6, 2)
+            result["legacy_distinct_items"] = count_items(legacy)
+        results.append(result)
+
+    print(json.dumps({"items_per_chunk": ITEMS_PER_CHUNK, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark caption ingestion: parse throughput and peak memory on multi-hour files.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_captions --hours 1 4
+
+For every duration, an auto-caption track is synthesized as rolling SRT and
+WebVTT cues (every cue repeats the previous caption line) and as YouTube
+JSON3 events, one cue every two seconds. Each file is then
+
+* parsed only, counting segments (``parse``),
+* parsed, normalized and joined into a ``TimedTranscript``, as the CLI does
+  (``timed_transcript``),
+* read whole and split into lines, or ``json.load``-ed (``full_read``), the
+  baseline the streaming parsers replace.
+
+Peak Python memory is measured with ``tracemalloc``; time is the best of
+``--runs`` runs. Parser memory stays flat as files grow, while the timed
+transcript grows only with the normalized text.
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+from sparc_generator.captions import TimedTranscript, format_timestamp, read_captions
+from sparc_generator.normalize import TranscriptNormalizer
+
+WORDS = (
+    "we", "build", "the", "listing", "service", "with", "a", "postgres", "database", "and",
+    "cache", "search", "results", "so", "users", "can", "filter", "by", "price", "location",
+    "then", "deploy", "it", "behind", "an", "api", "gateway", "uh", "um", "really", "simple"
+)
+
+CUE_SECONDS = 2
+
+
+def caption_lines(hours: float, seed: int = 0) -> Iterator[str]:
+    """Caption lines of ``hours`` of speech, one per cue."""
+    rng = random.Random(seed)
+    for idx in range(int(hours * 3600 / CUE_SECONDS)):
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 9)))
+        yield line + ("." if idx % 4 == 3 else "")
+
+
+def _cue_time(seconds: int, separator: str) -> str:
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}{separator}000"
+
+
+def write_captions(path: Path, caption_format: str, hours: float):
+    """Write a synthetic caption file without holding it in memory."""
+    previous = None
+    with open(path, "w", encoding="utf-8") as f:
+        if caption_format == "vtt":
+            f.write("WEBVTT\nKind: captions\nLanguage: en\n\n")
+        elif caption_format == "json3":
+            f.write('{"wireMagic": "pb3", "events": [')
+        for idx, line in enumerate(caption_lines(hours)):
+            start = idx * CUE_SECONDS
+            if caption_format == "json3":
+                event = {"tStartMs": start * 1000, "dDurationMs": CUE_SECONDS * 1000,
+                         "wWinId": 1, "segs": [{"utf8": word + " "} for word in line.split()]}
+                f.write(("," if idx else "") + json.dumps(event))
+                continue
+            separator = "," if caption_format == "srt" else "."
+            timing = f"{_cue_time(start, separator)} --> {_cue_time(start + CUE_SECONDS, separator)}"
+            text = line if previous is None else f"{previous}\n{line}"
+            number = f"{idx + 1}\n" if caption_format == "srt" else ""
+            f.write(f"{number}{timing}\n{text}\n\n")
+            previous = line
+        if caption_format == "json3":
+            f.write("]}\n")
+
+
+def parse_only(path: Path) -> int:
+    return sum(1 for _ in read_captions(path))
+
+
+def timed_transcript(path: Path) -> int:
+    normalizer = TranscriptNormalizer()
+    return len(TimedTranscript.from_segments(normalizer.normalize_segments(read_captions(path))).text)
+
+
+def full_read(path: Path) -> int:
+    if path.suffix == ".json3":
+        with open(path, encoding="utf-8") as f:
+            return len(json.load(f)["events"])
+    return len(path.read_text(encoding="utf-8").splitlines())
+
+
+def measure(fn: Callable[[Path], int], path: Path, runs: int) -> Dict[str, Any]:
+    """Best time of ``runs`` runs, then peak traced memory of one more."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size_mb = path.stat().st_size / 1e6
+    return {
+        "seconds": round(best, 3),
+        "throughput_mb_s": round(size_mb / best, 2),
+        "peak_memory_mb": round(peak / 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 4], help="Durations of caption track to synthesize")
+    parser.add_argument("--formats", nargs="+", default=["srt", "vtt", "json3"], help="Caption formats")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs; the best is reported")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for hours in args.hours:
+            for caption_format in args.formats:
+                path = Path(tmp) / f"captions_{hours:g}h.{caption_format}"
+                write_captions(path, caption_format, hours)
+                timed = TimedTranscript.from_segments(read_captions(path))
+                results.append({
+                    "format": caption_format,
+                    "duration": format_timestamp(timed.duration_s),
+                    "file_mb": round(path.stat().st_size / 1e6, 2),
+                    "segments": len(timed),
+                    "parse": measure(parse_only, path, args.runs),
+                    "timed_transcript": measure(timed_transcript, path, args.runs),
+                    "full_read": measure(full_read, path, args.runs),
+                })
+                path.unlink()
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark concurrent chunk analysis against the fake server.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_concurrency --latency 0.5 --chunks 16
+
+The transcript is sized so that it splits into ``--chunks`` chunks, then
+``analyze_transcript`` is timed at increasing concurrency limits. Every run
+must produce the same aggregated analysis as the sequential baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from sparc_generator.core import SPARCPromptGenerator
+from benchmarks.fake_openai_server import FakeChatCompletionsServer
+
+EXAMPLE_TRANSCRIPT = Path(__file__).resolve().parent.parent / "examples" / "example_transcript.txt"
+
+# Small context window so a modest transcript splits into many chunks
+BENCH_MODEL_CONFIG = {
+    "max_tokens": 1024,
+    "context_length": 4096,
+    "temperature": 0.2,
+    "capabilities": ["text"],
+}
+
+
+def build_transcript(chunks: int) -> str:
+    """Replicate the example transcript until it yields ``chunks`` chunks."""
+    words = EXAMPLE_TRANSCRIPT.read_text().split()
+    probe = SPARCPromptGenerator(api_key="fake", model="gpt-4o", model_config=BENCH_MODEL_CONFIG)
+    words_per_chunk = len(probe.split_transcript(" ".join(words))[0].text.split())
+    needed = words_per_chunk * chunks
+    repeated = (words * (needed // len(words) + 1))[:needed]
+    return " ".join(repeated)
+
+
+async def time_analysis(transcript: str, concurrency: int):
+    generator = SPARCPromptGenerator(
+        api_key="fake",
+        model="gpt-4o",
+        model_config=BENCH_MODEL_CONFIG,
+        max_concurrency=concurrency,
+    )
+    start = time.perf_counter()
+    analysis = await generator.analyze_transcript(transcript)
+    return time.perf_counter() - start, analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Injected latency per request (s)")
+    parser.add_argument("--chunks", type=int, default=16, help="Number of transcript chunks")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Concurrency limits to measure")
+    args = parser.parse_args()
+
+    transcript = build_transcript(args.chunks)
+    results = []
+    with FakeChatCompletionsServer(latency=args.latency) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        baseline = None
+        for level in args.levels:
+            elapsed, analysis = asyncio.run(time_analysis(transcript, level))
+            if baseline is None:
+                baseline = (elapsed, analysis)
+            results.append({
+                "concurrency": level,
+                "wall_time_s": round(elapsed, 3),
+                "speedup": round(baseline[0] / elapsed, 2),
+                "matches_baseline": analysis == baseline[1],
+            })
+
+    print(json.dumps({
+        "chunks": args.chunks,
+        "latency_s": args.latency,
+        "requests": server.request_count,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
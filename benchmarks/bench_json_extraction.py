@@ -0,0 +1,107 @@
+"""Benchmark JSON extraction from model responses, including pathological input.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_json_extraction --sizes 1000 10000 100000
+
+Each case builds a response of roughly the given size in characters and
+times ``extract_json_object`` on it. The previous regex-based extraction is
+timed only up to ``--legacy-max`` characters, because on unbalanced braces
+its backtracking grows quadratically.
+"""
+import argparse
+import json
+import re
+import time
+from typing import Callable, Dict
+
+from sparc_generator.extraction import extract_json_object, ANALYSIS_SCHEMA
+
+ANALYSIS = {
+    "application_type": "Online directory",
+    "technical_domain": "Web development",
+    "core_functionalities": ["Listing management"],
+    "technical_requirements": [],
+    "components": ["Frontend"],
+    "dependencies": [],
+    "technologies": ["Python"],
+    "implementation_details": {"algorithms": [], "patterns": [], "architecture_decisions": [], "constraints": []}
+}
+PAYLOAD = json.dumps(ANALYSIS, indent=2)
+
+
+def _fill(unit: str, size: int) -> str:
+    return unit * max(1, size // len(unit))
+
+
+CASES: Dict[str, Callable[[int], str]] = {
+    # Prose, then the payload in a fenced block
+    "code_block": lambda size: _fill("Some discussion of the app. ", size) + "\n```json\n" + PAYLOAD + "\n```",
+    # Unbalanced opening braces, then the payload
+    "unbalanced_braces": lambda size: _fill("{", size) + "\n" + PAYLOAD,
+    # Deeply nested objects that never close
+    "unterminated_nesting": lambda size: _fill('{"a": ', size),
+    # Code with many brace pairs before the payload
+    "code_braces": lambda size: _fill("if (x) { y(); } ", size) + PAYLOAD,
+    # Many small JSON objects that do not match the schema
+    "decoy_objects": lambda size: _fill('{"k": 1} ', size) + PAYLOAD,
+}
+
+
+def legacy_extract(response_text: str):
+    """The previous three-pass regex extraction."""
+    response_text = response_text.strip()
+    try:
+        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(1))
+        json_match = re.search(r'\{[^{]*"coverage_analysis".*\}', response_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(0))
+        cleaned_text = re.sub(r'^.*?(\{.*\}).*?$', r'\1', response_text, flags=re.DOTALL)
+        return json.loads(cleaned_text)
+    except (json.JSONDecodeError, RecursionError):
+        # The previous code only caught JSONDecodeError; deep nesting crashed it
+        return None
+
+
+def time_call(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Approximate response sizes in characters")
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="Largest size at which to time the regex extraction")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is kept)")
+    args = parser.parse_args()
+
+    results = []
+    for name, build in CASES.items():
+        for size in args.sizes:
+            text = build(size)
+            obj, strategy = extract_json_object(text, ANALYSIS_SCHEMA)
+            result = {
+                "case": name,
+                "chars": len(text),
+                "found": obj is not None,
+                "strategy": strategy,
+                "time_ms": round(time_call(lambda: extract_json_object(text, ANALYSIS_SCHEMA), args.repeat) * 1000, 3),
+            }
+            if size <= args.legacy_max:
+                result["legacy_found"] = legacy_extract(text) is not None
+                result["legacy_time_ms"] = round(time_call(lambda: legacy_extract(text), args.repeat) * 1000, 3)
+            results.append(result)
+
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark transcript normalization: token savings and throughput.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_normalize --transcript examples/example_transcript.txt --repeat 50
+
+Two inputs are normalized: the transcript as given, and the same captions
+rendered as rolling SRT cues in the style of YouTube auto-captions (every cue
+repeats the previous caption line, with cue numbers and timings). For each,
+tokens before and after (``cl100k_base``) and what the normalizer removed are
+reported. Throughput is measured on the input repeated ``--repeat`` times, as
+the best of ``--runs`` runs, in MB and lines per second.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+import tiktoken
+
+from sparc_generator.normalize import TranscriptNormalizer, TIMESTAMP_LINE
+
+
+def rolling_srt(transcript: str) -> str:
+    """Render the caption lines of a transcript as rolling SRT cues."""
+    captions = [line.strip() for line in transcript.splitlines()
+                if line.strip() and not TIMESTAMP_LINE.match(line)]
+    cues: List[str] = []
+    for idx, caption in enumerate(captions):
+        start, end = idx * 2, idx * 2 + 2
+        text = caption if idx == 0 else f"{captions[idx - 1]}\n{caption}"
+        cues.append(
+            f"{idx + 1}\n00:{start // 60:02d}:{start % 60:02d},000 --> "
+            f"00:{end // 60:02d}:{end % 60:02d},000\n{text}\n"
+        )
+    return "\n".join(cues)
+
+
+def measure(name: str, text: str, encoding, repeat: int, runs: int) -> Dict[str, Any]:
+    normalizer = TranscriptNormalizer()
+    normalized = normalizer.normalize_text(text)
+    stats = dict(normalizer.stats)
+    input_tokens = len(encoding.encode(text))
+    output_tokens = len(encoding.encode(normalized))
+
+    # Throughput on a large input, fed line by line as from a file
+    lines = (text + "\n").splitlines() * repeat
+    size_mb = sum(len(line) + 1 for line in lines) / 1e6
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in normalizer.normalize(lines):
+            pass
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "input": name,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "token_reduction": round(1 - output_tokens / input_tokens, 4) if input_tokens else 0.0,
+        "input_lines": stats["input_lines"],
+        "output_lines": stats["output_lines"],
+        "removed": {key: stats[key] for key in ("timestamps", "tags", "duplicates", "fillers")},
+        "throughput_mb_s": round(size_mb / best, 2),
+        "throughput_lines_s": round(len(lines) / best),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transcript", default="examples/example_transcript.txt", help="Transcript to normalize")
+    parser.add_argument("--repeat", type=int, default=50, help="Copies of the input timed for throughput")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs; the best is reported")
+    args = parser.parse_args()
+
+    transcript = Path(args.transcript).read_text()
+    encoding = tiktoken.get_encoding("cl100k_base")
+    report = {
+        "transcript": args.transcript,
+        "results": [
+            measure("transcript", transcript, encoding, args.repeat, args.runs),
+            measure("rolling_srt", rolling_srt(transcript), encoding, args.repeat, args.runs),
+        ],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark CLI startup latency.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup --runs 10 --target 0.5
+
+Each command runs in a fresh interpreter under ``python -X importtime``. The
+report gives wall time per command, the slowest imports of the last run, and
+whether heavy dependencies (``openai``, ``tiktoken``) were loaded. The exit
+status is non-zero when the median ``list-models`` time misses ``--target``
+or when a short command imports a heavy dependency.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    "help": ["--help"],
+    "list-models": ["list-models"],
+}
+
+# Modules that short commands must not import
+HEAVY_MODULES = ["openai", "tiktoken", "sparc_generator.core"]
+
+# Median wall time budget for `sparc list-models`, in seconds
+DEFAULT_TARGET_S = 0.5
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us) records."""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        records.append({
+            "module": module.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return records
+
+
+def run_command(args: List[str], workdir: str) -> Dict[str, Any]:
+    """Run the CLI once and return its wall time and import records."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "sparc_generator.sparc_cli", *args],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"sparc {' '.join(args)} failed: {proc.stderr[-500:]}")
+    return {"wall_time_s": elapsed, "imports": parse_importtime(proc.stderr)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_S,
+                        help="Median list-models wall time budget (s)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to report")
+    args = parser.parse_args()
+
+    report = {"target_s": args.target, "commands": {}}
+    ok = True
+    # Run outside the repository so the log file does not land in the tree
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, command in COMMANDS.items():
+            runs = [run_command(command, workdir) for _ in range(args.runs)]
+            times = [run["wall_time_s"] for run in runs]
+            imports = runs[-1]["imports"]
+            loaded = {record["module"] for record in imports}
+            heavy = [module for module in HEAVY_MODULES if module in loaded]
+            slowest = sorted(
+                (r for r in imports if r["module"].count(".") == 0),
+                key=lambda r: r["cumulative_us"], reverse=True
+            )[:args.top]
+            report["commands"][name] = {
+                "median_s": round(statistics.median(times), 4),
+                "min_s": round(min(times), 4),
+                "max_s": round(max(times), 4),
+                "heavy_imports": heavy,
+                "slowest_imports": [
+                    {"module": r["module"], "cumulative_ms": round(r["cumulative_us"] / 1000, 2)}
+                    for r in slowest
+                ],
+            }
+            ok = ok and not heavy
+
+    report["list_models_within_target"] = report["commands"]["list-models"]["median_s"] <= args.target
+    ok = ok and report["list_models_within_target"]
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Offline end-to-end benchmark suite.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_suite --latency 0.2 --latency-distribution lognormal \\
+        --error-rate 0.02 --rate-limit-rate 0.05 --out bench.json
+
+A local fake chat-completions server stands in for the API, and every client
+is pointed at it through its base URL. The stages are:
+
+* ``analyze_<n>_chunks``: ``analyze_transcript`` on the example transcript
+  replicated to ``n`` chunks, for each ``--sizes`` value;
+* ``analyze_<n>_chunks_tree``: the same with tree reduction down to
+  ``--analysis-budget`` tokens, reporting per-level latency and tokens. The
+  default budget is half of one fake chunk analysis, so every size runs at
+  least one merge level; a tree stage that runs none records an error;
+* ``generate``: ``sparc generate`` end to end, run in-process;
+* ``process_artifacts`` and ``process_artifacts_parallel``:
+  ``prompt_generator.process_artifacts`` on the artifacts written by the
+  ``generate`` stage, one phase at a time and with all phases concurrently.
+
+Each stage reports wall time, the requests the server saw (including injected
+500 and 429 responses) and peak traced memory. The report is printed as JSON
+and optionally written to ``--out``; ``--compare`` adds wall-time ratios
+against an earlier report so regressions show up between commits. Stages
+that fail record their error instead of aborting the suite.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+import tiktoken
+
+from sparc_generator.core import SPARCPromptGenerator
+from benchmarks.bench_concurrency import BENCH_MODEL_CONFIG, EXAMPLE_TRANSCRIPT, build_transcript
+from benchmarks.fake_openai_server import FakeChatCompletionsServer, LATENCY_DISTRIBUTIONS, _analysis_payload
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def git_revision() -> Optional[str]:
+    """Short commit hash of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(name: str, server: FakeChatCompletionsServer, func: Callable[[], Any],
+              trace_memory: bool = True) -> Dict[str, Any]:
+    """Run one stage, recording wall time, server-side request counts and peak memory."""
+    before = (server.request_count, server.error_count, server.rate_limited_count)
+    if trace_memory:
+        tracemalloc.start()
+    error = None
+    details = None
+    start = time.perf_counter()
+    try:
+        # Keep CLI output out of the JSON report
+        with contextlib.redirect_stdout(io.StringIO()):
+            details = func()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    result = {
+        "stage": name,
+        "wall_time_s": round(elapsed, 4),
+        "requests": server.request_count - before[0],
+        "server_errors": server.error_count - before[1],
+        "rate_limited": server.rate_limited_count - before[2],
+        "peak_memory_bytes": peak,
+        "error": error,
+    }
+    if details:
+        result.update(details)
+    return result
+
+
+def chunk_analysis_tokens() -> int:
+    """Tokens of one fake chunk analysis, counted as the generator counts analyses."""
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return len(encoding.encode(json.dumps(_analysis_payload(""), indent=2)))
+
+
+def analyze_stage(transcript: str, concurrency: int, base_url: str, tree: bool = False,
+                  analysis_budget: Optional[int] = None) -> Callable[[], Any]:
+    """Analysis stage; with ``tree``, tree-reduce to ``analysis_budget`` tokens.
+
+    Without a budget, half the tokens of one fake chunk analysis are used, so
+    the union of the chunk analyses never fits and at least one merge level
+    runs.
+    """
+    async def analyze():
+        generator = SPARCPromptGenerator(
+            api_key="bench",
+            model="gpt-4o",
+            model_config=BENCH_MODEL_CONFIG,
+            max_concurrency=concurrency,
+            base_url=base_url,
+            **({"analysis_reduce": "tree",
+                "analysis_token_budget": analysis_budget or chunk_analysis_tokens() // 2} if tree else {})
+        )
+        try:
+            analysis = await generator.analyze_transcript(transcript)
+        finally:
+            await generator.transport.close()
+        if "error" in analysis:
+            raise RuntimeError(analysis["error"])
+        if tree:
+            if not generator.reduce_stats:
+                raise RuntimeError(
+                    f"Tree reduction ran no merge level: the chunk analyses fit the budget of "
+                    f"{generator.analysis_token_budget} tokens"
+                )
+            return {"analysis_budget": generator.analysis_token_budget,
+                    "analysis_tokens": generator._analysis_tokens(analysis),
+                    "reduce_levels": generator.reduce_stats}
+
+    def run():
+        return asyncio.run(analyze())
+    return run
+
+
+def generate_stage(output_dir: Path, concurrency: int) -> Callable[[], Any]:
+    def run():
+        from sparc_generator.sparc_cli import cli
+        cli.main(
+            ["generate", str(EXAMPLE_TRANSCRIPT), "-o", str(output_dir), "-n", "bench",
+             "-c", str(concurrency), "--no-cache"],
+            standalone_mode=False,
+        )
+        if not (output_dir / "bench" / "development_plan.json").exists():
+            raise RuntimeError("sparc generate did not write a development plan")
+    return run
+
+
+def process_artifacts_stage(artifacts_dir: Path, output_dir: Path, parallel: bool = False) -> Callable[[], Any]:
+    def run():
+        from sparc_generator.prompt_generator import process_artifacts
+        process_artifacts(str(artifacts_dir), str(output_dir), "bench", parallel=parallel)
+    return run
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Wall-time and request-count changes per stage relative to ``baseline``."""
+    previous = {stage["stage"]: stage for stage in baseline.get("stages", [])}
+    rows = []
+    for stage in report["stages"]:
+        old = previous.get(stage["stage"])
+        if old is None or not old["wall_time_s"]:
+            continue
+        rows.append({
+            "stage": stage["stage"],
+            "wall_time_ratio": round(stage["wall_time_s"] / old["wall_time_s"], 3),
+            "requests_delta": stage["requests"] - old["requests"],
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean latency per request (s)")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="constant")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--artifact-words", type=int, default=200, help="Approximate words per generated artifact")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16],
+                        help="Transcript sizes, in chunks, for the analysis stages")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests per stage")
+    parser.add_argument("--analysis-budget", type=int, default=None,
+                        help="Token budget for the tree-reduce analysis stages "
+                             "(default: half of one chunk analysis)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and failure draws")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, no peak memory)")
+    parser.add_argument("--out", type=Path, help="Also write the report to this file")
+    parser.add_argument("--compare", type=Path, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "server": {
+            "latency_s": args.latency,
+            "latency_distribution": args.latency_distribution,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "artifact_words": args.artifact_words,
+            "seed": args.seed,
+        },
+        "concurrency": args.concurrency,
+        "stages": [],
+    }
+    trace_memory = not args.no_memory
+    suite_start = time.perf_counter()
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as workdir, FakeChatCompletionsServer(
+        latency=args.latency,
+        latency_distribution=args.latency_distribution,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        artifact_words=args.artifact_words,
+        seed=args.seed,
+    ) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "bench")
+        # The CLI writes its log file into the working directory
+        os.chdir(workdir)
+        try:
+            for chunks in args.sizes:
+                transcript = build_transcript(chunks)
+                report["stages"].append(run_stage(
+                    f"analyze_{chunks}_chunks", server,
+                    analyze_stage(transcript, args.concurrency, server.base_url), trace_memory
+                ))
+                report["stages"].append(run_stage(
+                    f"analyze_{chunks}_chunks_tree", server,
+                    analyze_stage(transcript, args.concurrency, server.base_url, tree=True,
+                                  analysis_budget=args.analysis_budget),
+                    trace_memory
+                ))
+
+            output_dir = Path(workdir) / "output"
+            report["stages"].append(run_stage(
+                "generate", server, generate_stage(output_dir, args.concurrency), trace_memory
+            ))
+            report["stages"].append(run_stage(
+                "process_artifacts", server,
+                process_artifacts_stage(output_dir / "bench" / "artifacts", Path(workdir) / "prompts"),
+                trace_memory
+            ))
+            report["stages"].append(run_stage(
+                "process_artifacts_parallel", server,
+                process_artifacts_stage(output_dir / "bench" / "artifacts", Path(workdir) / "prompts_parallel",
+                                        parallel=True),
+                trace_memory
+            ))
+        finally:
+            os.chdir(cwd)
+
+        report["total_requests"] = server.request_count
+
+    report["total_wall_time_s"] = round(time.perf_counter() - suite_start, 4)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["max_rss_bytes"] = max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        report["comparison"] = {
+            "baseline_revision": baseline.get("revision"),
+            "stages": compare(report, baseline),
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
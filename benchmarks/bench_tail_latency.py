@@ -0,0 +1,109 @@
+"""Benchmark retry policies against slow straggler responses.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_tail_latency --chunks 40 --slow-rate 0.05 --slow-latency 3
+
+The fake server delays a fraction of requests by ``--slow-latency`` seconds.
+``analyze_transcript`` is run under each retry policy: the default (wait for
+every response), a per-attempt timeout that retries stragglers, and hedging
+that sends a duplicate once a request outlives the stage's p95 latency. The
+hedging run first warms up its latency window with one analysis. Reports wall
+time, request latency percentiles, server requests, retries and hedges.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, Any, List
+
+from sparc_generator.core import SPARCPromptGenerator
+from sparc_generator.metrics import MetricsRecorder
+from sparc_generator.retry import RetryPolicy
+from sparc_generator.transport import Transport
+from benchmarks.bench_concurrency import BENCH_MODEL_CONFIG, build_transcript
+from benchmarks.fake_openai_server import FakeChatCompletionsServer
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def run_policy(server: FakeChatCompletionsServer, transcript: str, policy: RetryPolicy,
+                     concurrency: int, warmup: bool) -> Dict[str, Any]:
+    transport = Transport(api_key="fake", base_url=server.base_url, retry_policy=policy,
+                          metrics=MetricsRecorder())
+
+    def make_generator() -> SPARCPromptGenerator:
+        return SPARCPromptGenerator(
+            api_key="fake",
+            model="gpt-4o",
+            model_config=BENCH_MODEL_CONFIG,
+            max_concurrency=concurrency,
+            transport=transport,
+            metrics=transport.metrics,
+        )
+
+    try:
+        if warmup:
+            await make_generator().analyze_transcript(transcript)
+        hedges, wins, retries = transport.hedges, transport.hedge_wins, transport.retries
+        requests_before = server.request_count
+
+        generator = make_generator()
+        start = time.perf_counter()
+        analysis = await generator.analyze_transcript(transcript)
+        elapsed = time.perf_counter() - start
+    finally:
+        await transport.close()
+
+    latencies = [entry["latency_s"] for entry in generator.usage_log if "latency_s" in entry]
+    return {
+        "wall_time_s": round(elapsed, 3),
+        "ok": "error" not in analysis,
+        "latency_p50_s": round(statistics.median(latencies), 3) if latencies else None,
+        "latency_p95_s": round(percentile(latencies, 0.95), 3) if latencies else None,
+        "latency_max_s": round(max(latencies), 3) if latencies else None,
+        "server_requests": server.request_count - requests_before,
+        "retries": transport.retries - retries,
+        "hedges": transport.hedges - hedges,
+        "hedge_wins": transport.hedge_wins - wins,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=40, help="Number of transcript chunks")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chunk requests in flight")
+    parser.add_argument("--latency", type=float, default=0.1, help="Mean latency of normal requests (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of slow requests")
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="Extra latency of slow requests (s)")
+    parser.add_argument("--attempt-timeout", type=float, default=1.0,
+                        help="Per-attempt timeout of the timeout policy (s)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the server's latency draws")
+    args = parser.parse_args()
+
+    transcript = build_transcript(args.chunks)
+    policies = {
+        "default": (RetryPolicy(), False),
+        "attempt_timeout": (RetryPolicy(attempt_timeout_s=args.attempt_timeout, backoff_base_s=0.05), False),
+        "hedge": (RetryPolicy(hedge=True, hedge_min_samples=10), True),
+    }
+
+    report = {"chunks": args.chunks, "concurrency": args.concurrency, "latency_s": args.latency,
+              "slow_rate": args.slow_rate, "slow_latency_s": args.slow_latency, "policies": {}}
+    for name, (policy, warmup) in policies.items():
+        with FakeChatCompletionsServer(latency=args.latency, latency_distribution="lognormal",
+                                       slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                                       seed=args.seed) as server:
+            result = asyncio.run(run_policy(server, transcript, policy, args.concurrency, warmup))
+            result["slow_responses"] = server.slow_count
+        report["policies"][name] = result
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark the tokenizer CPU time spent on usage accounting per pipeline run.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_token_counting --chunks 32
+
+The full pipeline (analysis, artifacts, validation, chat simulation) runs
+against the fake server, which reports ``usage`` like the real API. Tokenizer
+calls made for accounting are timed, then compared with a replay of what the
+previous accounting encoded for the same requests: every message for the
+rate-limit estimate, plus the user prompt (except chunk prompts, whose size is
+known from chunking) and the response for the usage log.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from sparc_generator.core import SPARCPromptGenerator
+from benchmarks.bench_concurrency import BENCH_MODEL_CONFIG, build_transcript
+from benchmarks.fake_openai_server import FakeChatCompletionsServer
+
+
+class TimedTokenizer:
+    """Proxy for a tiktoken encoding that accumulates CPU time spent encoding."""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+        self.calls = 0
+        self.cpu_time = 0.0
+
+    def encode(self, text, **kwargs):
+        start = time.process_time()
+        try:
+            return self._tokenizer.encode(text, **kwargs)
+        finally:
+            self.cpu_time += time.process_time() - start
+            self.calls += 1
+
+    def __getattr__(self, name):
+        return getattr(self._tokenizer, name)
+
+
+async def run_pipeline(transcript: str, concurrency: int):
+    generator = SPARCPromptGenerator(
+        api_key="fake",
+        model="gpt-4o",
+        model_config=BENCH_MODEL_CONFIG,
+        max_concurrency=concurrency,
+    )
+    timed = TimedTokenizer(generator.tokenizer)
+    generator.token_counter.tokenizer = timed
+
+    analysis = await generator.analyze_transcript(transcript)
+    artifacts = await generator.generate_sparc_artifacts(analysis)
+    await generator.validate_artifacts(artifacts, analysis)
+    await generator.chat_simulation(artifacts)
+    return generator, timed
+
+
+def replay_previous_accounting(generator: SPARCPromptGenerator, exchanges) -> TimedTokenizer:
+    """Encode what the accounting did before usage came from the response."""
+    timed = TimedTokenizer(generator.tokenizer)
+    analysis_prefix = generator.prompts["initial_analysis"] + "\n\n"
+    for messages, content in exchanges:
+        for message in messages:
+            timed.encode(message["content"])
+        prompt = messages[-1]["content"]
+        if not prompt.startswith(analysis_prefix):
+            timed.encode(prompt)
+        timed.encode(content.strip())
+    return timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=32, help="Number of transcript chunks")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent chunk analyses")
+    args = parser.parse_args()
+
+    transcript = build_transcript(args.chunks)
+    with FakeChatCompletionsServer(record=True) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        generator, current = asyncio.run(run_pipeline(transcript, args.concurrency))
+        exchanges = list(server.exchanges)
+
+    previous = replay_previous_accounting(generator, exchanges)
+    print(json.dumps({
+        "chunks": args.chunks,
+        "requests": len(exchanges),
+        "previous": {"encode_calls": previous.calls, "cpu_time_s": round(previous.cpu_time, 4)},
+        "current": {
+            "encode_calls": current.calls,
+            "cpu_time_s": round(current.cpu_time, 4),
+            "memo": generator.token_counter.stats(),
+        },
+        "cpu_time_saved_s": round(previous.cpu_time - current.cpu_time, 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Local stand-in for the OpenAI chat-completions endpoint.
+
+The server speaks just enough of ``POST /v1/chat/completions`` for
+``AsyncOpenAI`` to talk to it, including ``stream=True`` server-sent events,
+with an injected per-request latency (and optional per-token delay when
+streaming) so the benchmarks can measure scheduling behaviour without network
+or API costs. Latency can follow a distribution instead of being constant,
+a fraction of requests can fail with 500 or 429 responses or stall as slow
+stragglers, and the size of generated artifacts is configurable.
+"""
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+
+def _analysis_payload(prompt: str) -> Dict[str, Any]:
+    """Build a deterministic transcript-analysis JSON for a prompt."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    return {
+        "application_type": "Online directory",
+        "technical_domain": "Web development",
+        "core_functionalities": [f"Feature {digest}", "Listing management"],
+        "technical_requirements": [f"Requirement {digest}"],
+        "components": ["Frontend", "Backend"],
+        "dependencies": ["PostgreSQL"],
+        "technologies": ["Python"],
+        "implementation_details": {
+            "algorithms": [f"Algorithm {digest}"],
+            "patterns": ["MVC"],
+            "architecture_decisions": ["Static site generation"],
+            "constraints": ["Low budget"]
+        }
+    }
+
+
+def _validation_payload() -> Dict[str, Any]:
+    """Build a validation JSON that marks the plan as ready."""
+    return {
+        "coverage_analysis": {
+            "features_covered": ["Listing management"],
+            "missing_features": [],
+            "requirements_covered": ["Low budget"],
+            "missing_requirements": []
+        },
+        "technical_validation": {
+            "architecture_completeness": True,
+            "implementation_feasibility": True,
+            "concerns": [],
+            "recommendations": []
+        },
+        "overall_assessment": {
+            "ready_for_implementation": True,
+            "critical_gaps": [],
+            "suggested_improvements": []
+        }
+    }
+
+
+def build_response_content(messages: List[Dict[str, Any]], artifact_words: int = 200) -> str:
+    """Pick a plausible response body for the request's last user message."""
+    prompt = messages[-1].get("content", "") if messages else ""
+    if "coverage_analysis" in prompt:
+        return json.dumps(_validation_payload())
+    if "JSON format" in prompt:
+        return "```json\n" + json.dumps(_analysis_payload(prompt), indent=2) + "\n```"
+    sentences = max(1, artifact_words // 5)
+    return "# Generated artifact\n\n" + "Lorem ipsum dolor sit amet. " * sentences
+
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+
+def sample_latency(rng: random.Random, distribution: str, mean: float) -> float:
+    """Draw one request latency with the given mean."""
+    if mean <= 0 or distribution == "constant":
+        return max(mean, 0.0)
+    if distribution == "uniform":
+        return rng.uniform(0, 2 * mean)
+    if distribution == "exponential":
+        return rng.expovariate(1 / mean)
+    if distribution == "lognormal":
+        # sigma 0.5: a moderate right tail, scaled so the mean is ``mean``
+        sigma = 0.5
+        return rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+    raise ValueError(f"Unknown latency distribution: {distribution}")
+
+
+class _ChatCompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+
+        with server.lock:
+            server.request_count += 1
+            latency = sample_latency(server.rng, server.latency_distribution, server.latency)
+            roll = server.rng.random()
+            if server.rng.random() < server.slow_rate:
+                server.slow_count += 1
+                latency += server.slow_latency
+        time.sleep(latency)
+
+        if roll < server.rate_limit_rate:
+            with server.lock:
+                server.rate_limited_count += 1
+            self._send_error(429, "rate_limit_exceeded", "Rate limit reached",
+                             {"Retry-After": str(server.retry_after)})
+            return
+        if roll < server.rate_limit_rate + server.error_rate:
+            with server.lock:
+                server.error_count += 1
+            self._send_error(500, "server_error", "The server had an error while processing your request")
+            return
+
+        content = build_response_content(request.get("messages", []), server.artifact_words)
+        if server.record:
+            with server.lock:
+                server.exchanges.append((request.get("messages", []), content))
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in request.get("messages", []))
+        completion_tokens = len(content.split())
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        if request.get("stream"):
+            self._stream_response(request, completion_id, content, usage)
+            return
+
+        body = json.dumps({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, code: str, message: str, headers: Dict[str, str] = None):
+        body = json.dumps({"error": {"message": message, "type": code, "code": code}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_response(self, request, completion_id, content, usage):
+        """Send the response as server-sent events, one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, chunk_usage=None):
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4o"),
+                "choices": choices,
+                "usage": chunk_usage
+            }
+            self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            event([{"index": 0, "delta": {"content": text}, "finish_reason": None}])
+            if self.server.token_interval:
+                time.sleep(self.server.token_interval)
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if request.get("stream_options", {}).get("include_usage"):
+            event([], usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept bursts of concurrent connections without SYN retries
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on slow responses they timed out or hedged
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeChatCompletionsServer:
+    """Threaded fake chat-completions server with injected latency and failures.
+
+    Args:
+        latency: Mean per-request latency in seconds.
+        latency_distribution: One of ``LATENCY_DISTRIBUTIONS``.
+        error_rate: Fraction of requests answered with HTTP 500.
+        rate_limit_rate: Fraction of requests answered with HTTP 429.
+        retry_after: ``Retry-After`` seconds sent with 429 responses.
+        slow_rate: Fraction of requests delayed by ``slow_latency`` more.
+        slow_latency: Extra latency of slow requests, in seconds.
+        artifact_words: Approximate length of generated artifacts.
+        seed: Seed for latency and failure draws.
+
+    Usage::
+
+        with FakeChatCompletionsServer(latency=0.2) as server:
+            client = AsyncOpenAI(api_key="fake", base_url=server.base_url)
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 token_interval: float = 0.0, record: bool = False,
+                 latency_distribution: str = "constant", error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 0.05,
+                 slow_rate: float = 0.0, slow_latency: float = 0.0,
+                 artifact_words: int = 200, seed: int = 0):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self._httpd = _Server((host, port), _ChatCompletionsHandler)
+        self._httpd.latency = latency
+        self._httpd.token_interval = token_interval
+        self._httpd.request_count = 0
+        self._httpd.error_count = 0
+        self._httpd.rate_limited_count = 0
+        self._httpd.latency_distribution = latency_distribution
+        self._httpd.error_rate = error_rate
+        self._httpd.rate_limit_rate = rate_limit_rate
+        self._httpd.retry_after = retry_after
+        self._httpd.slow_rate = slow_rate
+        self._httpd.slow_latency = slow_latency
+        self._httpd.slow_count = 0
+        self._httpd.artifact_words = artifact_words
+        self._httpd.rng = random.Random(seed)
+        self._httpd.record = record
+        self._httpd.exchanges = []
+        self._httpd.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_count(self) -> int:
+        return self._httpd.request_count
+
+    @property
+    def error_count(self) -> int:
+        return self._httpd.error_count
+
+    @property
+    def rate_limited_count(self) -> int:
+        return self._httpd.rate_limited_count
+
+    @property
+    def slow_count(self) -> int:
+        return self._httpd.slow_count
+
+    @property
+    def exchanges(self) -> List[tuple]:
+        """(messages, response content) of every request, when recording."""
+        return self._httpd.exchanges
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
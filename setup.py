@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 setup(
     name="sparc-generator",
     version="0.1.1",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     include_package_data=True,
     install_requires=[
         "openai>=0.27.8",
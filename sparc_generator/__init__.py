@@ -1,4 +1,12 @@
 """SPARC Framework Generator package."""
-from .core import SPARCPromptGenerator, validate_model_config, MODEL_CONFIGS
+from .models import validate_model_config, MODEL_CONFIGS
 
-__all__ = ['SPARCPromptGenerator', 'validate_model_config', 'MODEL_CONFIGS']
\ No newline at end of file
+__all__ = ['SPARCPromptGenerator', 'validate_model_config', 'MODEL_CONFIGS']
+
+
+def __getattr__(name):
+    # The generator pulls in openai and tiktoken; load it on first access
+    if name == "SPARCPromptGenerator":
+        from .core import SPARCPromptGenerator
+        return SPARCPromptGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
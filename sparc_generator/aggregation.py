@@ -0,0 +1,163 @@
+"""Order-preserving, normalized aggregation of chunk analyses."""
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+# List fields merged across chunks
+LIST_KEYS = ["core_functionalities", "technical_requirements", "components", "dependencies", "technologies"]
+DETAIL_KEYS = ["algorithms", "patterns", "architecture_decisions", "constraints"]
+
+# Tree-reduce analysis merges partial analyses until the analysis JSON fits this many tokens
+DEFAULT_ANALYSIS_TOKEN_BUDGET = 4000
+
+# Anything but word characters, whitespace and the '+'/'#' of names like C++ and C#
+_PUNCTUATION = re.compile(r"[^\w\s+#]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _singular(word: str) -> str:
+    """Strip a simple English plural suffix."""
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    return word[:-1]
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for duplicate detection.
+
+    Case, punctuation, runs of whitespace and simple plurals are ignored, so
+    "PostgreSQL", "postgresql " and "Listing-managements" compare equal to
+    "postgresql" and "listing management".
+    """
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return " ".join(_singular(word) for word in _WHITESPACE.split(text) if word)
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {normalize_text(str(k)): _normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    return value
+
+
+def normalize_item(item: Any) -> str:
+    """Hashable normalized key for an analysis item (string, dict or other JSON value)."""
+    if isinstance(item, str):
+        return normalize_text(item)
+    return json.dumps(_normalize_value(item), sort_keys=True, ensure_ascii=False)
+
+
+class OrderedItemSet:
+    """Insertion-ordered set of items deduplicated by their normalized form.
+
+    Lookups go through a dict keyed on ``normalize_item``, so adding ``n``
+    items is O(n). The first spelling of an item is kept, and every later
+    duplicate increments its mention count. The distinct sources an item was
+    added from (such as chunk time ranges) are kept in first-seen order.
+    """
+
+    def __init__(self):
+        self._items: Dict[str, Any] = {}
+        self._counts: Dict[str, int] = {}
+        self._sources: Dict[str, Dict[str, None]] = {}
+
+    def add(self, item: Any, source: Optional[str] = None) -> bool:
+        """Add an item; return True if it was new."""
+        key = normalize_item(item)
+        if source is not None:
+            self._sources.setdefault(key, {})[source] = None
+        if key in self._items:
+            self._counts[key] += 1
+            return False
+        self._items[key] = item
+        self._counts[key] = 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def items(self) -> List[Any]:
+        """Items in first-seen order."""
+        return list(self._items.values())
+
+    def ranked(self) -> List[Tuple[Any, int]]:
+        """(item, mentions) pairs, most mentioned first, ties in first-seen order."""
+        order = sorted(self._items, key=lambda key: -self._counts[key])
+        return [(self._items[key], self._counts[key]) for key in order]
+
+    def sources(self, item: Any) -> List[str]:
+        """Sources the item was added from, in first-seen order."""
+        return list(self._sources.get(normalize_item(item), ()))
+
+
+class AnalysisAggregator:
+    """Merge chunk analyses into one analysis.
+
+    ``application_type`` and ``technical_domain`` come from the first chunk that
+    reports them; list fields are merged with ``OrderedItemSet``. A ``source``
+    passed with a chunk analysis, such as the chunk's time range in the video,
+    is recorded for every item of that chunk.
+    """
+
+    def __init__(self):
+        self.application_type = ""
+        self.technical_domain = ""
+        self.lists = {key: OrderedItemSet() for key in LIST_KEYS}
+        self.details = {key: OrderedItemSet() for key in DETAIL_KEYS}
+
+    def add(self, analysis: Dict[str, Any], source: Optional[str] = None):
+        """Merge one chunk analysis."""
+        if not self.application_type:
+            self.application_type = analysis.get("application_type", "")
+        if not self.technical_domain:
+            self.technical_domain = analysis.get("technical_domain", "")
+
+        for key, items in self.lists.items():
+            for item in analysis.get(key, []):
+                items.add(item, source)
+
+        details = analysis.get("implementation_details", {})
+        for key, items in self.details.items():
+            for item in details.get(key, []):
+                items.add(item, source)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The aggregated analysis in the initial-analysis JSON shape."""
+        result = {
+            "application_type": self.application_type,
+            "technical_domain": self.technical_domain,
+        }
+        result.update({key: items.items() for key, items in self.lists.items()})
+        result["implementation_details"] = {key: items.items() for key, items in self.details.items()}
+        return result
+
+    def mention_counts(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Items of every list field ranked by how many chunks mentioned them.
+
+        Items added with a source also list the sources under ``timestamps``.
+        """
+        fields = dict(self.lists)
+        fields.update(self.details)
+        counts = {}
+        for key, items in fields.items():
+            counts[key] = []
+            for item, count in items.ranked():
+                entry = {"item": item, "mentions": count}
+                sources = items.sources(item)
+                if sources:
+                    entry["timestamps"] = sources
+                counts[key].append(entry)
+        return counts
+
+
+def merge_analyses(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Union of several analyses, deduplicated like ``AnalysisAggregator``."""
+    aggregator = AnalysisAggregator()
+    for analysis in analyses:
+        aggregator.add(analysis)
+    return aggregator.to_dict()
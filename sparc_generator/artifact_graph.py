@@ -0,0 +1,96 @@
+"""Dependency graph of the SPARC artifacts and its scheduler."""
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, List, Tuple
+
+# Input name for the transcript analysis, available before any artifact
+ANALYSIS_INPUT = "analysis"
+
+
+def validate_artifact_graph(graph: Dict[str, List[str]], artifact_names: List[str]) -> Dict[str, List[str]]:
+    """Check a declared artifact graph and return it in dependency order.
+
+    Every artifact in ``artifact_names`` must be declared, inputs must be
+    ``"analysis"`` or other declared artifacts, and the graph must not have
+    cycles. Artifacts come back in an order where inputs precede the
+    artifacts that use them; ties keep the ``artifact_names`` order.
+
+    Raises:
+        ValueError: If the graph is incomplete, references unknown inputs or
+            has a cycle.
+    """
+    missing = [name for name in artifact_names if name not in graph]
+    if missing:
+        raise ValueError(f"Artifact graph does not declare: {', '.join(missing)}")
+    unknown = [name for name in graph if name not in artifact_names]
+    if unknown:
+        raise ValueError(f"Artifact graph declares unknown artifacts: {', '.join(unknown)}")
+    for name, inputs in graph.items():
+        if not inputs:
+            raise ValueError(f"Artifact '{name}' has no inputs")
+        for source in inputs:
+            if source != ANALYSIS_INPUT and source not in graph:
+                raise ValueError(f"Artifact '{name}' depends on unknown input '{source}'")
+
+    ordered: Dict[str, List[str]] = {}
+    while len(ordered) < len(artifact_names):
+        ready = [
+            name for name in artifact_names
+            if name not in ordered and all(s == ANALYSIS_INPUT or s in ordered for s in graph[name])
+        ]
+        if not ready:
+            cycle = [name for name in artifact_names if name not in ordered]
+            raise ValueError(f"Artifact graph has a cycle among: {', '.join(cycle)}")
+        for name in ready:
+            ordered[name] = list(graph[name])
+    return ordered
+
+
+async def run_artifact_graph(
+    graph: Dict[str, List[str]],
+    run: Callable[[str], Awaitable[Any]]
+) -> Dict[str, Any]:
+    """Run ``run(name)`` for every artifact as soon as all its inputs are done.
+
+    ``graph`` must be in dependency order (see ``validate_artifact_graph``).
+    Independent artifacts run concurrently. Returns results by artifact name.
+    """
+    tasks: Dict[str, asyncio.Future] = {}
+
+    async def run_when_ready(name: str) -> Any:
+        await asyncio.gather(*(tasks[source] for source in graph[name] if source != ANALYSIS_INPUT))
+        return await run(name)
+
+    for name in graph:
+        tasks[name] = asyncio.ensure_future(run_when_ready(name))
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    return {name: task.result() for name, task in tasks.items()}
+
+
+def critical_path(graph: Dict[str, List[str]], durations: Dict[str, float]) -> Tuple[float, List[str]]:
+    """Longest chain of dependent artifacts by duration.
+
+    Returns the chain's total latency and its artifacts, in order. This is the
+    shortest possible wall time for generating the artifacts with unlimited
+    concurrency.
+    """
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Any] = {}
+    for name, inputs in graph.items():
+        sources = [source for source in inputs if source != ANALYSIS_INPUT]
+        before = max(sources, key=lambda source: finish[source], default=None)
+        previous[name] = before
+        finish[name] = (finish[before] if before else 0.0) + durations.get(name, 0.0)
+
+    if not finish:
+        return 0.0, []
+    last = max(finish, key=finish.get)
+    path = []
+    node = last
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    return finish[last], path[::-1]
@@ -0,0 +1,234 @@
+"""Persistent caches for model responses and chunk analyses."""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sparc_generator"
+DEFAULT_MAX_SIZE_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+# Cache hits whose access times are written in one batch, and stores between
+# sweeps for expired entries
+ACCESS_BATCH_SIZE = 64
+EXPIRY_SWEEP_PUTS = 256
+
+
+class ResponseCache:
+    """Content-addressed, SQLite-backed cache of chat completion responses.
+
+    Entries are keyed by a hash of everything that determines a response
+    (model, messages, temperature and max_tokens). Entries older than
+    ``max_age_seconds`` are dropped, and when the stored payloads exceed
+    ``max_size_bytes`` the least recently used entries are evicted first.
+
+    Lookups run on the event loop between requests, so the cache keeps a
+    running total of the payload size instead of summing the table, evicts
+    only once the total is over the limit, sweeps for expired entries every
+    ``EXPIRY_SWEEP_PUTS`` stores and writes the access times of hits in
+    batches of ``ACCESS_BATCH_SIZE``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._accessed: Dict[str, float] = {}
+        self._puts = 0
+
+        self._conn = sqlite3.connect(self.cache_dir / "responses.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses (last_accessed)"
+        )
+        self._conn.commit()
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int) -> str:
+        """Hash the request parameters that determine a response."""
+        material = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for ``key`` or None on a miss."""
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT payload, created_at, size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or now - row[1] > self.max_age_seconds:
+            if row is not None:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_size -= row[2]
+                self._accessed.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._accessed[key] = now
+        if len(self._accessed) >= ACCESS_BATCH_SIZE:
+            self._write_accesses()
+            self._conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, payload: Dict[str, Any]):
+        """Store a response payload and evict entries once the cache is over its limits."""
+        now = time.time()
+        data = json.dumps(payload)
+        size = len(data.encode("utf-8"))
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, payload, size, created_at, last_accessed) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, data, size, now, now)
+        )
+        self._total_size += size - (row[0] if row else 0)
+        self._accessed.pop(key, None)
+        self._puts += 1
+        if self._puts % EXPIRY_SWEEP_PUTS == 0 or self._total_size > self.max_size_bytes:
+            self.evict()
+        else:
+            self._conn.commit()
+
+    def _write_accesses(self):
+        """Write the pending access times of cache hits."""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE responses SET last_accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()]
+            )
+            self._accessed.clear()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the size limit."""
+        self._write_accesses()
+        cutoff = time.time() - self.max_age_seconds
+        expired = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses WHERE created_at < ?", (cutoff,)
+        ).fetchone()[0]
+        if expired:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+            self._total_size -= expired
+
+        if self._total_size > self.max_size_bytes:
+            evicted = []
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_accessed ASC")
+            for key, size in rows:
+                if self._total_size <= self.max_size_bytes:
+                    break
+                evicted.append((key,))
+                self._total_size -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            logging.info(f"Evicted {len(evicted)} entries from response cache")
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current cache footprint."""
+        self._write_accesses()
+        self._conn.commit()
+        entries, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size
+        }
+
+    def close(self):
+        """Write pending access times and close the underlying database connection."""
+        self._write_accesses()
+        self._conn.commit()
+        self._conn.close()
+
+
+class ChunkAnalysisStore:
+    """SQLite store of parsed transcript-chunk analyses keyed by chunk hash.
+
+    Used with content-defined chunking: re-analyzing an edited transcript
+    only calls the model for chunks whose hash is not in the store.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(self.cache_dir / "chunk_analyses.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunk_analyses (
+                key TEXT PRIMARY KEY,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "DELETE FROM chunk_analyses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, chunk_hash: str) -> str:
+        """Key an analysis by model, analysis prompt and chunk content hash."""
+        material = json.dumps([model, prompt, chunk_hash], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored analysis for ``key`` or None."""
+        row = self._conn.execute(
+            "SELECT analysis FROM chunk_analyses WHERE key = ? AND created_at >= ?",
+            (key, time.time() - self.max_age_seconds)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, analysis: Dict[str, Any]):
+        """Store the analysis of one chunk."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO chunk_analyses (key, analysis, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(analysis), time.time())
+        )
+        self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
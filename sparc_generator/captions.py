@@ -0,0 +1,238 @@
+"""Streaming SRT, WebVTT and YouTube JSON3 caption parsers and timed transcripts."""
+import json
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# Cue timing of SRT ("00:00:01,000 --> 00:00:04,000") and WebVTT
+# ("00:01.000 --> 00:04.000 align:start"); hours are optional in WebVTT
+CUE_TIMING = re.compile(
+    r'^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})'
+)
+
+# Inline caption markup such as <00:00:01.500>, <c> and </c>
+INLINE_MARKUP = re.compile(r'<[^<>\n]{0,40}>')
+
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+
+# Caption formats by file extension; other files, ".json" included, are sniffed
+CAPTION_SUFFIXES = {".srt": "srt", ".vtt": "vtt", ".json3": "json3"}
+
+# Characters read at a time from JSON3 files
+JSON3_READ_SIZE = 1 << 16
+
+
+@dataclass
+class CaptionSegment:
+    """Caption text shown from ``start_s`` to ``end_s`` seconds into the video."""
+    text: str
+    start_s: float
+    end_s: float
+
+
+def parse_timestamp(value: str) -> float:
+    """Seconds of a caption timestamp such as ``01:02:03,500`` or ``02:03.500``."""
+    parts = value.replace(",", ".").split(":")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """``H:MM:SS``, or ``M:SS`` below an hour, as YouTube shows timestamps."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def parse_cues(lines: Iterable[str]) -> Iterator[CaptionSegment]:
+    """Yield the cues of an SRT or WebVTT file given line by line.
+
+    A cue is a timing line followed by text lines up to a blank line. Lines
+    before the timing (cue numbers and identifiers) and blocks without one
+    (the WEBVTT header, NOTE and STYLE blocks) are skipped. Inline markup is
+    removed; only the current cue is held in memory.
+    """
+    start = end = None
+    text: List[str] = []
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        timing = CUE_TIMING.match(line) if "-->" in line else None
+        if timing or not line.strip():
+            if start is not None and text:
+                yield CaptionSegment("\n".join(text), start, end)
+            start, text = None, []
+            if timing:
+                start, end = parse_timestamp(timing.group(1)), parse_timestamp(timing.group(2))
+            continue
+        if start is not None:
+            line = INLINE_MARKUP.sub("", line).strip()
+            if line:
+                text.append(line)
+    if start is not None and text:
+        yield CaptionSegment("\n".join(text), start, end)
+
+
+def _json3_segment(event: dict) -> Optional[CaptionSegment]:
+    text = "".join(seg.get("utf8", "") for seg in event.get("segs") or ())
+    if not text.strip():
+        return None
+    start = event.get("tStartMs", 0) / 1000
+    return CaptionSegment(text.strip(), start, start + event.get("dDurationMs", 0) / 1000)
+
+
+def parse_json3(f: TextIO, read_size: int = JSON3_READ_SIZE) -> Iterator[CaptionSegment]:
+    """Yield the caption events of a YouTube JSON3 file.
+
+    The file is read ``read_size`` characters at a time and events are
+    decoded one by one from the ``events`` array, so memory is bounded by the
+    read size and the largest event, not the file. Events without text
+    (window definitions and line breaks) are skipped. A file without an
+    ``events`` array raises ``ValueError``.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        key = buffer.find('"events"')
+        bracket = buffer.find("[", key) if key >= 0 else -1
+        if bracket >= 0:
+            break
+        data = f.read(read_size)
+        if not data:
+            raise ValueError('Not a JSON3 caption file: no "events" array')
+        buffer += data
+    pos = bracket + 1
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if buffer[pos] == "]":
+                return
+            try:
+                event, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                end = None
+            if end is not None:
+                pos = end
+                if pos >= read_size:
+                    buffer = buffer[pos:]
+                    pos = 0
+                if isinstance(event, dict):
+                    segment = _json3_segment(event)
+                    if segment is not None:
+                        yield segment
+                continue
+        # The next event continues past the buffer: drop what was consumed, read on
+        data = f.read(read_size)
+        if not data:
+            raise ValueError("JSON3 caption file ends inside its events array")
+        buffer = buffer[pos:] + data
+        pos = 0
+
+
+def detect_caption_format(path: Path) -> Optional[str]:
+    """``"srt"``, ``"vtt"`` or ``"json3"`` for a caption file, None for plain text.
+
+    ``.srt``, ``.vtt`` and ``.json3`` decide by extension; other files are
+    sniffed from their first lines. A JSON file is JSON3 only if its head
+    holds an ``events`` or YouTube's ``wireMagic`` key.
+    """
+    path = Path(path)
+    if path.suffix.lower() in CAPTION_SUFFIXES:
+        return CAPTION_SUFFIXES[path.suffix.lower()]
+    with open(path, encoding="utf-8", errors="replace") as f:
+        head = f.read(1024).lstrip("\ufeff \t\r\n")
+    if head.startswith("WEBVTT"):
+        return "vtt"
+    if head.startswith("{") and ('"events"' in head or '"wireMagic"' in head):
+        return "json3"
+    if any(CUE_TIMING.match(line) for line in head.splitlines()[:3]):
+        return "srt"
+    return None
+
+
+def read_captions(path: Path, caption_format: Optional[str] = None) -> Iterator[CaptionSegment]:
+    """Stream the segments of a caption file in a single pass."""
+    caption_format = caption_format or detect_caption_format(path)
+    if caption_format not in ("srt", "vtt", "json3"):
+        raise ValueError(f"Not a caption file: {path}")
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        if caption_format == "json3":
+            yield from parse_json3(f)
+        else:
+            yield from parse_cues(f)
+
+
+class TimedTranscript:
+    """Transcript text built from caption segments, with the time range of every segment.
+
+    Segments are joined with spaces into lines that end at a sentence end or
+    after ``max_line_words`` words. Only the text and three compact arrays
+    (character offset, start and end time per segment) are kept, so any
+    character range of the text, such as a chunk, maps back to the part of
+    the video it came from.
+    """
+
+    def __init__(self, max_line_words: int = 60):
+        self.max_line_words = max_line_words
+        self._parts: List[str] = []
+        self._offsets = array("q")
+        self._starts = array("d")
+        self._ends = array("d")
+        self._length = 0
+        self._line_words = 0
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[CaptionSegment], max_line_words: int = 60) -> "TimedTranscript":
+        transcript = cls(max_line_words)
+        for segment in segments:
+            transcript.add(segment)
+        return transcript
+
+    def add(self, segment: CaptionSegment):
+        """Append a segment to the text."""
+        text = " ".join(segment.text.split())
+        if not text:
+            return
+        if self._parts:
+            separator = "\n" if self._line_words == 0 else " "
+            self._parts.append(separator)
+            self._length += 1
+        self._offsets.append(self._length)
+        self._starts.append(segment.start_s)
+        self._ends.append(segment.end_s)
+        self._parts.append(text)
+        self._length += len(text)
+        self._line_words += text.count(" ") + 1
+        if self._line_words >= self.max_line_words or SENTENCE_END.search(text):
+            self._line_words = 0
+        self._text = None
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    @property
+    def duration_s(self) -> float:
+        return max(self._ends, default=0.0)
+
+    def time_range(self, start_char: int, end_char: int) -> Optional[Tuple[float, float]]:
+        """Start and end time of the segments overlapping ``[start_char, end_char)``."""
+        if not self._offsets:
+            return None
+        first = max(bisect_right(self._offsets, start_char) - 1, 0)
+        last = max(bisect_left(self._offsets, end_char) - 1, first)
+        return self._starts[first], max(self._ends[first:last + 1])
@@ -0,0 +1,121 @@
+"""Pipeline checkpoints for resuming interrupted runs."""
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+
+class PipelineCheckpoint:
+    """Progress of one ``sparc generate`` run, persisted in its project directory.
+
+    The checkpoint records every finished chunk analysis, the aggregated
+    analysis, every finished SPARC artifact, the validation result and the
+    usage log. It is rewritten atomically after each step, so a crash never
+    leaves a half-written file behind.
+    """
+
+    def __init__(self, project_dir: Path, data: Optional[Dict[str, Any]] = None):
+        self.project_dir = Path(project_dir)
+        self.path = self.project_dir / CHECKPOINT_FILE
+        self.data = data or {
+            "version": CHECKPOINT_VERSION,
+            "transcript_file": None,
+            "model": None,
+            "chunk_layout": None,
+            "chunk_analyses": {},
+            "analysis": None,
+            "artifacts": {},
+            "validation": None,
+            "usage_log": [],
+            "total_tokens": 0,
+            "completed": False,
+            "stopped": None,
+            "updated_at": None
+        }
+
+    @classmethod
+    def load(cls, project_dir: Path) -> "PipelineCheckpoint":
+        """Load the checkpoint of a project directory."""
+        path = Path(project_dir) / CHECKPOINT_FILE
+        if not path.exists():
+            raise FileNotFoundError(f"No checkpoint found in {project_dir}")
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {data.get('version')}")
+        return cls(project_dir, data)
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        self.project_dir.mkdir(parents=True, exist_ok=True)
+        self.data["updated_at"] = datetime.now().isoformat()
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def set_chunk_layout(self, layout: Dict[str, Any]):
+        """Record how the transcript was chunked.
+
+        Saved chunk analyses are only valid for the same layout; if it changed
+        (different transcript, model or chunking options) they are discarded.
+        """
+        if self.data["chunk_layout"] not in (None, layout) and self.data["chunk_analyses"]:
+            logging.warning("Transcript chunking changed since the checkpoint; re-analyzing all chunks")
+            self.data["chunk_analyses"] = {}
+        self.data["chunk_layout"] = layout
+
+    def get_chunk(self, idx: int) -> Optional[Dict[str, Any]]:
+        return self.data["chunk_analyses"].get(str(idx))
+
+    def record_chunk(self, idx: int, analysis: Dict[str, Any]):
+        self.data["chunk_analyses"][str(idx)] = analysis
+
+    def record_analysis(self, analysis: Dict[str, Any]):
+        self.data["analysis"] = analysis
+
+    def record_artifact(self, name: str, content: str):
+        self.data["artifacts"][name] = content
+
+    def record_validation(self, validation: Dict[str, Any]):
+        self.data["validation"] = validation
+
+    def record_usage(self, usage_log: List[Dict[str, Any]], total_tokens: int):
+        self.data["usage_log"] = list(usage_log)
+        self.data["total_tokens"] = total_tokens
+
+    def record_stop(self, reason: Optional[str], stage: Optional[str] = None):
+        """Record why the run stopped early and the stage it stopped in; None clears it."""
+        self.data["stopped"] = {"reason": reason, "stage": stage} if reason else None
+
+    @property
+    def stopped(self) -> Optional[Dict[str, Any]]:
+        return self.data.get("stopped")
+
+    @property
+    def analysis(self) -> Optional[Dict[str, Any]]:
+        return self.data["analysis"]
+
+    @property
+    def artifacts(self) -> Dict[str, str]:
+        return self.data["artifacts"]
+
+    @property
+    def validation(self) -> Optional[Dict[str, Any]]:
+        return self.data["validation"]
+
+    def next_stage(self, artifact_names: List[str]) -> str:
+        """Name of the first stage that still has work to do."""
+        if self.analysis is None:
+            return "analysis"
+        missing = [name for name in artifact_names if name not in self.artifacts]
+        if missing:
+            return missing[0]
+        if self.validation is None:
+            return "validation"
+        return "complete"
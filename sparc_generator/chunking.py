@@ -0,0 +1,220 @@
+"""Token-exact transcript chunking."""
+import hashlib
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Boundaries are positions where a chunk may end: a blank line ends a
+# paragraph, sentence punctuation or a single line break ends a sentence.
+# Matches stop before any following whitespace because tiktoken attaches
+# leading spaces to the next word.
+PARAGRAPH_BOUNDARY = re.compile(r'\n[ \t]*\n+')
+SENTENCE_BOUNDARY = re.compile(r'[.!?]["\')\]]*(?=\s)|\n+')
+
+# How far back from the token limit to look for a boundary, as a fraction of
+# the chunk size. Beyond this window a chunk is cut mid-sentence instead.
+BOUNDARY_WINDOW = 0.2
+
+# Content-defined chunking: a gear hash over token IDs looks back 64 tokens,
+# and a cut found by the hash is moved back to a sentence end at most this
+# many tokens earlier.
+CDC_SNAP_TOKENS = 64
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+@dataclass
+class TranscriptChunk:
+    """A slice of the transcript together with its token count.
+
+    ``token_count`` is the number of tokens the slice occupies in the single
+    encoding of the whole transcript, so callers never need to re-encode it.
+    ``start_char``/``end_char`` locate the slice in the original text, and
+    ``start_s``/``end_s`` the part of the video it covers when the transcript
+    came from a caption file.
+    """
+    text: str
+    token_count: int
+    start_char: int
+    end_char: int
+    start_s: Optional[float] = None
+    end_s: Optional[float] = None
+
+    def __str__(self) -> str:
+        return self.text
+
+    @property
+    def sha256(self) -> str:
+        """Content hash identifying the chunk across runs."""
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+def _boundary_tokens(text: str, pattern: re.Pattern, offsets: List[int]) -> List[int]:
+    """Map the end of every ``pattern`` match to the index of the token starting there."""
+    indices = []
+    for match in pattern.finditer(text):
+        idx = bisect_left(offsets, match.end())
+        if idx < len(offsets) and (not indices or indices[-1] != idx):
+            indices.append(idx)
+    return indices
+
+
+def _last_boundary(boundaries: List[int], low: int, high: int) -> int:
+    """Return the largest boundary in ``(low, high]``, or -1 if there is none."""
+    pos = bisect_right(boundaries, high) - 1
+    if pos >= 0 and boundaries[pos] > low:
+        return boundaries[pos]
+    return -1
+
+
+def _encode(text: str, tokenizer):
+    """Encode text once and return its tokens, per-token char offsets and boundaries."""
+    tokens = tokenizer.encode(text)
+    if not tokens:
+        return tokens, [], [], []
+    _, offsets = tokenizer.decode_with_offsets(tokens)
+    paragraphs = _boundary_tokens(text, PARAGRAPH_BOUNDARY, offsets)
+    sentences = _boundary_tokens(text, SENTENCE_BOUNDARY, offsets)
+    return tokens, offsets, paragraphs, sentences
+
+
+def _make_chunk(text: str, offsets: List[int], start: int, end: int) -> TranscriptChunk:
+    """Build the chunk covering tokens ``[start, end)``."""
+    total = len(offsets)
+    start_char = offsets[start] if start < total else len(text)
+    end_char = offsets[end] if end < total else len(text)
+    return TranscriptChunk(
+        text=text[start_char:end_char],
+        token_count=end - start,
+        start_char=start_char,
+        end_char=end_char
+    )
+
+
+def split_into_chunks(
+    text: str,
+    tokenizer,
+    max_tokens: int,
+    overlap_tokens: int = 0
+) -> List[TranscriptChunk]:
+    """Split text into chunks of at most ``max_tokens`` tokens.
+
+    The text is encoded once and chunks are cut on token-ID ranges. Each chunk
+    ends on a paragraph boundary if one lies within the last
+    ``BOUNDARY_WINDOW`` of the chunk, otherwise on a sentence boundary,
+    otherwise exactly at the token limit. With ``overlap_tokens`` each chunk
+    after the first re-reads up to that many tokens from the end of the
+    previous chunk, starting at a sentence boundary where possible.
+
+    Args:
+        text: Text to split.
+        tokenizer: A ``tiktoken`` encoding.
+        max_tokens: Token budget for a single chunk.
+        overlap_tokens: Tokens shared between consecutive chunks.
+
+    Returns:
+        List of chunks in transcript order.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be between 0 and max_tokens - 1")
+
+    tokens, offsets, paragraphs, sentences = _encode(text, tokenizer)
+    if not tokens:
+        return []
+    total = len(tokens)
+    window = max(1, int(max_tokens * BOUNDARY_WINDOW))
+
+    chunks = []
+    start = 0
+    while start < total:
+        end = min(start + max_tokens, total)
+        if end < total:
+            floor = max(start, end - window)
+            boundary = _last_boundary(paragraphs, floor, end)
+            if boundary < 0:
+                boundary = _last_boundary(sentences, floor, end)
+            if boundary >= 0:
+                end = boundary
+
+        chunks.append(_make_chunk(text, offsets, start, end))
+        if end >= total:
+            break
+
+        next_start = end
+        if overlap_tokens:
+            next_start = max(start + 1, end - overlap_tokens)
+            # Prefer to begin the overlap at the start of a sentence
+            pos = bisect_left(sentences, next_start)
+            if pos < len(sentences) and sentences[pos] < end:
+                next_start = sentences[pos]
+        start = next_start
+
+    return chunks
+
+
+def split_content_defined(
+    text: str,
+    tokenizer,
+    max_tokens: int,
+    min_tokens: int = None,
+    average_gap: int = None
+) -> List[TranscriptChunk]:
+    """Split text at content-defined boundaries within a token budget.
+
+    A gear rolling hash runs over the token IDs; a chunk ends at the first
+    position after ``min_tokens`` where the hash hits a 1-in-``average_gap``
+    pattern, moved back to a nearby sentence end when there is one, or at
+    ``max_tokens`` if no such position appears. Because the hash only looks at
+    the last 64 tokens, an edit moves at most the boundaries next to it and
+    every other chunk keeps its exact text (and hash) across runs.
+
+    Args:
+        text: Text to split.
+        tokenizer: A ``tiktoken`` encoding.
+        max_tokens: Token budget for a single chunk.
+        min_tokens: Smallest chunk produced at a hash boundary
+            (default: half the budget).
+        average_gap: Expected tokens between hash boundaries after
+            ``min_tokens`` (default: a quarter of the budget).
+
+    Returns:
+        List of chunks in transcript order.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    min_tokens = max(1, min_tokens if min_tokens is not None else max_tokens // 2)
+    average_gap = max(1, average_gap if average_gap is not None else max_tokens // 4)
+    if min_tokens > max_tokens:
+        raise ValueError("min_tokens must not exceed max_tokens")
+
+    tokens, offsets, _, sentences = _encode(text, tokenizer)
+    if not tokens:
+        return []
+    total = len(tokens)
+
+    # Gear hash after each token; the high bits depend on the last 64 tokens only
+    hashes = []
+    h = 0
+    for token in tokens:
+        h = ((h << 1) + ((token + 1) * _GOLDEN & _MASK64)) & _MASK64
+        hashes.append(h >> 32)
+
+    chunks = []
+    start = 0
+    while start < total:
+        end = min(start + max_tokens, total)
+        for idx in range(start + min_tokens, end):
+            if hashes[idx - 1] % average_gap == 0:
+                end = idx
+                # Prefer to end on a sentence close to the hash boundary
+                snapped = _last_boundary(sentences, max(start + min_tokens - 1, idx - CDC_SNAP_TOKENS), idx)
+                if snapped >= 0:
+                    end = snapped
+                break
+        chunks.append(_make_chunk(text, offsets, start, end))
+        start = end
+
+    return chunks
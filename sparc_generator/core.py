@@ -1,195 +1,122 @@
 """SPARC Framework Generator main module."""
 import json
-from typing import Dict, Any, List
-import openai
+import hashlib
+from typing import Dict, Any, List, Optional, Callable, Tuple, Union
 from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
 import yaml
 from pathlib import Path
-from datetime import datetime
 import logging
 import re
 import tiktoken
-import math
 import asyncio
+import time
 import warnings
 from urllib3.exceptions import NotOpenSSLWarning
+from .chunking import TranscriptChunk, split_into_chunks, split_content_defined
+from .cache import ResponseCache, ChunkAnalysisStore
+from .streaming import StreamWriter
+from .checkpoint import PipelineCheckpoint
+from .tokens import TokenCounter
+from .aggregation import AnalysisAggregator, merge_analyses, DEFAULT_ANALYSIS_TOKEN_BUDGET
+from .validation import merge_validations
+from .usage import UsageLog, UsageRecord, TokenBudget, TokenBudgetExceeded, MIN_COMPLETION_TOKENS
+from .estimate import RunEstimate, concurrent_wall_time
+from .normalize import NormalizationOptions, TranscriptNormalizer
+from .captions import TimedTranscript, detect_caption_format, format_timestamp, read_captions
+from .artifact_graph import ANALYSIS_INPUT, validate_artifact_graph, run_artifact_graph, critical_path
+from .extraction import extract_json_object, SCHEMAS
+from .metrics import MetricsRecorder, get_metrics_recorder, traced_stage
+from .transport import Transport, get_transport
+from .models import (
+    SPARC_ARTIFACTS,
+    PIPELINE_STAGES,
+    MODEL_CONFIGS,
+    MODEL_RATE_LIMITS,
+    DEFAULT_RATE_LIMITS,
+    MODEL_FAMILIES,
+    get_recommended_model,
+    validate_model_config,
+    get_model_rate_limits,
+    get_model_pricing
+)
+from .rate_limit import (
+    RateLimiter,
+    get_rate_limiter,
+    estimate_request_tokens,
+    MESSAGE_OVERHEAD_TOKENS,
+    REPLY_OVERHEAD_TOKENS
+)
 
 # Suppress OpenSSL warnings temporarily
 warnings.simplefilter('ignore', NotOpenSSLWarning)
 
-# Configure logging
-logging.basicConfig(
-    filename='sparc_generator.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+# System prompt shared by transcript analysis and artifact generation
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant specialized in software development."
+
+# System prompts of the validation and chat simulation requests
+VALIDATION_SYSTEM_PROMPT = (
+    "You are a validation assistant that responds only with properly formatted JSON. "
+    "Never include explanatory text or markdown formatting in your response."
 )
+ARTIFACT_VALIDATION_SYSTEM_PROMPT = "You are a validation assistant that responds only with properly formatted JSON."
+CHAT_SYSTEM_PROMPT = "You are an AI-powered software engineer assisting the user in developing an application."
 
-# Model configurations
-MODEL_CONFIGS = {
-    # GPT-4 Omni Family
-    "gpt-4o": {
-        "max_tokens": 16384,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "images"],
-        "description": "High-intelligence flagship model for complex tasks"
-    },
-    "gpt-4o-mini": {
-        "max_tokens": 16384,
-        "context_length": 128000,
-        "temperature": 0.7,
-        "capabilities": ["text", "images"],
-        "description": "Fast, affordable model for lightweight tasks"
-    },
-    "gpt-4o-2024-08-06": {
-        "max_tokens": 16384,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "images", "structured_output"],
-        "description": "Latest GPT-4o snapshot with Structured Output support"
-    },
-    # O1 Series (Reasoning Models)
-    "o1-preview": {
-        "max_tokens": 32768,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["reasoning", "code", "math"],
-        "description": "Advanced reasoning model for complex problem-solving"
-    },
-    "o1-mini": {
-        "max_tokens": 65536,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["reasoning", "code", "math", "science"],
-        "description": "Fast reasoning model optimized for coding and technical tasks"
-    },
-    # GPT-4 Turbo Family
-    "gpt-4-turbo": {
-        "max_tokens": 4096,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "images", "json_mode", "function_calling"],
-        "description": "Latest GPT-4 Turbo model with enhanced capabilities"
-    },
-    "gpt-4-turbo-2024-04-09": {
-        "max_tokens": 4096,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "images", "json_mode", "function_calling"],
-        "description": "GPT-4 Turbo with vision capabilities"
-    },
-    "gpt-4-0125-preview": {
-        "max_tokens": 4096,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "function_calling", "reduced_laziness"],
-        "description": "Preview model with improved task completion"
-    },
-    # Specialized Models
-    "gpt-4o-realtime-preview": {
-        "max_tokens": 4096,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "audio", "websocket"],
-        "description": "Preview model for realtime interactions"
-    },
-    "gpt-4o-audio-preview": {
-        "max_tokens": 16384,
-        "context_length": 128000,
-        "temperature": 0.2,
-        "capabilities": ["text", "audio"],
-        "description": "Preview model for audio processing in chat"
-    }
-}
-
-# Model family definitions with capabilities
-MODEL_FAMILIES = {
-    "gpt-4o": {
-        "description": "High-intelligence multimodal models",
-        "base_capabilities": ["text", "images"],
-        "models": ["gpt-4o", "gpt-4o-2024-08-06", "gpt-4o-2024-05-13"],
-        "recommended_for": ["complex_tasks", "multimodal", "enterprise"]
-    },
-    "gpt-4o-mini": {
-        "description": "Fast, lightweight multimodal models",
-        "base_capabilities": ["text", "images"],
-        "models": ["gpt-4o-mini", "gpt-4o-mini-2024-07-18"],
-        "recommended_for": ["quick_tasks", "cost_effective", "vision"]
-    },
-    "o1": {
-        "description": "Advanced reasoning models",
-        "base_capabilities": ["reasoning", "code"],
-        "models": ["o1-preview", "o1-mini", "o1-preview-2024-09-12", "o1-mini-2024-09-12"],
-        "recommended_for": ["complex_reasoning", "coding", "math", "science"]
-    },
-    "gpt-4-turbo": {
-        "description": "Latest GPT-4 models with enhanced features",
-        "base_capabilities": ["text", "json_mode", "function_calling"],
-        "models": ["gpt-4-turbo", "gpt-4-turbo-2024-04-09", "gpt-4-0125-preview"],
-        "recommended_for": ["api_integration", "structured_output", "vision"]
-    }
-}
-
-def get_recommended_model(task_type: str = None, requirements: List[str] = None) -> str:
-    """
-    Get recommended model based on task type and requirements.
-    """
-    # Implementation remains the same
-    pass
-
-def validate_model_config(model: str, config: Dict[str, Any] = None, requirements: List[str] = None) -> Dict[str, Any]:
-    """
-    Enhanced model validation with capability checking.
-    """
-    # First, validate model exists
-    if model not in MODEL_CONFIGS and not any(
-        model in family["models"] 
-        for family in MODEL_FAMILIES.values()
-    ):
-        # If model not found, try to recommend one
-        recommended = get_recommended_model(requirements=requirements)
-        raise ValueError(
-            f"Unsupported model: {model}. "
-            f"Did you mean: {recommended}? "
-            f"Available models: {', '.join(MODEL_CONFIGS.keys())}"
-        )
-    
-    # If custom config provided, validate it
-    if config:
-        required_keys = {"max_tokens", "context_length", "temperature"}
-        if not all(key in config for key in required_keys):
-            raise ValueError(
-                f"Invalid model configuration. Required keys: {required_keys}"
-            )
-        return config
-
-    # Get model config
-    if model in MODEL_CONFIGS:
-        config = MODEL_CONFIGS[model]
-    else:
-        # Find family config
-        found = False
-        for family in MODEL_FAMILIES.values():
-            if model in family["models"]:
-                base_model = family["models"][0]
-                config = MODEL_CONFIGS[base_model]
-                found = True
-                break
-        if not found:
-            raise ValueError(f"Model {model} not found in model configurations.")
-
-    # Validate capabilities if required
-    if requirements:
-        missing = [req for req in requirements if req not in config["capabilities"]]
-        if missing:
-            recommended = get_recommended_model(requirements=requirements)
-            raise ValueError(
-                f"Model {model} missing required capabilities: {missing}. "
-                f"Consider using {recommended} instead."
-            )
-    
-    return config
+# JSON format requested from validation responses (braces escaped for format())
+VALIDATION_FORMAT = """
+        Respond ONLY with a valid JSON object in this exact format, without any additional text or explanation:
+        {{
+            "coverage_analysis": {{
+                "features_covered": [],
+                "missing_features": [],
+                "requirements_covered": [],
+                "missing_requirements": []
+            }},
+            "technical_validation": {{
+                "architecture_completeness": true/false,
+                "implementation_feasibility": true/false,
+                "concerns": [],
+                "recommendations": []
+            }},
+            "overall_assessment": {{
+                "ready_for_implementation": true/false,
+                "critical_gaps": [],
+                "suggested_improvements": []
+            }}
+        }}
+        """
+
+# Artifact validation prompt; filled with the analysis and artifacts as JSON
+VALIDATION_PROMPT = """
+        Validate these artifacts against the original requirements and produce a JSON response.
+        
+        Original Analysis:
+        {analysis}
+        
+        Generated Artifacts:
+        {artifacts}
+        """ + VALIDATION_FORMAT
+
+# Per-artifact validation prompt; filled with the artifact name, the compact
+# analysis JSON and the artifact text
+ARTIFACT_VALIDATION_PROMPT = """
+        Validate this {artifact_name} artifact against the original requirements and produce a JSON response.
+        Judge only what a {artifact_name} document is expected to cover; the other SPARC
+        artifacts are validated separately.
+
+        Original Analysis:
+        {analysis}
+
+        {artifact_name} Artifact:
+        {artifact}
+        """ + VALIDATION_FORMAT
+
+# Tree-reduce analysis never runs more than this many merge levels
+MAX_REDUCE_LEVELS = 16
+
+def get_model_rate_limiter(model: str) -> RateLimiter:
+    """Return the process-wide rate limiter for a model."""
+    return get_rate_limiter(model, **get_model_rate_limits(model))
 
 class SPARCPromptGenerator:
     def __init__(
@@ -197,11 +124,112 @@ class SPARCPromptGenerator:
         api_key: str, 
         model: str = "gpt-4o", 
         model_config: Dict[str, Any] = None,
-        requirements: List[str] = None
+        requirements: List[str] = None,
+        max_concurrency: int = 1,
+        chunk_overlap_tokens: int = 0,
+        max_chunk_tokens: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+        client: Optional[AsyncOpenAI] = None,
+        request_semaphore: Optional[asyncio.Semaphore] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        stream: bool = False,
+        stream_dir: Optional[Path] = None,
+        checkpoint: Optional[PipelineCheckpoint] = None,
+        chunking: str = "fixed",
+        analysis_store: Optional[ChunkAnalysisStore] = None,
+        base_url: Optional[str] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        transport: Optional[Transport] = None,
+        analysis_reduce: str = "union",
+        analysis_token_budget: int = DEFAULT_ANALYSIS_TOKEN_BUDGET,
+        reduce_fan_in: int = 2,
+        validation_mode: str = "combined",
+        validation_token_budget: Optional[int] = None,
+        artifact_graph: Optional[Dict[str, List[str]]] = None,
+        stage_models: Optional[Dict[str, str]] = None,
+        auto_route: bool = False,
+        model_performance: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None,
+        usage_log_path: Optional[Path] = None,
+        max_tokens_budget: Optional[int] = None,
+        normalize: Optional[bool] = None,
+        normalization: Optional[Dict[str, Any]] = None
     ):
-        """Initialize the SPARC Prompt Generator."""
-        # Initialize the AsyncOpenAI client
-        self.client = AsyncOpenAI(api_key=api_key)
+        """Initialize the SPARC Prompt Generator.
+
+        Args:
+            max_concurrency: Maximum number of chunk analysis requests in flight
+                at once. 1 keeps the original sequential behaviour.
+            chunk_overlap_tokens: Tokens shared between consecutive transcript chunks.
+            max_chunk_tokens: Optional cap on chunk size below the budget derived
+                from the model's context window.
+            cache: Optional response cache consulted before every model call.
+            client: Existing AsyncOpenAI client to send requests with, instead
+                of the shared transport's pooled client.
+            request_semaphore: Optional semaphore shared between generators that
+                caps the number of model requests in flight across all of them.
+            rate_limiter: RPM/TPM limiter; defaults to the shared limiter for
+                the model configured in MODEL_RATE_LIMITS.
+            stream: Stream artifact and chat simulation responses.
+            stream_dir: Project output directory that streamed responses are
+                written into while they are generated.
+            checkpoint: Checkpoint updated after every chunk analysis and
+                artifact; work already recorded in it is skipped.
+            chunking: "fixed" packs chunks up to the token budget; "content" cuts
+                at content-defined boundaries so unchanged parts of an edited
+                transcript produce identical chunks.
+            analysis_store: Optional store of chunk analyses keyed by chunk hash;
+                stored chunks are re-aggregated without calling the model.
+            base_url: API endpoint for a new client, e.g. a local
+                OpenAI-compatible server; defaults to OPENAI_BASE_URL or the
+                public API.
+            metrics: Recorder for per-request metrics and stage spans;
+                defaults to the process-wide recorder.
+            transport: Transport requests are sent through; defaults to the
+                process-wide transport for ``api_key`` and ``base_url``.
+            analysis_reduce: "union" merges chunk analyses locally; "tree" also
+                has the model merge and condense groups of them, level by
+                level, until the analysis fits ``analysis_token_budget``.
+            analysis_token_budget: Target size of the analysis JSON, in tokens,
+                for tree reduction.
+            reduce_fan_in: Partial analyses merged per request in tree reduction.
+            validation_mode: "combined" validates all artifacts in one request;
+                "per_artifact" checks each artifact in its own concurrent
+                request and merges the verdicts locally.
+            validation_token_budget: Prompt token budget of each per-artifact
+                check; defaults to the context window minus the response
+                reserve.
+            artifact_graph: Inputs of each artifact, overriding the
+                ``artifact_graph`` declared in ``sparc_prompts.yaml``.
+            stage_models: Model per pipeline stage (see ``PIPELINE_STAGES``),
+                on top of the ``stage_models`` in ``sparc_prompts.yaml``;
+                "auto" picks the recommended model for the stage. Stages
+                without an entry use ``model``.
+            auto_route: Route every stage without an entry to its
+                recommended model.
+            model_performance: Latency/cost table from past usage logs (see
+                ``learn_model_performance``) used for recommendations.
+            usage_log_path: JSONL file every usage record is appended to as
+                it happens; a resumed run reloads its records from it.
+            max_tokens_budget: Hard cap on the tokens of the whole run,
+                including usage recorded before a resume. A request that
+                could take the run past it raises ``TokenBudgetExceeded``
+                instead of being sent.
+            normalize: Strip timestamps, caption tags, duplicate caption
+                lines and fillers from the transcript before chunking. True
+                normalizes every transcript, None only caption files read
+                with ``read_transcript`` and False none.
+            normalization: Normalization options (see
+                ``NormalizationOptions``), on top of the ``normalization``
+                block in ``sparc_prompts.yaml``.
+        """
+        # Requests share one pooled client per API key and endpoint
+        if transport is None:
+            if client is not None:
+                transport = Transport(api_key=api_key, client=client)
+            else:
+                transport = get_transport(api_key, base_url)
+        self.transport = transport
+        self.request_semaphore = request_semaphore
         
         # Validate model and config
         try:
@@ -212,25 +240,101 @@ class SPARCPromptGenerator:
             logging.error(f"Model validation error: {str(e)}")
             raise
 
-        # Initialize prompts
+        self.rate_limiter = rate_limiter or get_model_rate_limiter(model)
+        self.metrics = metrics or get_metrics_recorder()
+
+        # Initialize prompts and the artifact dependency graph
         self.prompts = self._load_prompts()
+        self.model_performance = model_performance or {}
+        self.stage_models = self._route_stages(stage_models, auto_route, requirements, model_performance)
+        self._stage_configs = {
+            name: validate_model_config(name, requirements=requirements)
+            for name in set(self.stage_models.values())
+        }
+        self.artifact_graph = validate_artifact_graph(
+            artifact_graph or self.prompts["artifact_graph"], SPARC_ARTIFACTS
+        )
+        self.normalizer = TranscriptNormalizer(NormalizationOptions.from_dict(
+            {**(self.prompts.get("normalization") or {}), **(normalization or {})}
+        )) if normalize is not False else None
+        # Plain-text transcripts may be prose or code, so they are only normalized on request
+        self.normalize_plain_text = normalize is True
+        # Line, character and token counts of the last normalization
+        self.normalization_stats: Dict[str, int] = {}
+        # Durations and critical path of the last artifact generation
+        self.artifact_durations: Dict[str, float] = {}
+        self.artifact_critical_path: Tuple[float, List[str]] = (0.0, [])
 
         # Initialize tokenizer
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.token_counter = TokenCounter(self.tokenizer)
+
+        # Usage tracking, journaled to ``usage_log_path`` as requests finish.
+        # A resumed run continues the recorded usage; the journal also holds
+        # requests made after the last checkpoint, so it is preferred.
+        self.usage = UsageLog(usage_log_path)
+        self.checkpoint = checkpoint
+        if checkpoint is not None and checkpoint.data["updated_at"]:
+            self.usage.extend(self.usage.read_journal() or [
+                UsageRecord.from_dict(entry) for entry in checkpoint.data["usage_log"]
+            ])
+        else:
+            self.usage.reset_journal()
+        self.token_budget = TokenBudget(max_tokens_budget, self.total_tokens) if max_tokens_budget else None
 
-        # Initialize usage tracking
-        self.total_tokens = 0
-        self.usage_log = []
+        # Response cache; ids of responses served from it are billed as zero tokens
+        self.cache = cache
+        self._cached_response_ids = set()
 
-        # Token limits
+        # Streaming; the transport keeps timing stats per response id until logged
+        self.stream = stream
+        self.stream_dir = Path(stream_dir) if stream_dir else None
+        self.stream_callback: Optional[Callable[[str, int], None]] = None
+
+        # Token limits: every request reserves max_tokens for the response
         self.max_model_tokens = self.model_config["context_length"]
-        self.buffer_tokens = min(2000, self.model_config["max_tokens"])
+        self.response_reserve_tokens = self.model_config["max_tokens"]
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        if chunking not in ("fixed", "content"):
+            raise ValueError(f"Unknown chunking mode: {chunking}")
+        self.chunking = chunking
+        if analysis_reduce not in ("union", "tree"):
+            raise ValueError(f"Unknown analysis reduce mode: {analysis_reduce}")
+        if reduce_fan_in < 2:
+            raise ValueError("reduce_fan_in must be at least 2")
+        self.analysis_reduce = analysis_reduce
+        self.analysis_token_budget = analysis_token_budget
+        self.reduce_fan_in = reduce_fan_in
+        # Per-level latency and token reduction of the last tree reduction
+        self.reduce_stats: List[Dict[str, Any]] = []
+        if validation_mode not in ("combined", "per_artifact"):
+            raise ValueError(f"Unknown validation mode: {validation_mode}")
+        self.validation_mode = validation_mode
+        self.validation_token_budget = validation_token_budget
+        self.analysis_store = analysis_store
+        self.chunk_stats = {"reused": 0, "recomputed": 0, "unparsed": 0}
+        # Ranked mention counts of the analysis items, set by analyze_transcript
+        self.mention_counts: Dict[str, List[Dict[str, Any]]] = {}
+        # Time range of every chunk of a caption transcript, set by analyze_transcript
+        self.chunk_time_ranges: List[Dict[str, Any]] = []
+        # How JSON was found in model responses, by extraction strategy
+        self.extraction_stats: Dict[str, int] = {}
+        self.max_chunk_tokens = max_chunk_tokens
+        self._analysis_prefix_tokens = self.count_tokens(self.prompts["initial_analysis"] + "\n\n")
+
+        # Concurrency limit for independent requests
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
 
         # Log initialization
         logging.info(f"Initialized with model: {model}")
+        if self.stage_models:
+            logging.info(f"Stage models: {self.stage_models}")
         logging.info(f"Model config: {self.model_config}")
         logging.info(f"Max tokens: {self.max_model_tokens}")
-        logging.info(f"Buffer tokens: {self.buffer_tokens}")
+        logging.info(f"Response reserve tokens: {self.response_reserve_tokens}")
+        logging.info(f"Max concurrency: {self.max_concurrency}")
 
     def _load_prompts(self) -> Dict[str, str]:
         """Load SPARC prompts from YAML file."""
@@ -238,268 +342,830 @@ class SPARCPromptGenerator:
         with open(prompts_file) as f:
             return yaml.safe_load(f)
 
+    def _route_stages(
+        self,
+        stage_models: Optional[Dict[str, str]],
+        auto_route: bool,
+        requirements: Optional[List[str]],
+        performance: Optional[Dict[str, Dict[str, Dict[str, float]]]]
+    ) -> Dict[str, str]:
+        """Resolve the model of every stage that does not use the default model."""
+        routes = dict(self.prompts.get("stage_models") or {})
+        routes.update(stage_models or {})
+        unknown = [stage for stage in routes if stage not in PIPELINE_STAGES]
+        if unknown:
+            raise ValueError(
+                f"Unknown pipeline stages: {', '.join(unknown)}. "
+                f"Stages: {', '.join(PIPELINE_STAGES)}"
+            )
+        if auto_route:
+            for stage in PIPELINE_STAGES:
+                routes.setdefault(stage, "auto")
+
+        resolved = {}
+        for stage, name in routes.items():
+            if name == "auto":
+                name = get_recommended_model(stage, requirements, performance) or self.model
+            if name != self.model:
+                resolved[stage] = name
+        return resolved
+
+    def model_for(self, stage: Optional[str]) -> str:
+        """Model that requests of a pipeline stage are sent to."""
+        return self.stage_models.get(stage, self.model)
+
+    def _config_for(self, stage: Optional[str]) -> Dict[str, Any]:
+        """Configuration of the model a pipeline stage uses."""
+        model = self.model_for(stage)
+        return self.model_config if model == self.model else self._stage_configs[model]
+
     async def _generate_with_retry(
         self, 
         messages: List[Dict[str, Any]], 
         temp_override: float = None,
-        max_retries: int = 3
+        max_retries: Optional[int] = None,
+        stream_writer: Optional[StreamWriter] = None,
+        prompt_tokens: Optional[int] = None,
+        stage: Optional[str] = None
     ) -> Any:
-        """Generate with retry logic."""
-        for attempt in range(max_retries):
-            try:
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temp_override or self.model_config["temperature"],
-                    max_tokens=self.model_config["max_tokens"],
-                    n=1,
-                )
+        """Generate with retry logic, serving repeated requests from the cache.
+
+        With a ``stream_writer`` the response is streamed into it as it is
+        generated; the return value is still a complete ``ChatCompletion``.
+        ``prompt_tokens`` is the callers' estimate of the message contents;
+        when given, the rate-limit estimate does not re-encode the messages.
+        Requests go through the shared transport, whose retry policy retries,
+        times out and hedges attempts (``max_retries`` overrides its attempt
+        limit), and traces every call in ``self.metrics``. The request is
+        sent to the model routed for ``stage``. With a token budget, the
+        prompt and ``max_tokens`` are reserved from it first; when they do not
+        fit the rest of the budget, ``max_tokens`` is cut to what does (down
+        to ``MIN_COMPLETION_TOKENS``). The prompt of a hedge that lost is
+        logged under the "hedge" context.
+        """
+        model = self.model_for(stage)
+        model_config = self._config_for(stage)
+        temperature = temp_override or model_config["temperature"]
+        max_tokens = model_config["max_tokens"]
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(model, messages, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                response = ChatCompletion.model_validate(cached)
+                self._cached_response_ids.add(response.id)
+                logging.info(f"Cache hit for request {cache_key[:12]}")
+                with self.metrics.span("request", kind="request", model=model, cached=True):
+                    self.metrics.record_request(model, 0.0, "cached")
+                if stream_writer is not None:
+                    stream_writer.begin()
+                    stream_writer.write(response.choices[0].message.content or "")
+                    stream_writer.close()
                 return response
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                wait_time = 2 ** attempt
-                logging.warning(f"Attempt {attempt + 1} failed: {str(e)}. Waiting {wait_time}s...")
-                await asyncio.sleep(wait_time)
-
-    def _update_usage_log(self, prompt_tokens: int, response_tokens: int, context: str):
-        """Update usage tracking."""
-        self.total_tokens += prompt_tokens + response_tokens
-        self.usage_log.append({
-            "context": context,
-            "model": self.model,
-            "prompt_tokens": prompt_tokens,
-            "response_tokens": response_tokens,
-            "total_tokens": prompt_tokens + response_tokens,
-            "timestamp": datetime.now().isoformat()
-        })
-        
+
+        if prompt_tokens is None:
+            request_tokens = estimate_request_tokens(messages, max_tokens, self.count_tokens)
+        else:
+            request_tokens = (prompt_tokens + len(messages) * MESSAGE_OVERHEAD_TOKENS
+                              + REPLY_OVERHEAD_TOKENS + max_tokens)
+        if self.token_budget is not None:
+            reserved = await self.token_budget.reserve(
+                request_tokens, max(max_tokens - MIN_COMPLETION_TOKENS, 0)
+            )
+            if reserved < request_tokens:
+                max_tokens -= request_tokens - reserved
+                request_tokens = reserved
+                logging.info(f"Capping max_tokens at {max_tokens} to fit the rest of the token budget")
+                if cache_key is not None:
+                    cache_key = self.cache.make_key(model, messages, temperature, max_tokens)
+        billed = 0
+        try:
+            response = await self.transport.complete(
+                model,
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                request_tokens=request_tokens,
+                rate_limiter=self.rate_limiter if model == self.model else get_model_rate_limiter(model),
+                semaphore=self.request_semaphore,
+                stream_writer=stream_writer,
+                metrics=self.metrics,
+                max_attempts=max_retries,
+                token_budget=self.token_budget
+            )
+            hedge_tokens = self.transport.hedge_tokens.pop(getattr(response, "id", None), 0)
+            if hedge_tokens:
+                self._update_usage_log(hedge_tokens, 0, "hedge", model=model)
+            usage = getattr(response, "usage", None)
+            billed = usage.total_tokens if usage is not None and usage.total_tokens is not None else request_tokens
+        finally:
+            if self.token_budget is not None:
+                self.token_budget.settle(request_tokens, billed)
+        if cache_key is not None:
+            self.cache.put(cache_key, response.model_dump())
+        return response
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The AsyncOpenAI client requests are currently sent with."""
+        return self.transport.client
+
+    def _make_stream_writer(self, context: str, filename: Optional[str] = None) -> Optional[StreamWriter]:
+        """Build a writer for a streamed response, or None when streaming is off."""
+        if not self.stream:
+            return None
+        path = self.stream_dir / filename if self.stream_dir and filename else None
+
+        def on_progress(deltas: int):
+            if self.stream_callback is not None:
+                self.stream_callback(context, deltas)
+
+        return StreamWriter(path, on_progress)
+
+    def _is_cached(self, response: Any) -> bool:
+        """Return True if the response was served from the response cache."""
+        return getattr(response, "id", None) in self._cached_response_ids
+
+    def _pop_stream_stats(self, response: Any) -> Optional[Dict[str, Any]]:
+        """Return and forget the streaming stats recorded for a response."""
+        return self.transport.stream_stats.pop(getattr(response, "id", None), None)
+
+    def _pop_latency(self, response: Any) -> Optional[float]:
+        """Return and forget the request latency recorded for a response."""
+        return self.transport.latencies.pop(getattr(response, "id", None), None)
+
+    def _update_usage_log(
+        self,
+        prompt_tokens: int,
+        response_tokens: int,
+        context: str,
+        cached: bool = False,
+        stream_stats: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        latency_s: Optional[float] = None
+    ):
+        """Update usage tracking.
+
+        Cached responses are logged with zero billed tokens; their sizes are
+        kept under ``cached_tokens`` for reference. Streamed responses add
+        time-to-first-token and throughput figures. ``latency_s`` is the
+        request's latency, retries included; past logs with it feed model
+        recommendations.
+        """
+        self.usage.add(UsageRecord(
+            context,
+            model or self.model,
+            0 if cached else prompt_tokens,
+            0 if cached else response_tokens,
+            cached=cached,
+            cached_tokens=prompt_tokens + response_tokens if cached else None,
+            latency_s=round(latency_s, 3) if latency_s is not None else None,
+            **(stream_stats or {})
+        ))
+
+    @property
+    def total_tokens(self) -> int:
+        """Billed tokens of every request so far."""
+        return self.usage.total_tokens
+
+    @property
+    def usage_log(self) -> List[Dict[str, Any]]:
+        """Usage log entries of every request so far."""
+        return self.usage.to_list()
+
+    def _save_checkpoint(self):
+        """Persist the checkpoint together with the current usage log."""
+        if self.checkpoint is None:
+            return
+        self.usage.flush()
+        self.checkpoint.record_usage(self.usage_log, self.total_tokens)
+        self.checkpoint.save()
+
     def count_tokens(self, text: str) -> int:
-        """Count tokens in text."""
-        return len(self.tokenizer.encode(text))
-
-    def split_transcript(self, transcript: str) -> List[str]:
-        """Split transcript into chunks."""
-        available_tokens = self.max_model_tokens - self.buffer_tokens
-        tokens_per_word = 1.3  # Rough estimate
-        max_words = math.floor(available_tokens / tokens_per_word)
-
-        words = transcript.split()
-        chunks = []
-        for i in range(0, len(words), max_words):
-            chunk = ' '.join(words[i:i + max_words])
-            chunks.append(chunk)
-        logging.info(f"Split transcript into {len(chunks)} chunks")
+        """Count tokens in text, memoized for repeated components."""
+        return self.token_counter.count(text)
+
+    def _usage_tokens(self, response: Any, prompt: Any, content: str) -> Tuple[int, int]:
+        """Return (prompt_tokens, response_tokens) for a response.
+
+        The provider-reported ``usage`` is authoritative. Without it, tokens
+        are counted with tiktoken; ``prompt`` may be a precomputed count or
+        the prompt text. A reported completion count is remembered for the
+        response text, since artifacts are fed into later prompts.
+        """
+        usage = getattr(response, "usage", None)
+        if usage is not None and usage.prompt_tokens is not None and usage.completion_tokens is not None:
+            self.token_counter.remember(content, usage.completion_tokens)
+            return usage.prompt_tokens, usage.completion_tokens
+        prompt_tokens = prompt if isinstance(prompt, int) else self.count_tokens(prompt)
+        return prompt_tokens, self.count_tokens(content)
+
+    def _estimate_tokens(self, *parts: str) -> int:
+        """Estimate a prompt's size from its (memoized) parts."""
+        return sum(self.count_tokens(part) for part in parts)
+
+    def chunk_token_budget(self) -> int:
+        """Tokens available for transcript text in one analysis request.
+
+        The context window must hold the system message, the ``initial_analysis``
+        prompt, the chunk itself and the ``max_tokens`` reserved for the response,
+        all for the model the analysis stage is routed to.
+        """
+        config = self._config_for("analysis")
+        prompt_overhead = (
+            self.count_tokens(DEFAULT_SYSTEM_PROMPT)
+            + self._analysis_prefix_tokens
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+            + REPLY_OVERHEAD_TOKENS
+        )
+        budget = config["context_length"] - config["max_tokens"] - prompt_overhead
+        if self.max_chunk_tokens:
+            budget = min(budget, self.max_chunk_tokens)
+        if budget <= 0:
+            raise ValueError(
+                f"No room for transcript text: context length {config['context_length']}, "
+                f"response reserve {config['max_tokens']}, prompt overhead {prompt_overhead}"
+            )
+        return budget
+
+    def normalize_transcript(self, transcript: str) -> str:
+        """Strip caption noise from a plain-text transcript when ``normalize`` is True.
+
+        Counts before and after, tokens included, are kept in
+        ``normalization_stats``.
+        """
+        if self.normalizer is None or not self.normalize_plain_text:
+            return transcript
+        with self.metrics.span("normalize", kind="stage"):
+            normalized = self.normalizer.normalize_text(transcript)
+        self.normalization_stats = {
+            **self.normalizer.stats,
+            "input_tokens": self.count_tokens(transcript),
+            "output_tokens": self.count_tokens(normalized)
+        }
+        logging.info(
+            f"Normalized transcript: {self.normalization_stats['input_tokens']} -> "
+            f"{self.normalization_stats['output_tokens']} tokens"
+        )
+        return normalized
+
+    def read_transcript(self, path: Path) -> Union[str, TimedTranscript]:
+        """Read a transcript file.
+
+        SRT, WebVTT and YouTube JSON3 caption files are parsed in a single
+        streaming pass into a ``TimedTranscript``, normalized segment by
+        segment unless ``normalize`` is False, so the chunks cut from it know
+        their time range. Other files are read as plain text.
+        """
+        caption_format = detect_caption_format(path)
+        if caption_format is None:
+            return Path(path).read_text()
+        segments = read_captions(path, caption_format)
+        if self.normalizer is None:
+            return TimedTranscript.from_segments(segments)
+
+        input_tokens = 0
+
+        def counted(segments):
+            nonlocal input_tokens
+            for segment in segments:
+                input_tokens += self.count_tokens(segment.text)
+                yield segment
+
+        options = self.normalizer.options
+        with self.metrics.span("normalize", kind="stage"):
+            timed = TimedTranscript.from_segments(
+                self.normalizer.normalize_segments(counted(segments)),
+                options.max_line_words if options.join_lines else 1
+            )
+        text = timed.text
+        self.normalization_stats = {
+            **self.normalizer.stats,
+            # The parser dropped the timing of every cue
+            "timestamps": self.normalizer.stats["input_lines"],
+            "output_lines": text.count("\n") + 1 if text else 0,
+            "output_chars": len(text) + 1 if text else 0,
+            "input_tokens": input_tokens,
+            "output_tokens": self.count_tokens(text)
+        }
+        logging.info(
+            f"Read {len(timed)} caption segments ({format_timestamp(timed.duration_s)}) from {path}; "
+            f"normalized {input_tokens} -> {self.normalization_stats['output_tokens']} tokens"
+        )
+        return timed
+
+    def _prepare_transcript(self, transcript: Union[str, TimedTranscript]) -> Tuple[str, Optional[TimedTranscript]]:
+        """Text to split and, for caption transcripts, the timed transcript it came from.
+
+        Plain text is normalized here; a ``TimedTranscript`` was normalized
+        when it was read.
+        """
+        if isinstance(transcript, TimedTranscript):
+            return transcript.text, transcript
+        return self.normalize_transcript(transcript), None
+
+    def split_transcript(self, transcript: str) -> List[TranscriptChunk]:
+        """Split transcript into token-bounded chunks."""
+        if self.chunking == "content":
+            chunks = split_content_defined(transcript, self.tokenizer, self.chunk_token_budget())
+        else:
+            chunks = split_into_chunks(
+                transcript,
+                self.tokenizer,
+                self.chunk_token_budget(),
+                overlap_tokens=self.chunk_overlap_tokens
+            )
+        logging.info(f"Split transcript into {len(chunks)} chunks ({self.chunking} chunking)")
         return chunks
 
-    def extract_json(self, response_text: str) -> Dict[str, Any]:
-        """Extract JSON from response text."""
+    def extract_json(self, response_text: str, schema: str = "analysis") -> Dict[str, Any]:
+        """Extract the first JSON object matching ``schema`` from response text.
+
+        ``schema`` is ``"analysis"`` or ``"validation"``. The strategy that found
+        the object is counted in ``extraction_stats``.
+        """
+        obj, strategy = extract_json_object(response_text, SCHEMAS[schema])
+        self.extraction_stats[strategy or "failed"] = self.extraction_stats.get(strategy or "failed", 0) + 1
+        if obj is not None:
+            logging.debug(f"Extracted {schema} JSON ({strategy})")
+            return obj
+
+        logging.error(f"No {schema} JSON object found in model response")
+        logging.debug(f"Non-JSON response: {response_text}")
+        return {
+            "error": "Failed to parse JSON from model response.",
+            "raw_response": response_text.strip()
+        }
+
+    async def _analyze_chunk(self, idx: int, total: int, chunk: TranscriptChunk) -> Dict[str, Any]:
+        """Analyze a single transcript chunk and return its parsed analysis."""
         try:
-            response_text = response_text.strip()
-            
-            # Try to find JSON between code blocks first
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(1))
-                
-            # If no code blocks, try to find JSON directly
-            json_match = re.search(r'\{[^{]*"coverage_analysis".*\}', response_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-                
-            # If still no JSON found, try to clean up the text more aggressively
-            cleaned_text = re.sub(r'^.*?(\{.*\}).*?$', r'\1', response_text, flags=re.DOTALL)
-            return json.loads(cleaned_text)
-                
-        except json.JSONDecodeError as e:
-            logging.error(f"JSON parsing error: {e}")
-            logging.debug(f"Non-JSON response: {response_text}")
-            return {
-                "error": "Failed to parse JSON from model response.",
-                "raw_response": response_text
-            }
+            # Prepare the prompt; the chunk already knows its token count
+            prompt = self.prompts["initial_analysis"] + "\n\n" + chunk.text
+            prompt_tokens = self._analysis_prefix_tokens + chunk.token_count
+
+            logging.info(f"Processing chunk {idx + 1}/{total} ({prompt_tokens} tokens)")
+
+            # Generate response
+            response = await self._generate_with_retry([
+                {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ], prompt_tokens=self.count_tokens(DEFAULT_SYSTEM_PROMPT) + prompt_tokens, stage="analysis")
+
+            # Process response
+            content = response.choices[0].message.content.strip()
+            prompt_tokens, response_tokens = self._usage_tokens(response, prompt_tokens, content)
+            self._update_usage_log(prompt_tokens, response_tokens, f"chunk_{idx + 1}",
+                                   cached=self._is_cached(response), model=self.model_for("analysis"),
+                                   latency_s=self._pop_latency(response))
+
+            # Parse and validate JSON
+            analysis = self.extract_json(content)
+            if "error" not in analysis:
+                logging.info(f"Successfully processed chunk {idx + 1}")
+            return analysis
+
+        except TokenBudgetExceeded:
+            raise
+        except Exception as e:
+            error_msg = f"Error processing chunk {idx + 1}: {str(e)}"
+            logging.error(error_msg)
+            return {"error": error_msg}
+
+    @traced_stage("analysis")
+    async def analyze_transcript(self, transcript: Union[str, TimedTranscript]) -> Dict[str, Any]:
+        """Analyze transcript.
 
-    def _aggregate_analysis(self, aggregated: Dict[str, Any], new_analysis: Dict[str, Any]):
-        """Aggregate analysis results."""
-        if not aggregated["application_type"]:
-            aggregated["application_type"] = new_analysis.get("application_type", "")
-        if not aggregated["technical_domain"]:
-            aggregated["technical_domain"] = new_analysis.get("technical_domain", "")
-
-        # Append unique items to lists
-        for key in ["core_functionalities", "technical_requirements", "components", "dependencies", "technologies"]:
-            for item in new_analysis.get(key, []):
-                if item not in aggregated[key]:
-                    aggregated[key].append(item)
-
-        for key in ["algorithms", "patterns", "architecture_decisions", "constraints"]:
-            for item in new_analysis.get("implementation_details", {}).get(key, []):
-                if item not in aggregated["implementation_details"][key]:
-                    aggregated["implementation_details"][key].append(item)
-
-    async def analyze_transcript(self, transcript: str) -> Dict[str, Any]:
-        """Analyze transcript."""
+        Up to ``max_concurrency`` chunk requests run at the same time, but the
+        results are aggregated strictly in chunk order so the output is the same
+        as a sequential run. The first failing request (in chunk order) aborts
+        the analysis and any requests that have not finished yet are cancelled;
+        a chunk whose response holds no analysis JSON is skipped instead.
+        Items that differ only in case, spacing, punctuation or plural form are
+        merged, and how often each was mentioned is kept in ``mention_counts``.
+        In "tree" reduce mode the merged analysis is then condensed by
+        ``_tree_reduce`` to fit ``analysis_token_budget``. With normalization
+        on, the transcript is normalized before it is split. Chunks of a
+        ``TimedTranscript`` carry their time range, which is recorded with
+        every item in ``mention_counts`` and in ``chunk_time_ranges``.
+        """
+        transcript, timed = self._prepare_transcript(transcript)
         chunks = self.split_transcript(transcript)
-        logging.info(f"Analyzing {len(chunks)} chunks with model {self.model}")
-
-        aggregated_analysis = {
-            "application_type": "",
-            "technical_domain": "",
-            "core_functionalities": [],
-            "technical_requirements": [],
-            "components": [],
-            "dependencies": [],
-            "technologies": [],
-            "implementation_details": {
-                "algorithms": [],
-                "patterns": [],
-                "architecture_decisions": [],
-                "constraints": []
-            }
-        }
+        self.chunk_time_ranges = []
+        if timed is not None:
+            for idx, chunk in enumerate(chunks):
+                chunk.start_s, chunk.end_s = timed.time_range(chunk.start_char, chunk.end_char)
+                self.chunk_time_ranges.append({
+                    "chunk": idx + 1,
+                    "start": format_timestamp(chunk.start_s),
+                    "end": format_timestamp(chunk.end_s),
+                    "start_s": chunk.start_s,
+                    "end_s": chunk.end_s
+                })
+        logging.info(
+            f"Analyzing {len(chunks)} chunks with model {self.model_for('analysis')} "
+            f"(max concurrency: {self.max_concurrency})"
+        )
 
-        for idx, chunk in enumerate(chunks):
-            try:
-                # Prepare the prompt
-                prompt = self.prompts["initial_analysis"] + "\n\n" + chunk
-                prompt_tokens = self.count_tokens(prompt)
-                
-                logging.info(f"Processing chunk {idx + 1}/{len(chunks)} ({prompt_tokens} tokens)")
-                
-                # Generate response
-                response = await self._generate_with_retry([
-                    {"role": "system", "content": "You are a helpful assistant specialized in software development."},
-                    {"role": "user", "content": prompt},
-                ])
-                
-                # Process response
-                content = response.choices[0].message.content.strip()
-                response_tokens = self.count_tokens(content)
-                self._update_usage_log(prompt_tokens, response_tokens, f"chunk_{idx + 1}")
-
-                # Parse and validate JSON
-                analysis = self.extract_json(content)
+        aggregator = AnalysisAggregator()
+
+        if self.checkpoint is not None:
+            self.checkpoint.set_chunk_layout({
+                "transcript_sha256": hashlib.sha256(transcript.encode("utf-8")).hexdigest(),
+                "model": self.model_for("analysis"),
+                "chunks": len(chunks),
+                "chunk_tokens": self.chunk_token_budget(),
+                "overlap_tokens": self.chunk_overlap_tokens,
+                "chunking": self.chunking
+            })
+        self.chunk_stats = {"reused": 0, "recomputed": 0, "unparsed": 0}
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded_analyze(idx: int, chunk: TranscriptChunk) -> Dict[str, Any]:
+            saved = self.checkpoint.get_chunk(idx) if self.checkpoint is not None else None
+            if saved is not None:
+                logging.info(f"Reusing checkpointed analysis for chunk {idx + 1}")
+                self.chunk_stats["reused"] += 1
+                return saved
+
+            store_key = None
+            if self.analysis_store is not None:
+                store_key = self.analysis_store.make_key(
+                    self.model_for("analysis"), self.prompts["initial_analysis"], chunk.sha256
+                )
+                stored = self.analysis_store.get(store_key)
+                if stored is not None:
+                    logging.info(f"Reusing stored analysis for chunk {idx + 1} ({chunk.sha256[:12]})")
+                    self.chunk_stats["reused"] += 1
+                    if self.checkpoint is not None:
+                        self.checkpoint.record_chunk(idx, stored)
+                    return stored
+
+            async with semaphore:
+                analysis = await self._analyze_chunk(idx, len(chunks), chunk)
+            if "error" not in analysis:
+                self.chunk_stats["recomputed"] += 1
+                if store_key is not None:
+                    self.analysis_store.put(store_key, analysis)
+                if self.checkpoint is not None:
+                    self.checkpoint.record_chunk(idx, analysis)
+                    self._save_checkpoint()
+            return analysis
+
+        tasks = [
+            asyncio.ensure_future(bounded_analyze(idx, chunk))
+            for idx, chunk in enumerate(chunks)
+        ]
+        first_unparsed = None
+        partials = []
+        try:
+            # Aggregate in chunk order, regardless of completion order
+            for idx, task in enumerate(tasks):
+                analysis = await task
                 if "error" in analysis:
-                    return analysis
+                    # A response without analysis JSON loses only its chunk;
+                    # request failures still abort the analysis
+                    if "raw_response" not in analysis:
+                        return analysis
+                    logging.warning(f"Skipping chunk {idx + 1}: no analysis JSON in the response")
+                    self.chunk_stats["unparsed"] += 1
+                    first_unparsed = first_unparsed or analysis
+                    continue
+                source = None
+                if chunks[idx].start_s is not None:
+                    source = f"{format_timestamp(chunks[idx].start_s)}-{format_timestamp(chunks[idx].end_s)}"
+                aggregator.add(analysis, source)
+                partials.append(analysis)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-                # Aggregate results
-                self._aggregate_analysis(aggregated_analysis, analysis)
-                logging.info(f"Successfully processed chunk {idx + 1}")
+        if first_unparsed is not None and self.chunk_stats["unparsed"] == len(chunks):
+            return first_unparsed
 
-            except Exception as e:
-                error_msg = f"Error processing chunk {idx + 1}: {str(e)}"
-                logging.error(error_msg)
-                return {"error": error_msg}
+        aggregated_analysis = aggregator.to_dict()
+        self.mention_counts = aggregator.mention_counts()
+        if self.analysis_reduce == "tree":
+            aggregated_analysis = await self._tree_reduce(partials, aggregated_analysis)
 
-        logging.info("Transcript analysis completed successfully")
+        if self.checkpoint is not None:
+            self.checkpoint.record_analysis(aggregated_analysis)
+            self._save_checkpoint()
+
+        logging.info(
+            f"Transcript analysis completed successfully: {self.chunk_stats['reused']} chunks reused, "
+            f"{self.chunk_stats['recomputed']} recomputed"
+        )
         return aggregated_analysis
 
-    async def _generate_artifact(self, artifact_name: str, prompt: str) -> str:
-        """Generate artifact with configured model."""
-        prompt_tokens = self.count_tokens(prompt)
-        response_max_tokens = self.max_model_tokens - prompt_tokens
+    def _analysis_tokens(self, analysis: Dict[str, Any]) -> int:
+        """Tokens of the analysis JSON as the specification prompt embeds it."""
+        return self.count_tokens(json.dumps(analysis, indent=2))
+
+    async def _merge_analyses(self, level: int, idx: int, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Have the model merge and condense a group of partial analyses.
+
+        Falls back to the local union of the group if the request fails or
+        the response holds no analysis JSON.
+        """
+        partials_json = json.dumps(group, separators=(",", ":"))
+        prompt = self.prompts["merge_analysis"] + "\n" + partials_json
+        prompt_tokens = self._estimate_tokens(self.prompts["merge_analysis"], "\n", partials_json)
+        try:
+            response = await self._generate_with_retry([
+                {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ], prompt_tokens=self.count_tokens(DEFAULT_SYSTEM_PROMPT) + prompt_tokens, stage="reduce")
+
+            content = response.choices[0].message.content.strip()
+            prompt_tokens, response_tokens = self._usage_tokens(response, prompt_tokens, content)
+            self._update_usage_log(prompt_tokens, response_tokens, f"reduce_{level}_{idx + 1}",
+                                   cached=self._is_cached(response), model=self.model_for("reduce"),
+                                   latency_s=self._pop_latency(response))
+
+            merged = self.extract_json(content)
+            if "error" not in merged:
+                return merged
+            logging.warning(f"Merge {level}.{idx + 1} returned no analysis JSON; keeping the union of its inputs")
+        except TokenBudgetExceeded:
+            raise
+        except Exception as e:
+            logging.error(f"Error merging analyses {level}.{idx + 1}: {str(e)}")
+        return merge_analyses(group)
+
+    async def _tree_reduce(self, partials: List[Dict[str, Any]], union: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge partial analyses level by level until they fit the token budget.
+
+        Each level merges groups of ``reduce_fan_in`` consecutive partials in
+        concurrent requests (up to ``max_concurrency``), so ``n`` chunks need
+        about ``log(n, reduce_fan_in)`` sequential levels. Reduction stops once
+        the union of the remaining partials fits ``analysis_token_budget``, or
+        after the last partial has been condensed on its own.
+        """
+        self.reduce_stats = []
+        union_tokens = self._analysis_tokens(union)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        level = 0
+
+        while partials and union_tokens > self.analysis_token_budget and level < MAX_REDUCE_LEVELS:
+            level += 1
+            fan_in = self.reduce_fan_in
+            groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+
+            async def merge(idx: int, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+                # A trailing single partial moves up a level unchanged
+                if len(group) == 1 and len(groups) > 1:
+                    return group[0]
+                async with semaphore:
+                    return await self._merge_analyses(level, idx, group)
+
+            started = time.perf_counter()
+            tasks = [asyncio.ensure_future(merge(idx, group)) for idx, group in enumerate(groups)]
+            try:
+                with self.metrics.span(f"reduce_level_{level}", kind="stage", model=self.model_for("reduce")):
+                    partials = await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            union = merge_analyses(partials)
+            tokens_out = self._analysis_tokens(union)
+            stats = {
+                "level": level,
+                "inputs": sum(len(group) for group in groups),
+                "outputs": len(partials),
+                "latency_s": round(time.perf_counter() - started, 3),
+                "tokens_in": union_tokens,
+                "tokens_out": tokens_out,
+            }
+            self.reduce_stats.append(stats)
+            logging.info(
+                f"Reduce level {level}: {stats['inputs']} -> {stats['outputs']} partial analyses in "
+                f"{stats['latency_s']}s, {union_tokens} -> {tokens_out} tokens"
+            )
+            union_tokens = tokens_out
+            if len(groups) == 1:
+                break
+
+        if union_tokens > self.analysis_token_budget:
+            logging.warning(
+                f"Reduced analysis is {union_tokens} tokens, above the budget of {self.analysis_token_budget}"
+            )
+        return union
+
+    async def _generate_artifact(self, artifact_name: str, prompt: str, prompt_tokens: Optional[int] = None) -> str:
+        """Generate artifact with configured model.
+
+        ``prompt_tokens`` may be passed when the prompt's size is already known
+        from its parts, so the assembled prompt is not encoded again.
+        """
+        if prompt_tokens is None:
+            prompt_tokens = self.count_tokens(prompt)
+        model = self.model_for(artifact_name)
+        response_max_tokens = self._config_for(artifact_name)["context_length"] - prompt_tokens
 
         if response_max_tokens <= 0:
             logging.error(f"Prompt for artifact '{artifact_name}' exceeds the model's token limit.")
             return f"Error generating {artifact_name}: Prompt exceeds the model's token limit."
 
-        logging.info(f"Generating artifact '{artifact_name}' with {prompt_tokens} tokens using {self.model}")
+        logging.info(f"Generating artifact '{artifact_name}' with {prompt_tokens} tokens using {model}")
 
         try:
+            sanitized_name = re.sub(r'[\\/*?:"<>|]', "_", artifact_name)
             response = await self._generate_with_retry([
-                {"role": "system", "content": "You are a helpful assistant specialized in software development."},
+                {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
-            ])
+            ], stream_writer=self._make_stream_writer(artifact_name, f"artifacts/{sanitized_name}.md"),
+               prompt_tokens=self.count_tokens(DEFAULT_SYSTEM_PROMPT) + prompt_tokens, stage=artifact_name)
             
             content = response.choices[0].message.content.strip()
-            response_tokens = self.count_tokens(content)
-            self._update_usage_log(prompt_tokens, response_tokens, artifact_name)
+            prompt_tokens, response_tokens = self._usage_tokens(response, prompt_tokens, content)
+            self._update_usage_log(prompt_tokens, response_tokens, artifact_name,
+                                   cached=self._is_cached(response),
+                                   stream_stats=self._pop_stream_stats(response),
+                                   model=model, latency_s=self._pop_latency(response))
             
             return content
             
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             logging.error(f"Error generating {artifact_name}: {str(e)}")
             return f"Error generating {artifact_name}: {str(e)}"
 
+    def _artifact_input(self, inputs: List[str], analysis_json: str, artifacts: Dict[str, str]) -> str:
+        """Input text of an artifact prompt: its single input, or titled sections."""
+        texts = [analysis_json if source == ANALYSIS_INPUT else artifacts[source] for source in inputs]
+        if len(texts) == 1:
+            return texts[0]
+        return "\n\n".join(f"## {source.title()}\n\n{text}" for source, text in zip(inputs, texts))
+
     async def generate_sparc_artifacts(self, analysis: Dict[str, Any]) -> Dict[str, str]:
-        """Generate SPARC phase artifacts based on analysis."""
+        """Generate SPARC phase artifacts based on analysis.
+
+        Artifacts follow the ``artifact_graph`` in ``sparc_prompts.yaml``:
+        each one starts as soon as its inputs are available, so independent
+        artifacts are generated concurrently. Per-artifact durations and the
+        critical path through the graph are kept for the usage report.
+        """
         artifacts = {}
         logging.info("Starting generation of SPARC artifacts.")
+        analysis_json = json.dumps(analysis, indent=2)
+        self.artifact_durations = {}
 
-        # Define the artifact generation sequence
-        artifact_sequence = [
-            ("specification", lambda: json.dumps(analysis, indent=2)),
-            ("pseudocode", lambda: artifacts["specification"]),
-            ("architecture", lambda: artifacts["pseudocode"]),
-            ("refinement", lambda: artifacts["architecture"]),
-            ("completion", lambda: artifacts["refinement"])
-        ]
+        async def generate(artifact_name: str) -> str:
+            # Skip artifacts already checkpointed
+            if self.checkpoint is not None and artifact_name in self.checkpoint.artifacts:
+                logging.info(f"Reusing checkpointed artifact '{artifact_name}'")
+                artifacts[artifact_name] = self.checkpoint.artifacts[artifact_name]
+                return artifacts[artifact_name]
+
+            # Template and input counts are memoized; the input is usually an
+            # earlier artifact, whose size the response usage already reported
+            artifact_input = self._artifact_input(self.artifact_graph[artifact_name], analysis_json, artifacts)
+            prompt = self.prompts[artifact_name] + "\n\n" + artifact_input
+            prompt_tokens = self._estimate_tokens(self.prompts[artifact_name], "\n\n", artifact_input)
+            started = time.perf_counter()
+            with self.metrics.span(artifact_name, kind="stage", model=self.model_for(artifact_name)):
+                artifacts[artifact_name] = await self._generate_artifact(artifact_name, prompt, prompt_tokens)
+            self.artifact_durations[artifact_name] = time.perf_counter() - started
+
+            if self.checkpoint is not None and not artifacts[artifact_name].startswith(
+                f"Error generating {artifact_name}:"
+            ):
+                self.checkpoint.record_artifact(artifact_name, artifacts[artifact_name])
+                self._save_checkpoint()
+            return artifacts[artifact_name]
 
-        # Generate artifacts in sequence
-        for artifact_name, get_input in artifact_sequence:
-            prompt = self.prompts[artifact_name] + "\n\n" + get_input()
-            artifacts[artifact_name] = await self._generate_artifact(artifact_name, prompt)
+        await run_artifact_graph(self.artifact_graph, generate)
+        self.artifact_critical_path = critical_path(self.artifact_graph, self.artifact_durations)
 
         logging.info(f"Total tokens after artifacts generation: {self.total_tokens}")
-        return artifacts
+        # Keep the SPARC order regardless of completion order
+        return {name: artifacts[name] for name in SPARC_ARTIFACTS}
 
+    def _truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to at most ``max_tokens`` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        return self.tokenizer.decode(self.tokenizer.encode(text)[:max_tokens])
+
+    async def _validate_artifact(self, artifact_name: str, artifact: str, analysis_json: str) -> Dict[str, Any]:
+        """Check one artifact against the analysis within the validation token budget.
+
+        The analysis may take at most half of the budget left after the
+        template; the artifact is cut to whatever remains.
+        """
+        config = self._config_for("validation")
+        budget = self.validation_token_budget or (config["context_length"] - config["max_tokens"])
+        system_prompt = ARTIFACT_VALIDATION_SYSTEM_PROMPT
+        # The template names the artifact twice
+        overhead = self._estimate_tokens(system_prompt, ARTIFACT_VALIDATION_PROMPT) + 2 * self.count_tokens(artifact_name)
+        available = budget - overhead
+        analysis_json = self._truncate_to_tokens(analysis_json, available // 2)
+        analysis_tokens = self.count_tokens(analysis_json)
+        artifact_text = self._truncate_to_tokens(artifact, available - analysis_tokens)
+        if artifact_text != artifact:
+            logging.warning(f"Validating a truncated {artifact_name} artifact to fit {budget} tokens")
+
+        prompt = ARTIFACT_VALIDATION_PROMPT.format(
+            artifact_name=artifact_name, analysis=analysis_json, artifact=artifact_text
+        )
+        prompt_tokens = overhead + analysis_tokens + self.count_tokens(artifact_text)
+        try:
+            response = await self._generate_with_retry([
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ], temp_override=0.1, prompt_tokens=prompt_tokens, stage="validation")
+
+            content = response.choices[0].message.content.strip()
+            prompt_tokens, response_tokens = self._usage_tokens(response, prompt_tokens, content)
+            self._update_usage_log(prompt_tokens, response_tokens, f"validation_{artifact_name}",
+                                   cached=self._is_cached(response), model=self.model_for("validation"),
+                                   latency_s=self._pop_latency(response))
+            return self.extract_json(content, schema="validation")
+        except TokenBudgetExceeded:
+            raise
+        except Exception as e:
+            logging.error(f"Error validating {artifact_name}: {str(e)}")
+            return {"error": str(e)}
+
+    async def _validate_per_artifact(self, artifacts: Dict[str, str], original_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate every artifact in its own concurrent request and merge the verdicts."""
+        analysis_json = json.dumps(original_analysis, separators=(",", ":"))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded_validate(name: str, artifact: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._validate_artifact(name, artifact, analysis_json)
+
+        tasks = [asyncio.ensure_future(bounded_validate(name, artifact)) for name, artifact in artifacts.items()]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        verdicts = dict(zip(artifacts, results))
+        failed = [name for name, verdict in verdicts.items() if "error" in verdict]
+        if failed and len(failed) == len(verdicts):
+            return {"error": f"Error during validation: every artifact check failed ({verdicts[failed[0]]['error']})"}
+        if failed:
+            logging.warning(f"Validation failed for artifacts: {', '.join(failed)}")
+
+        validation = merge_validations(verdicts)
+        if self.checkpoint is not None:
+            self.checkpoint.record_validation(validation)
+            self._save_checkpoint()
+        return validation
+
+    @traced_stage("validation")
     async def validate_artifacts(self, artifacts: Dict[str, str], original_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate generated artifacts against original analysis."""
-        validation_prompt = f"""
-        Validate these artifacts against the original requirements and produce a JSON response.
-        
-        Original Analysis:
-        {json.dumps(original_analysis, indent=2)}
-        
-        Generated Artifacts:
-        {json.dumps(artifacts, indent=2)}
-        
-        Respond ONLY with a valid JSON object in this exact format, without any additional text or explanation:
-        {{
-            "coverage_analysis": {{
-                "features_covered": [],
-                "missing_features": [],
-                "requirements_covered": [],
-                "missing_requirements": []
-            }},
-            "technical_validation": {{
-                "architecture_completeness": true/false,
-                "implementation_feasibility": true/false,
-                "concerns": [],
-                "recommendations": []
-            }},
-            "overall_assessment": {{
-                "ready_for_implementation": true/false,
-                "critical_gaps": [],
-                "suggested_improvements": []
-            }}
-        }}
+        """Validate generated artifacts against original analysis.
+
+        In "per_artifact" validation mode each artifact is checked in its own
+        request, with compact JSON and a per-request token budget.
         """
+        if self.validation_mode == "per_artifact":
+            return await self._validate_per_artifact(artifacts, original_analysis)
+
+        analysis_json = json.dumps(original_analysis, indent=2)
+        validation_prompt = VALIDATION_PROMPT.format(
+            analysis=analysis_json,
+            artifacts=json.dumps(artifacts, indent=2)
+        )
+        # Estimate from memoized parts: the analysis JSON and the artifacts were
+        # already counted while generating the artifacts
+        prompt_tokens = self._estimate_tokens(VALIDATION_PROMPT, analysis_json, *artifacts.values())
         
         try:
             # Use stricter temperature for validation
             response = await self._generate_with_retry([
-                {
-                    "role": "system", 
-                    "content": (
-                        "You are a validation assistant that responds only with properly formatted JSON. "
-                        "Never include explanatory text or markdown formatting in your response."
-                    )
-                },
+                {"role": "system", "content": VALIDATION_SYSTEM_PROMPT},
                 {"role": "user", "content": validation_prompt},
-            ], temp_override=0.1)  # Lower temperature for more consistent output
+            ], temp_override=0.1,  # Lower temperature for more consistent output
+               prompt_tokens=prompt_tokens, stage="validation")
             
             content = response.choices[0].message.content.strip()
+            prompt_tokens, response_tokens = self._usage_tokens(response, validation_prompt, content)
             self._update_usage_log(
-                self.count_tokens(validation_prompt),
-                self.count_tokens(content),
-                "validation"
+                prompt_tokens,
+                response_tokens,
+                "validation",
+                cached=self._is_cached(response),
+                model=self.model_for("validation"),
+                latency_s=self._pop_latency(response)
             )
             
             # Try to parse JSON response
-            validation = self.extract_json(content)
+            validation = self.extract_json(content, schema="validation")
             if "error" not in validation:
                 logging.info("Validation parsed successfully")
+                if self.checkpoint is not None:
+                    self.checkpoint.record_validation(validation)
+                    self._save_checkpoint()
                 return validation
             
             # If parsing failed, try to reconstruct a basic validation response
@@ -524,6 +1190,8 @@ class SPARCPromptGenerator:
                 }
             }
             
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             logging.error(f"Error during validation: {str(e)}")
             return {
@@ -547,30 +1215,152 @@ class SPARCPromptGenerator:
                 }
             }
 
+    @traced_stage("chat_simulation")
     async def chat_simulation(self, artifacts: Dict[str, Any]) -> str:
         """Simulate a chat-based interaction between user and AI-powered software engineer."""
         artifacts_json = json.dumps(artifacts, indent=4)
         prompt = self.prompts["chat_simulation"].replace("{...}", artifacts_json)
+        system_prompt = CHAT_SYSTEM_PROMPT
+        prompt_tokens = self._estimate_tokens(system_prompt, self.prompts["chat_simulation"], *artifacts.values())
         
         try:
             response = await self._generate_with_retry([
-                {"role": "system", "content": "You are an AI-powered software engineer assisting the user in developing an application."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
-            ], temp_override=0.5)
+            ], temp_override=0.5,
+               stream_writer=self._make_stream_writer("chat_simulation", "chat_simulation.txt"),
+               prompt_tokens=prompt_tokens, stage="chat_simulation")
             
             content = response.choices[0].message.content.strip()
+            prompt_tokens, response_tokens = self._usage_tokens(response, prompt, content)
             self._update_usage_log(
-                self.count_tokens(prompt),
-                self.count_tokens(content),
-                "chat_simulation"
+                prompt_tokens,
+                response_tokens,
+                "chat_simulation",
+                cached=self._is_cached(response),
+                stream_stats=self._pop_stream_stats(response),
+                model=self.model_for("chat_simulation"),
+                latency_s=self._pop_latency(response)
             )
             
             return content
             
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             logging.error(f"Error during chat simulation: {str(e)}")
             return f"Error during chat simulation: {str(e)}"
 
+    def _estimate_request(self, estimate: RunEstimate, stage: str, *prompt_tokens: int) -> Tuple[int, float]:
+        """Count one two-message request of ``stage`` in a run estimate."""
+        config = self._config_for(stage)
+        tokens = sum(prompt_tokens) + 2 * MESSAGE_OVERHEAD_TOKENS + REPLY_OVERHEAD_TOKENS
+        return estimate.request(stage, self.model_for(stage), tokens, config["max_tokens"])
+
+    def estimate_run(self, transcript: Optional[Union[str, TimedTranscript]],
+                     chat_simulation: bool = False) -> Dict[str, Any]:
+        """Estimate the requests, tokens, cost and wall time of a run without calling the model.
+
+        The transcript is split as in ``analyze_transcript`` and every prompt
+        is sized from its template and inputs. Model outputs are assumed to
+        be as long as the mean response recorded for the stage in
+        ``model_performance`` (``DEFAULT_REQUEST_TOKENS`` without history);
+        latencies come from the same table or ``MODEL_LATENCY``. Work already
+        in the checkpoint is skipped; cached responses are not accounted for.
+        With normalization on, its counts are included under ``normalization``.
+        """
+        estimate = RunEstimate(self.model_performance)
+        normalization: Dict[str, int] = {}
+        checkpoint = self.checkpoint
+        system_tokens = self.count_tokens(DEFAULT_SYSTEM_PROMPT)
+
+        # Transcript analysis; the union of the chunk analyses is at most
+        # their total size
+        if checkpoint is not None and checkpoint.analysis is not None:
+            analysis_tokens = self._analysis_tokens(checkpoint.analysis)
+        else:
+            chunks = self.split_transcript(self._prepare_transcript(transcript)[0])
+            normalization = dict(self.normalization_stats)
+            estimate.chunks = len(chunks)
+            partials, latencies = [], []
+            for idx, chunk in enumerate(chunks):
+                saved = checkpoint.get_chunk(idx) if checkpoint is not None else None
+                if saved is not None:
+                    partials.append(self._analysis_tokens(saved))
+                    continue
+                tokens, latency = self._estimate_request(
+                    estimate, "analysis", system_tokens, self._analysis_prefix_tokens, chunk.token_count
+                )
+                partials.append(tokens)
+                latencies.append(latency)
+            estimate.add_latency(concurrent_wall_time(latencies, self.max_concurrency))
+            analysis_tokens = sum(partials)
+
+            # Tree reduction, level by level as in _tree_reduce
+            merge_tokens = self.count_tokens(self.prompts["merge_analysis"])
+            level = 0
+            while (self.analysis_reduce == "tree" and partials and analysis_tokens > self.analysis_token_budget
+                   and level < MAX_REDUCE_LEVELS):
+                level += 1
+                groups = [partials[i:i + self.reduce_fan_in] for i in range(0, len(partials), self.reduce_fan_in)]
+                partials, latencies = [], []
+                for group in groups:
+                    if len(group) == 1 and len(groups) > 1:
+                        partials.append(group[0])
+                        continue
+                    tokens, latency = self._estimate_request(estimate, "reduce", system_tokens, merge_tokens, *group)
+                    partials.append(tokens)
+                    latencies.append(latency)
+                estimate.add_latency(concurrent_wall_time(latencies, self.max_concurrency))
+                analysis_tokens = sum(partials)
+                if len(groups) == 1:
+                    break
+
+        # Artifacts, along the artifact graph
+        artifact_tokens: Dict[str, int] = {}
+        durations: Dict[str, float] = {}
+        for name, inputs in self.artifact_graph.items():
+            if checkpoint is not None and name in checkpoint.artifacts:
+                artifact_tokens[name] = self.count_tokens(checkpoint.artifacts[name])
+                continue
+            input_tokens = sum(
+                analysis_tokens if source == ANALYSIS_INPUT else artifact_tokens[source] for source in inputs
+            )
+            artifact_tokens[name], durations[name] = self._estimate_request(
+                estimate, name, system_tokens, self.count_tokens(self.prompts[name]), input_tokens
+            )
+        estimate.add_latency(critical_path(self.artifact_graph, durations)[0])
+
+        # Validation
+        if checkpoint is None or checkpoint.validation is None:
+            if self.validation_mode == "per_artifact":
+                config = self._config_for("validation")
+                budget = self.validation_token_budget or (config["context_length"] - config["max_tokens"])
+                overhead = self._estimate_tokens(ARTIFACT_VALIDATION_SYSTEM_PROMPT, ARTIFACT_VALIDATION_PROMPT)
+                latencies = [
+                    self._estimate_request(
+                        estimate, "validation", min(budget, overhead + analysis_tokens + tokens)
+                    )[1]
+                    for tokens in artifact_tokens.values()
+                ]
+                estimate.add_latency(concurrent_wall_time(latencies, self.max_concurrency))
+            else:
+                estimate.add_latency(self._estimate_request(
+                    estimate, "validation", self._estimate_tokens(VALIDATION_SYSTEM_PROMPT, VALIDATION_PROMPT),
+                    analysis_tokens, *artifact_tokens.values()
+                )[1])
+
+        if chat_simulation:
+            estimate.add_latency(self._estimate_request(
+                estimate, "chat_simulation", self._estimate_tokens(CHAT_SYSTEM_PROMPT, self.prompts["chat_simulation"]),
+                *artifact_tokens.values()
+            )[1])
+
+        result = estimate.to_dict()
+        if normalization:
+            result["normalization"] = normalization
+        return result
+
     def save_development_plan(self, plan: Dict[str, Any], output_dir: Path):
         """Save development plan to files."""
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -580,8 +1370,15 @@ class SPARCPromptGenerator:
         plan["model_info"] = {
             "model": self.model,
             "config": self.model_config,
+            "stage_models": {stage: self.model_for(stage) for stage in PIPELINE_STAGES},
             "total_tokens": self.total_tokens
         }
+        if self.mention_counts:
+            plan["mention_counts"] = self.mention_counts
+        if self.chunk_time_ranges:
+            plan["chunk_time_ranges"] = self.chunk_time_ranges
+        if self.reduce_stats:
+            plan["analysis_reduce"] = self.reduce_stats
         
         with open(output_dir / "development_plan.json", "w") as f:
             json.dump(plan, f, indent=2)
@@ -597,6 +1394,7 @@ class SPARCPromptGenerator:
                     f.write(content)
 
         # Save usage log
+        self.usage.flush()
         with open(output_dir / "usage_log.json", "w") as f:
             json.dump(self.usage_log, f, indent=2)
 
@@ -605,41 +1403,112 @@ class SPARCPromptGenerator:
         report = [f"Model: {self.model}"]
         report.append(f"Total Tokens Used: {self.total_tokens}\n")
         report.append("Detailed Usage Log:")
-        
-        # Group usage by type
-        usage_by_type = {}
-        for entry in self.usage_log:
-            context = entry["context"]
-            if context.startswith("chunk_"):
-                type_key = "Transcript Analysis"
-            elif context in ["specification", "pseudocode", "architecture", "refinement", "completion"]:
-                type_key = "Artifact Generation"
-            else:
-                type_key = context.capitalize()
-
-            if type_key not in usage_by_type:
-                usage_by_type[type_key] = {
-                    "prompt_tokens": 0,
-                    "response_tokens": 0,
-                    "total_tokens": 0,
-                    "count": 0
-                }
-            
-            stats = usage_by_type[type_key]
-            stats["prompt_tokens"] += entry["prompt_tokens"]
-            stats["response_tokens"] += entry["response_tokens"]
-            stats["total_tokens"] += entry["total_tokens"]
-            stats["count"] += 1
-
-        # Format usage statistics
-        for type_key, stats in usage_by_type.items():
+
+        # Aggregates are kept up to date as requests are recorded
+        for type_key, stats in self.usage.by_category.items():
             report.append(f"\n{type_key}:")
-            report.append(f"  Requests: {stats['count']}")
-            report.append(f"  Prompt Tokens: {stats['prompt_tokens']}")
-            report.append(f"  Response Tokens: {stats['response_tokens']}")
-            report.append(f"  Total Tokens: {stats['total_tokens']}")
-            avg_tokens = stats['total_tokens'] / stats['count']
-            report.append(f"  Average Tokens per Request: {avg_tokens:.2f}")
+            report.append(f"  Requests: {stats.count}")
+            if stats.cached:
+                report.append(f"  Served from Cache: {stats.cached}")
+            report.append(f"  Prompt Tokens: {stats.prompt_tokens}")
+            report.append(f"  Response Tokens: {stats.response_tokens}")
+            report.append(f"  Total Tokens: {stats.total_tokens}")
+            report.append(f"  Average Tokens per Request: {stats.total_tokens / stats.count:.2f}")
+            if stats.latency_count:
+                report.append(f"  Latency: {stats.mean_latency_s:.2f}s average "
+                              f"({stats.latency_min:.2f}s - {stats.latency_max:.2f}s)")
+
+        # Add per-stage model routing and estimated cost per model
+        if self.stage_models:
+            report.append("\nStage Models:")
+            for stage in PIPELINE_STAGES:
+                report.append(f"  {stage}: {self.model_for(stage)}")
+        if self.usage.by_model:
+            report.append("\nEstimated Cost (list prices):")
+            for model, stats in self.usage.by_model.items():
+                pricing = get_model_pricing(model)
+                cost = (stats.prompt_tokens * pricing["input"] + stats.response_tokens * pricing["output"]) / 1e6
+                report.append(f"  {model}: ${cost:.4f}")
+
+        # Add response cache statistics
+        if self.cache is not None:
+            cache_stats = self.cache.stats()
+            report.append("\nResponse Cache:")
+            report.append(f"  Hits: {cache_stats['hits']}")
+            report.append(f"  Misses: {cache_stats['misses']}")
+            report.append(f"  Hit Rate: {cache_stats['hit_rate']:.1%}")
+            report.append(f"  Entries: {cache_stats['entries']}")
+
+        # Add chunk reuse statistics
+        if self.analysis_store is not None or self.chunk_stats["reused"]:
+            report.append("\nChunk Analysis Reuse:")
+            report.append(f"  Reused: {self.chunk_stats['reused']}")
+            report.append(f"  Recomputed: {self.chunk_stats['recomputed']}")
+
+        # Add transcript normalization savings
+        if self.normalization_stats:
+            stats = self.normalization_stats
+            reduction = 1 - stats["output_tokens"] / stats["input_tokens"] if stats["input_tokens"] else 0.0
+            report.append("\nTranscript Normalization:")
+            report.append(
+                f"  Tokens: {stats['input_tokens']:,} -> {stats['output_tokens']:,} ({reduction:.0%} fewer)"
+            )
+            report.append(f"  Lines: {stats['input_lines']:,} -> {stats['output_lines']:,}")
+            report.append(
+                f"  Removed: {stats['timestamps']} timestamps, {stats['tags']} tags, "
+                f"{stats['duplicates']} duplicate lines, {stats['fillers']} fillers"
+            )
+
+        # Add artifact graph timing
+        if self.artifact_durations:
+            latency, path = self.artifact_critical_path
+            report.append("\nArtifact Graph:")
+            report.append(f"  Critical Path: {' -> '.join(path)} ({latency:.2f}s)")
+            report.append(f"  Sum of Stages: {sum(self.artifact_durations.values()):.2f}s")
+
+        # Add tree reduction levels
+        if self.reduce_stats:
+            report.append("\nHierarchical Reduce:")
+            for stats in self.reduce_stats:
+                reduction = 1 - stats["tokens_out"] / stats["tokens_in"] if stats["tokens_in"] else 0.0
+                report.append(
+                    f"  Level {stats['level']}: {stats['inputs']} -> {stats['outputs']} in {stats['latency_s']:.2f}s, "
+                    f"{stats['tokens_in']:,} -> {stats['tokens_out']:,} tokens ({reduction:.0%} smaller)"
+                )
+
+        # Add JSON extraction statistics
+        if self.extraction_stats:
+            report.append("\nJSON Extraction:")
+            for strategy, count in sorted(self.extraction_stats.items()):
+                report.append(f"  {strategy}: {count}")
+
+        # Add token counting statistics
+        counter_stats = self.token_counter.stats()
+        report.append("\nToken Counting:")
+        report.append(f"  Memo Hits: {counter_stats['hits']}")
+        report.append(f"  Tokenizer Calls: {counter_stats['misses']}")
+
+        # Add rate limiter diagnostics
+        limiter_stats = self.rate_limiter.stats()
+        report.append("\nRate Limiter:")
+        report.append(f"  Limits: {limiter_stats['requests_per_minute']} RPM / {limiter_stats['tokens_per_minute']} TPM")
+        report.append(f"  Queue Depth: {limiter_stats['queue_depth']}")
+        report.append(f"  Total Wait: {limiter_stats['total_wait_s']:.2f}s (max {limiter_stats['max_wait_s']:.2f}s)")
+
+        # Add transport diagnostics
+        transport_stats = self.transport.stats()
+        models_used = {self.model, *self.stage_models.values()}
+        model_usage = [transport_stats["usage"].get(model, {}) for model in models_used]
+        report.append("\nTransport:")
+        report.append(f"  Connection Pool: {transport_stats['pool_size']} (timeout {transport_stats['timeout_s']:.0f}s)")
+        report.append(f"  Requests on Shared Client: {sum(u.get('requests', 0) for u in model_usage)} "
+                      f"({sum(u.get('failed', 0) for u in model_usage)} failed)")
+        report.append(f"  Retries: {transport_stats['retries']}")
+        if transport_stats["hedges"]:
+            report.append(f"  Hedged Requests: {transport_stats['hedges']} "
+                          f"({transport_stats['hedge_wins']} won by the hedge)")
+        for model, opened in transport_stats["circuits_opened"].items():
+            report.append(f"  Circuit Opened: {model} ({opened}x)")
 
         # Add model configuration details
         report.append("\nModel Configuration:")
@@ -0,0 +1,109 @@
+"""Pre-flight estimates of the requests, tokens, cost and wall time of a run."""
+import heapq
+from typing import Dict, Any, List, Optional, Tuple
+
+from .models import (
+    DEFAULT_REQUEST_TOKENS,
+    get_model_latency,
+    get_model_pricing,
+    get_model_rate_limits
+)
+
+
+def expected_response_tokens(model: str, stage: str,
+                              performance: Dict[str, Dict[str, Dict[str, float]]]) -> float:
+    """Mean response size recorded for the model and stage, else the default request size."""
+    stats = performance.get(model, {}).get(stage)
+    return stats["response_tokens"] if stats else DEFAULT_REQUEST_TOKENS["response_tokens"]
+
+
+def expected_latency(model: str, stage: str, response_tokens: float,
+                     performance: Dict[str, Dict[str, Dict[str, float]]]) -> float:
+    """Mean latency recorded for the model and stage, else one from the model's latency profile."""
+    stats = performance.get(model, {}).get(stage)
+    if stats:
+        return stats["latency_s"]
+    profile = get_model_latency(model)
+    return profile["first_token_s"] + response_tokens / profile["tokens_per_second"]
+
+
+def concurrent_wall_time(latencies: List[float], concurrency: int) -> float:
+    """Time to run requests in order with at most ``concurrency`` in flight."""
+    workers = [0.0] * min(concurrency, len(latencies))
+    for latency in latencies:
+        heapq.heappush(workers, heapq.heappop(workers) + latency)
+    return max(workers, default=0.0)
+
+
+class RunEstimate:
+    """Expected requests, tokens and cost per pipeline stage, and the run's wall time.
+
+    Every request reserves its prompt plus ``max_tokens`` against the model's
+    TPM limit, as the rate limiter does; when the reservations of a model
+    exceed what its limits refill during the run, the wall time is stretched
+    to the time the limiter would hold requests back.
+    """
+
+    def __init__(self, performance: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None):
+        self.performance = performance or {}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.latency_s = 0.0
+        self.chunks = 0
+
+    def request(self, stage: str, model: str, prompt_tokens: int, max_tokens: int) -> Tuple[int, float]:
+        """Count one request; returns its expected response tokens and latency."""
+        response_tokens = int(min(expected_response_tokens(model, stage, self.performance), max_tokens))
+        pricing = get_model_pricing(model)
+        stats = self.stages.setdefault(stage, {
+            "model": model,
+            "requests": 0,
+            "prompt_tokens": 0,
+            "response_tokens": 0,
+            "reserved_tokens": 0,
+            "cost_usd": 0.0
+        })
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["response_tokens"] += response_tokens
+        stats["reserved_tokens"] += prompt_tokens + max_tokens
+        stats["cost_usd"] += (prompt_tokens * pricing["input"] + response_tokens * pricing["output"]) / 1e6
+        return response_tokens, expected_latency(model, stage, response_tokens, self.performance)
+
+    def add_latency(self, seconds: float):
+        """Add the latency of a phase that runs after the previous ones."""
+        self.latency_s += seconds
+
+    def rate_limit_time(self) -> float:
+        """Shortest time in which the rate limiters admit every request."""
+        usage: Dict[str, List[int]] = {}
+        for stats in self.stages.values():
+            totals = usage.setdefault(stats["model"], [0, 0])
+            totals[0] += stats["requests"]
+            totals[1] += stats["reserved_tokens"]
+        seconds = 0.0
+        for model, (requests, reserved_tokens) in usage.items():
+            limits = get_model_rate_limits(model)
+            # The buckets start full and refill their limit every minute
+            for used, limit in ((requests, limits["requests_per_minute"]),
+                                (reserved_tokens, limits["tokens_per_minute"])):
+                seconds = max(seconds, 60.0 * (used - limit) / limit)
+        return seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = {
+            stage: {**stats, "cost_usd": round(stats["cost_usd"], 6)}
+            for stage, stats in self.stages.items()
+        }
+        prompt_tokens = sum(stats["prompt_tokens"] for stats in stages.values())
+        response_tokens = sum(stats["response_tokens"] for stats in stages.values())
+        return {
+            "chunks": self.chunks,
+            "stages": stages,
+            "requests": sum(stats["requests"] for stats in stages.values()),
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "total_tokens": prompt_tokens + response_tokens,
+            "reserved_tokens": sum(stats["reserved_tokens"] for stats in stages.values()),
+            "cost_usd": round(sum(stats["cost_usd"] for stats in self.stages.values()), 6),
+            "wall_time_s": round(max(self.latency_s, self.rate_limit_time()), 1)
+        }
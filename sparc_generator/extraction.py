@@ -0,0 +1,127 @@
+"""Schema-aware JSON extraction from model responses."""
+import json
+import re
+from typing import Dict, Any, Optional, Tuple
+
+# Expected top-level fields and their types; ``required`` fields must be present
+ANALYSIS_SCHEMA = {
+    "fields": {
+        "application_type": str,
+        "technical_domain": str,
+        "core_functionalities": list,
+        "technical_requirements": list,
+        "components": list,
+        "dependencies": list,
+        "technologies": list,
+        "implementation_details": dict,
+    },
+    "required": [],
+}
+
+VALIDATION_SCHEMA = {
+    "fields": {
+        "coverage_analysis": dict,
+        "technical_validation": dict,
+        "overall_assessment": dict,
+    },
+    "required": ["coverage_analysis", "overall_assessment"],
+}
+
+SCHEMAS = {"analysis": ANALYSIS_SCHEMA, "validation": VALIDATION_SCHEMA}
+
+# Failed decodes may scan at most this many times the response length in
+# total, and at most this many decodes may fail, so text full of unbalanced
+# braces still costs bounded time
+MAX_FAILED_SCAN_RATIO = 4
+MAX_FAILED_DECODES = 256
+
+# Where a JSON object can start: a brace followed by a key or a closing brace.
+# Stray braces in prose or code are skipped without a decode attempt.
+_OBJECT_START = re.compile(r'\{\s*["}]')
+
+_DECODER = json.JSONDecoder()
+_FENCE = "```"
+
+
+def matches_schema(obj: Any, schema: Dict[str, Any]) -> bool:
+    """True if ``obj`` is an object with the schema's required fields and types.
+
+    At least one schema field must be present, and fields that are present
+    must have the expected type.
+    """
+    if not isinstance(obj, dict):
+        return False
+    fields = schema["fields"]
+    if not any(key in obj for key in fields):
+        return False
+    if any(key not in obj for key in schema["required"]):
+        return False
+    return all(isinstance(obj[key], kind) for key, kind in fields.items() if key in obj)
+
+
+def _in_code_block(text: str, pos: int, fences: list) -> bool:
+    """True if ``pos`` follows an odd number of fences (is inside a block)."""
+    count = 0
+    for fence in fences:
+        if fence >= pos:
+            break
+        count += 1
+    return count % 2 == 1
+
+
+def extract_json_object(text: str, schema: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Find the first JSON object in ``text`` that matches ``schema``.
+
+    Candidate object starts are visited left to right and decoded with
+    ``JSONDecoder.raw_decode``; after a successful decode the scan resumes past
+    the decoded value, so each character is consumed by at most one successful
+    decode. Failed decodes stop after ``MAX_FAILED_DECODES`` attempts or once
+    they have scanned ``MAX_FAILED_SCAN_RATIO`` times the response length.
+    Objects nested one level inside a decoded object are also checked, for
+    responses that wrap the payload (``{"analysis": {...}}``).
+
+    Returns:
+        The object and the strategy that found it: ``"direct"`` (the whole
+        response is the object), ``"code_block"`` (inside a fenced block),
+        ``"embedded"`` (surrounded by prose) or ``"wrapped"``; ``(None, None)``
+        if no object matches.
+    """
+    text = text.strip()
+    fences = []
+    pos = text.find(_FENCE)
+    while pos != -1:
+        fences.append(pos)
+        pos = text.find(_FENCE, pos + len(_FENCE))
+
+    scan_budget = MAX_FAILED_SCAN_RATIO * len(text)
+    failures = 0
+    match = _OBJECT_START.search(text)
+    while match and scan_budget > 0 and failures < MAX_FAILED_DECODES:
+        pos = match.start()
+        try:
+            obj, end = _DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            failures += 1
+            scan_budget -= max(e.pos - pos, 1)
+            match = _OBJECT_START.search(text, pos + 1)
+            continue
+        except RecursionError:
+            # Nesting deeper than the decoder's recursion limit; charge the rest
+            failures += 1
+            scan_budget -= len(text) - pos
+            match = _OBJECT_START.search(text, pos + 1)
+            continue
+
+        if matches_schema(obj, schema):
+            if pos == 0 and end == len(text):
+                return obj, "direct"
+            if _in_code_block(text, pos, fences):
+                return obj, "code_block"
+            return obj, "embedded"
+        if isinstance(obj, dict):
+            for value in obj.values():
+                if matches_schema(value, schema):
+                    return value, "wrapped"
+        match = _OBJECT_START.search(text, end)
+
+    return None, None
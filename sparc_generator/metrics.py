@@ -0,0 +1,320 @@
+"""Request metrics and tracing spans, exported as Prometheus text or OTLP JSON."""
+import contextvars
+import functools
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Any, List, Optional, Tuple
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0]
+THROUGHPUT_BUCKETS = [5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0]
+
+SERVICE_NAME = "sparc-generator"
+
+# Finished spans kept for OTLP export; older ones are dropped first
+MAX_SPANS = 10000
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("sparc_current_span", default=None)
+
+
+class Span:
+    """One timed operation: a pipeline run, a stage or a model request."""
+
+    __slots__ = ("trace_id", "span_id", "parent", "name", "kind", "attributes",
+                 "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent else None
+
+    @property
+    def duration_s(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+def status_of(error: Optional[BaseException]) -> str:
+    """HTTP status of a failed request ("200" on success, "error" if unknown)."""
+    if error is None:
+        return "200"
+    status = getattr(error, "status_code", None)
+    return str(status) if status is not None else "error"
+
+
+class MetricsRecorder:
+    """Collects per-request metrics and nested spans for one process.
+
+    Spans nest through a context variable, so concurrent asyncio tasks each
+    see the span that was current when they were created. Request metrics are
+    labelled with the enclosing stage span and the model. Only the last
+    ``max_spans`` finished spans are kept, so a long-lived process does not
+    grow without bound; stage durations are totalled as spans finish.
+    """
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.started_ns = time.time_ns()
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.stage_durations: Dict[str, List[float]] = {}
+        self.latency: Dict[Tuple[str, str], _Histogram] = {}
+        self.throughput: Dict[Tuple[str, str], _Histogram] = {}
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.retries: Dict[Tuple[str, str], int] = {}
+        self.tokens: Dict[Tuple[str, str, str], int] = {}
+
+    @contextmanager
+    def span(self, name: str, kind: str = "stage", **attributes):
+        """Time a block as a span nested under the current span."""
+        span = Span(name, kind, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self.spans.append(span)
+            if kind == "stage":
+                totals = self.stage_durations.setdefault(name, [0.0, 0])
+                totals[0] += span.duration_s
+                totals[1] += 1
+
+    def current_stage(self) -> str:
+        """Name of the innermost enclosing stage span."""
+        span = _current_span.get()
+        while span is not None:
+            if span.kind == "stage":
+                return span.name
+            span = span.parent
+        return "unknown"
+
+    def record_request(
+        self,
+        model: str,
+        latency_s: float,
+        status: str,
+        retries: int = 0,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        stage: Optional[str] = None
+    ):
+        """Record one model request (after its final attempt)."""
+        stage = stage or self.current_stage()
+        key = (stage, model)
+        self.latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(latency_s)
+        status_key = (stage, model, status)
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        if retries:
+            self.retries[key] = self.retries.get(key, 0) + retries
+        for direction, count in (("in", prompt_tokens), ("out", completion_tokens)):
+            if count:
+                token_key = (stage, model, direction)
+                self.tokens[token_key] = self.tokens.get(token_key, 0) + count
+        if completion_tokens and latency_s > 0:
+            self.throughput.setdefault(key, _Histogram(THROUGHPUT_BUCKETS)).observe(completion_tokens / latency_s)
+
+    def export(self, path: Path, fmt: Optional[str] = None):
+        """Write metrics to ``path``.
+
+        ``fmt`` is "prometheus" or "otlp"; by default ``.json``/``.jsonl`` files
+        get OTLP JSON (spans and metrics) and anything else Prometheus text.
+        """
+        path = Path(path)
+        if fmt is None:
+            fmt = "otlp" if path.suffix in (".json", ".jsonl") else "prometheus"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == "prometheus":
+            path.write_text(self.to_prometheus())
+        elif fmt == "otlp":
+            path.write_text(self.to_otlp_json())
+        else:
+            raise ValueError(f"Unknown metrics format: {fmt}")
+
+    def to_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def labels(**values) -> str:
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in values.items()) + "}"
+
+        def histogram(name: str, help_text: str, series: Dict[Tuple[str, str], _Histogram]):
+            if not series:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (stage, model), hist in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(hist.bounds + [float("inf")], hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{labels(stage=stage, model=model, le=le)} {cumulative}")
+                lines.append(f"{name}_sum{labels(stage=stage, model=model)} {hist.sum}")
+                lines.append(f"{name}_count{labels(stage=stage, model=model)} {hist.count}")
+
+        histogram("sparc_request_duration_seconds", "Model request latency, including retries.", self.latency)
+        histogram("sparc_request_tokens_per_second", "Completion tokens per second of request latency.",
+                  self.throughput)
+
+        if self.requests:
+            lines.append("# HELP sparc_requests_total Model requests by final HTTP status.")
+            lines.append("# TYPE sparc_requests_total counter")
+            for (stage, model, status), count in sorted(self.requests.items()):
+                lines.append(f"sparc_requests_total{labels(stage=stage, model=model, status=status)} {count}")
+        if self.retries:
+            lines.append("# HELP sparc_request_retries_total Retried request attempts.")
+            lines.append("# TYPE sparc_request_retries_total counter")
+            for (stage, model), count in sorted(self.retries.items()):
+                lines.append(f"sparc_request_retries_total{labels(stage=stage, model=model)} {count}")
+        if self.tokens:
+            lines.append("# HELP sparc_tokens_total Prompt (in) and completion (out) tokens.")
+            lines.append("# TYPE sparc_tokens_total counter")
+            for (stage, model, direction), count in sorted(self.tokens.items()):
+                lines.append(f"sparc_tokens_total{labels(stage=stage, model=model, direction=direction)} {count}")
+
+        if self.stage_durations:
+            lines.append("# HELP sparc_stage_duration_seconds Wall time of pipeline stages.")
+            lines.append("# TYPE sparc_stage_duration_seconds summary")
+            for stage, (total, count) in sorted(self.stage_durations.items()):
+                lines.append(f"sparc_stage_duration_seconds_sum{labels(stage=stage)} {total:.6f}")
+                lines.append(f"sparc_stage_duration_seconds_count{labels(stage=stage)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def to_otlp_json(self) -> str:
+        """Render spans and metrics as OTLP JSON, one export request per line."""
+        resource = {"attributes": [_attribute("service.name", SERVICE_NAME)]}
+        scope = {"name": "sparc_generator"}
+        now = str(time.time_ns())
+        start = str(self.started_ns)
+
+        spans = [{
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            # SPAN_KIND_CLIENT for model requests, SPAN_KIND_INTERNAL otherwise
+            "kind": 3 if span.kind == "request" else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [_attribute("sparc.span_kind", span.kind)]
+                          + [_attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        } for span in self.spans]
+
+        def histogram_metric(name: str, unit: str, series: Dict[Tuple[str, str], _Histogram]) -> Dict[str, Any]:
+            return {
+                "name": name,
+                "unit": unit,
+                "histogram": {
+                    "aggregationTemporality": 2,
+                    "dataPoints": [{
+                        "attributes": [_attribute("stage", stage), _attribute("model", model)],
+                        "startTimeUnixNano": start,
+                        "timeUnixNano": now,
+                        "count": str(hist.count),
+                        "sum": hist.sum,
+                        "bucketCounts": [str(c) for c in hist.counts],
+                        "explicitBounds": hist.bounds,
+                    } for (stage, model), hist in sorted(series.items())],
+                },
+            }
+
+        def sum_metric(name: str, unit: str, series: Dict[tuple, int], label_names: List[str]) -> Dict[str, Any]:
+            return {
+                "name": name,
+                "unit": unit,
+                "sum": {
+                    "aggregationTemporality": 2,
+                    "isMonotonic": True,
+                    "dataPoints": [{
+                        "attributes": [_attribute(k, v) for k, v in zip(label_names, key)],
+                        "startTimeUnixNano": start,
+                        "timeUnixNano": now,
+                        "asInt": str(count),
+                    } for key, count in sorted(series.items())],
+                },
+            }
+
+        metrics = [
+            histogram_metric("sparc.request.duration", "s", self.latency),
+            histogram_metric("sparc.request.tokens_per_second", "{token}/s", self.throughput),
+            sum_metric("sparc.requests", "{request}", self.requests, ["stage", "model", "http.status_code"]),
+            sum_metric("sparc.request.retries", "{retry}", self.retries, ["stage", "model"]),
+            sum_metric("sparc.tokens", "{token}", self.tokens, ["stage", "model", "direction"]),
+        ]
+
+        traces = {"resourceSpans": [{"resource": resource, "scopeSpans": [{"scope": scope, "spans": spans}]}]}
+        metrics_request = {"resourceMetrics": [{"resource": resource, "scopeMetrics": [{"scope": scope, "metrics": metrics}]}]}
+        return json.dumps(traces) + "\n" + json.dumps(metrics_request) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def traced_stage(name: str):
+    """Run an async generator method inside a stage span named ``name``.
+
+    The span is labelled with the model the generator routes the stage to.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            with self.metrics.span(name, kind="stage", model=self.model_for(name)):
+                return await func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# One recorder per process, shared by every generator
+_RECORDER = MetricsRecorder()
+
+
+def get_metrics_recorder() -> MetricsRecorder:
+    """Return the process-wide metrics recorder."""
+    return _RECORDER
@@ -0,0 +1,398 @@
+"""Model catalogue: configurations, families and rate limits.
+
+Kept free of heavy imports so commands such as ``sparc list-models`` can use
+it without loading the OpenAI client or the tokenizer.
+"""
+import json
+import statistics
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional
+
+# SPARC artifacts in generation order
+SPARC_ARTIFACTS = ["specification", "pseudocode", "architecture", "refinement", "completion"]
+
+# Pipeline stages that can be routed to their own model
+PIPELINE_STAGES = ["analysis", "reduce"] + SPARC_ARTIFACTS + ["validation", "chat_simulation"]
+
+# Model configurations
+MODEL_CONFIGS = {
+    # GPT-4 Omni Family
+    "gpt-4o": {
+        "max_tokens": 16384,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "images"],
+        "description": "High-intelligence flagship model for complex tasks"
+    },
+    "gpt-4o-mini": {
+        "max_tokens": 16384,
+        "context_length": 128000,
+        "temperature": 0.7,
+        "capabilities": ["text", "images"],
+        "description": "Fast, affordable model for lightweight tasks"
+    },
+    "gpt-4o-2024-08-06": {
+        "max_tokens": 16384,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "images", "structured_output"],
+        "description": "Latest GPT-4o snapshot with Structured Output support"
+    },
+    # O1 Series (Reasoning Models)
+    "o1-preview": {
+        "max_tokens": 32768,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["reasoning", "code", "math"],
+        "description": "Advanced reasoning model for complex problem-solving"
+    },
+    "o1-mini": {
+        "max_tokens": 65536,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["reasoning", "code", "math", "science"],
+        "description": "Fast reasoning model optimized for coding and technical tasks"
+    },
+    # GPT-4 Turbo Family
+    "gpt-4-turbo": {
+        "max_tokens": 4096,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "images", "json_mode", "function_calling"],
+        "description": "Latest GPT-4 Turbo model with enhanced capabilities"
+    },
+    "gpt-4-turbo-2024-04-09": {
+        "max_tokens": 4096,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "images", "json_mode", "function_calling"],
+        "description": "GPT-4 Turbo with vision capabilities"
+    },
+    "gpt-4-0125-preview": {
+        "max_tokens": 4096,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "function_calling", "reduced_laziness"],
+        "description": "Preview model with improved task completion"
+    },
+    # Specialized Models
+    "gpt-4o-realtime-preview": {
+        "max_tokens": 4096,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "audio", "websocket"],
+        "description": "Preview model for realtime interactions"
+    },
+    "gpt-4o-audio-preview": {
+        "max_tokens": 16384,
+        "context_length": 128000,
+        "temperature": 0.2,
+        "capabilities": ["text", "audio"],
+        "description": "Preview model for audio processing in chat"
+    }
+}
+
+# Per-model request (RPM) and token (TPM) rate limits. TPM is charged for the
+# prompt plus the reserved max_tokens of every request.
+MODEL_RATE_LIMITS = {
+    "gpt-4o": {"requests_per_minute": 5000, "tokens_per_minute": 800000},
+    "gpt-4o-mini": {"requests_per_minute": 5000, "tokens_per_minute": 4000000},
+    "gpt-4o-2024-08-06": {"requests_per_minute": 5000, "tokens_per_minute": 800000},
+    "o1-preview": {"requests_per_minute": 5000, "tokens_per_minute": 800000},
+    "o1-mini": {"requests_per_minute": 5000, "tokens_per_minute": 4000000},
+    "gpt-4-turbo": {"requests_per_minute": 5000, "tokens_per_minute": 600000},
+    "gpt-4-turbo-2024-04-09": {"requests_per_minute": 5000, "tokens_per_minute": 600000},
+    "gpt-4-0125-preview": {"requests_per_minute": 5000, "tokens_per_minute": 600000},
+    "gpt-4o-realtime-preview": {"requests_per_minute": 5000, "tokens_per_minute": 800000},
+    "gpt-4o-audio-preview": {"requests_per_minute": 5000, "tokens_per_minute": 800000}
+}
+
+# Limits for models without an entry in MODEL_RATE_LIMITS or their family
+DEFAULT_RATE_LIMITS = {"requests_per_minute": 500, "tokens_per_minute": 300000}
+
+# List prices in USD per million input and output tokens
+MODEL_PRICING = {
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o-2024-08-06": {"input": 2.50, "output": 10.00},
+    "o1-preview": {"input": 15.00, "output": 60.00},
+    "o1-mini": {"input": 3.00, "output": 12.00},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "gpt-4-turbo-2024-04-09": {"input": 10.00, "output": 30.00},
+    "gpt-4-0125-preview": {"input": 10.00, "output": 30.00},
+    "gpt-4o-realtime-preview": {"input": 5.00, "output": 20.00},
+    "gpt-4o-audio-preview": {"input": 2.50, "output": 10.00}
+}
+
+# Prices for models without an entry in MODEL_PRICING or their family
+DEFAULT_PRICING = {"input": 10.00, "output": 30.00}
+
+# Typical time to first token and output throughput, used to estimate the
+# latency of a request before any usage has been recorded for the model
+MODEL_LATENCY = {
+    "gpt-4o": {"first_token_s": 0.5, "tokens_per_second": 80},
+    "gpt-4o-mini": {"first_token_s": 0.4, "tokens_per_second": 100},
+    "gpt-4o-2024-08-06": {"first_token_s": 0.5, "tokens_per_second": 80},
+    "o1-preview": {"first_token_s": 10.0, "tokens_per_second": 40},
+    "o1-mini": {"first_token_s": 4.0, "tokens_per_second": 70},
+    "gpt-4-turbo": {"first_token_s": 0.8, "tokens_per_second": 30},
+    "gpt-4-turbo-2024-04-09": {"first_token_s": 0.8, "tokens_per_second": 30},
+    "gpt-4-0125-preview": {"first_token_s": 0.8, "tokens_per_second": 30},
+    "gpt-4o-realtime-preview": {"first_token_s": 0.5, "tokens_per_second": 80},
+    "gpt-4o-audio-preview": {"first_token_s": 0.5, "tokens_per_second": 80}
+}
+
+# Latency profile for models without an entry in MODEL_LATENCY or their family
+DEFAULT_LATENCY = {"first_token_s": 1.0, "tokens_per_second": 30}
+
+# Model family definitions with capabilities
+MODEL_FAMILIES = {
+    "gpt-4o": {
+        "description": "High-intelligence multimodal models",
+        "base_capabilities": ["text", "images"],
+        "models": ["gpt-4o", "gpt-4o-2024-08-06", "gpt-4o-2024-05-13"],
+        "recommended_for": ["complex_tasks", "multimodal", "enterprise"]
+    },
+    "gpt-4o-mini": {
+        "description": "Fast, lightweight multimodal models",
+        "base_capabilities": ["text", "images"],
+        "models": ["gpt-4o-mini", "gpt-4o-mini-2024-07-18"],
+        "recommended_for": ["quick_tasks", "cost_effective", "vision"]
+    },
+    "o1": {
+        "description": "Advanced reasoning models",
+        "base_capabilities": ["reasoning", "code"],
+        "models": ["o1-preview", "o1-mini", "o1-preview-2024-09-12", "o1-mini-2024-09-12"],
+        "recommended_for": ["complex_reasoning", "coding", "math", "science"]
+    },
+    "gpt-4-turbo": {
+        "description": "Latest GPT-4 models with enhanced features",
+        "base_capabilities": ["text", "json_mode", "function_calling"],
+        "models": ["gpt-4-turbo", "gpt-4-turbo-2024-04-09", "gpt-4-0125-preview"],
+        "recommended_for": ["api_integration", "structured_output", "vision"]
+    }
+}
+
+# Family ``recommended_for`` tags that suit each pipeline stage
+STAGE_TASK_TYPES = {
+    "analysis": ["quick_tasks", "cost_effective"],
+    "reduce": ["quick_tasks", "cost_effective"],
+    **{name: ["complex_tasks"] for name in SPARC_ARTIFACTS},
+    "validation": ["complex_tasks", "structured_output"],
+    "chat_simulation": ["complex_tasks"]
+}
+
+# Request size assumed for models without recorded usage
+DEFAULT_REQUEST_TOKENS = {"prompt_tokens": 2000, "response_tokens": 1000}
+
+# Key of the all-stages entry in a model performance table
+ALL_STAGES = "*"
+
+
+def stage_of_context(context: str) -> str:
+    """Pipeline stage of a usage log context such as ``chunk_3`` or ``validation_architecture``."""
+    if context.startswith("chunk_"):
+        return "analysis"
+    if context.startswith("reduce_"):
+        return "reduce"
+    if context.startswith("validation"):
+        return "validation"
+    return context
+
+
+def load_usage_history(root: Path) -> List[Dict[str, Any]]:
+    """Read the entries of every ``usage_log.json`` below ``root``.
+
+    Unreadable logs are skipped.
+    """
+    entries = []
+    for path in sorted(Path(root).rglob("usage_log.json")):
+        try:
+            with open(path) as f:
+                log = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(log, list):
+            entries.extend(entry for entry in log if isinstance(entry, dict))
+    return entries
+
+
+def learn_model_performance(entries: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Build a latency/cost table from usage log entries.
+
+    Only requests actually sent to the model with a recorded ``latency_s``
+    count. The table maps model -> stage (``"*"`` for all stages) -> mean
+    ``latency_s``, ``prompt_tokens``, ``response_tokens`` and ``cost_usd`` per
+    request, with the number of ``requests`` they are based on.
+    """
+    totals: Dict[str, Dict[str, List[float]]] = {}
+    for entry in entries:
+        if entry.get("cached") or entry.get("latency_s") is None or not entry.get("model"):
+            continue
+        model_totals = totals.setdefault(entry["model"], {})
+        values = (entry["latency_s"], entry.get("prompt_tokens", 0), entry.get("response_tokens", 0))
+        for stage in (stage_of_context(entry.get("context", "")), ALL_STAGES):
+            stage_totals = model_totals.setdefault(stage, [0, 0.0, 0, 0])
+            stage_totals[0] += 1
+            for i, value in enumerate(values):
+                stage_totals[i + 1] += value
+
+    performance = {}
+    for model, stages in totals.items():
+        pricing = get_model_pricing(model)
+        performance[model] = {}
+        for stage, (requests, latency, prompt_tokens, response_tokens) in stages.items():
+            prompt_tokens /= requests
+            response_tokens /= requests
+            performance[model][stage] = {
+                "requests": requests,
+                "latency_s": latency / requests,
+                "prompt_tokens": prompt_tokens,
+                "response_tokens": response_tokens,
+                "cost_usd": (prompt_tokens * pricing["input"] + response_tokens * pricing["output"]) / 1e6
+            }
+    return performance
+
+
+def _model_family(model: str) -> Optional[Dict[str, Any]]:
+    for family in MODEL_FAMILIES.values():
+        if model in family["models"]:
+            return family
+    return None
+
+
+def get_recommended_model(
+    task_type: str = None,
+    requirements: List[str] = None,
+    performance: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None
+) -> Optional[str]:
+    """
+    Get recommended model based on task type and requirements.
+
+    Candidates are the models in MODEL_CONFIGS with every required
+    capability, narrowed to the families recommended for ``task_type`` (a
+    pipeline stage or a family ``recommended_for`` tag) when any match. They
+    are ranked by expected cost times expected latency per request, taken
+    from ``performance`` (see ``learn_model_performance``) for the stage if
+    recorded, else for the model. Models without recorded usage are scored
+    with the mean request size and median latency of those with history, so
+    without any history models rank by price. Returns None if no model has the required capabilities.
+    """
+    requirements = requirements or []
+    performance = performance or {}
+    candidates = [
+        model for model, config in MODEL_CONFIGS.items()
+        if all(req in config["capabilities"] for req in requirements)
+    ]
+    if task_type:
+        tags = STAGE_TASK_TYPES.get(task_type, [task_type])
+        preferred = [
+            model for model in candidates
+            if any(tag in (_model_family(model) or {}).get("recommended_for", []) for tag in tags)
+        ]
+        candidates = preferred or candidates
+    if not candidates:
+        return None
+
+    def stats_for(model: str) -> Optional[Dict[str, float]]:
+        stages = performance.get(model, {})
+        return stages.get(task_type) or stages.get(ALL_STAGES)
+
+    known = [stats for stats in map(stats_for, candidates) if stats]
+    default_latency = statistics.median(stats["latency_s"] for stats in known) if known else 1.0
+    default_tokens = {
+        key: statistics.mean(stats[key] for stats in known) if known else DEFAULT_REQUEST_TOKENS[key]
+        for key in DEFAULT_REQUEST_TOKENS
+    }
+
+    def score(model: str) -> float:
+        stats = stats_for(model)
+        if stats:
+            return stats["cost_usd"] * stats["latency_s"]
+        pricing = get_model_pricing(model)
+        cost = (default_tokens["prompt_tokens"] * pricing["input"]
+                + default_tokens["response_tokens"] * pricing["output"]) / 1e6
+        return cost * default_latency
+
+    # Ties keep the MODEL_CONFIGS order
+    return min(candidates, key=score)
+
+def validate_model_config(model: str, config: Dict[str, Any] = None, requirements: List[str] = None) -> Dict[str, Any]:
+    """
+    Enhanced model validation with capability checking.
+    """
+    # First, validate model exists
+    if model not in MODEL_CONFIGS and not any(
+        model in family["models"] 
+        for family in MODEL_FAMILIES.values()
+    ):
+        # If model not found, try to recommend one
+        recommended = get_recommended_model(requirements=requirements)
+        raise ValueError(
+            f"Unsupported model: {model}. "
+            f"Did you mean: {recommended}? "
+            f"Available models: {', '.join(MODEL_CONFIGS.keys())}"
+        )
+    
+    # If custom config provided, validate it
+    if config:
+        required_keys = {"max_tokens", "context_length", "temperature"}
+        if not all(key in config for key in required_keys):
+            raise ValueError(
+                f"Invalid model configuration. Required keys: {required_keys}"
+            )
+        return config
+
+    # Get model config
+    if model in MODEL_CONFIGS:
+        config = MODEL_CONFIGS[model]
+    else:
+        # Find family config
+        found = False
+        for family in MODEL_FAMILIES.values():
+            if model in family["models"]:
+                base_model = family["models"][0]
+                config = MODEL_CONFIGS[base_model]
+                found = True
+                break
+        if not found:
+            raise ValueError(f"Model {model} not found in model configurations.")
+
+    # Validate capabilities if required
+    if requirements:
+        missing = [req for req in requirements if req not in config["capabilities"]]
+        if missing:
+            recommended = get_recommended_model(requirements=requirements)
+            raise ValueError(
+                f"Model {model} missing required capabilities: {missing}. "
+                f"Consider using {recommended} instead."
+            )
+    
+    return config
+
+def get_model_rate_limits(model: str) -> Dict[str, int]:
+    """Return RPM/TPM limits for a model, falling back to its family's base model."""
+    if model in MODEL_RATE_LIMITS:
+        return MODEL_RATE_LIMITS[model]
+    for family in MODEL_FAMILIES.values():
+        if model in family["models"] and family["models"][0] in MODEL_RATE_LIMITS:
+            return MODEL_RATE_LIMITS[family["models"][0]]
+    return DEFAULT_RATE_LIMITS
+
+def get_model_pricing(model: str) -> Dict[str, float]:
+    """Return per-million-token prices for a model, falling back to its family's base model."""
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    family = _model_family(model)
+    if family and family["models"][0] in MODEL_PRICING:
+        return MODEL_PRICING[family["models"][0]]
+    return DEFAULT_PRICING
+
+def get_model_latency(model: str) -> Dict[str, float]:
+    """Return the latency profile of a model, falling back to its family's base model."""
+    if model in MODEL_LATENCY:
+        return MODEL_LATENCY[model]
+    family = _model_family(model)
+    if family and family["models"][0] in MODEL_LATENCY:
+        return MODEL_LATENCY[family["models"][0]]
+    return DEFAULT_LATENCY
@@ -0,0 +1,276 @@
+"""Transcript normalization: strips caption noise before the transcript is chunked."""
+import collections
+import re
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .captions import INLINE_MARKUP, SENTENCE_END, CaptionSegment
+
+# A timestamp such as "0:07", "01:02:03" or "[00:01:02.500]". Whole lines of
+# it are dropped; at the start of a line only the bracketed form is, so prose
+# such as "12:30 we broke the build" is kept
+_TIMESTAMP = r'\d{1,2}(?::\d{2}){1,2}(?:[.,]\d{1,3})?'
+TIMESTAMP_LINE = re.compile(rf'^\s*[\[(]?{_TIMESTAMP}[\])]?\s*$')
+TIMESTAMP_PREFIX = re.compile(rf'^\s*[\[(]{_TIMESTAMP}[\])]\s*')
+
+# SRT/VTT cue timing ("00:00:01,000 --> 00:00:04,000 align:start"), the cue
+# number before it and the WebVTT header lines
+CUE_TIMING = re.compile(r'^\s*(?:\d{1,2}:)?\d{1,2}:\d{2}[.,]\d{1,3}\s*-->')
+CUE_INDEX = re.compile(r'^\s*\d+\s*$')
+VTT_HEADER = re.compile(r'^\s*WEBVTT\b')
+VTT_HEADER_FIELD = re.compile(r'^\s*(?:Kind|Language):')
+
+# Non-speech tags of captions, such as [Music] or (Applause), and music notes.
+# Other bracketed text (arr[i], List[str], [1]) is content and stays.
+NON_SPEECH_TAGS = (
+    "music", "applause", "laughter", "laughs", "laughing", "cheering", "cheers", "clapping",
+    "inaudible", "silence", "crosstalk", "noise", "background noise", "sighs", "coughs",
+    "coughing", "foreign", "no audio", "blank_audio", "sound", "sound effect"
+)
+SOUND_TAG = re.compile(
+    r'[\[(]\s*(?:' + "|".join(re.escape(tag) for tag in NON_SPEECH_TAGS) + r')\s*[\])]|♪+',
+    re.IGNORECASE
+)
+
+WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class NormalizationOptions:
+    """Steps of transcript normalization.
+
+    Timestamp lines, bracketed timestamp prefixes, cue numbers and timing
+    lines are stripped, then the inline markup of cues and ``[Music]``-style
+    non-speech tags. Within SRT/VTT cues, a caption line equal to one of the
+    last ``duplicate_window`` caption lines is dropped, and one starting with
+    the previous caption line keeps only the new words (rolling
+    auto-captions). Standalone ``fillers`` are removed and whitespace is
+    collapsed. With ``join_lines``, the lines of a paragraph are joined into
+    lines that end at a sentence end or after ``max_line_words`` words, which
+    saves a newline token per caption line. Paragraph breaks are kept.
+    """
+    strip_timestamps: bool = True
+    strip_tags: bool = True
+    collapse_duplicates: bool = True
+    duplicate_window: int = 3
+    remove_fillers: bool = True
+    fillers: tuple = ("uh", "um", "uhm", "erm", "hmm")
+    join_lines: bool = True
+    max_line_words: int = 60
+
+    @classmethod
+    def from_dict(cls, options: Optional[Dict[str, Any]]) -> "NormalizationOptions":
+        """Build options from a config mapping, e.g. the ``normalization`` block of ``sparc_prompts.yaml``."""
+        options = dict(options or {})
+        known = {field.name for field in fields(cls)}
+        unknown = [key for key in options if key not in known]
+        if unknown:
+            raise ValueError(f"Unknown normalization options: {', '.join(unknown)}")
+        if "fillers" in options:
+            options["fillers"] = tuple(options["fillers"] or ())
+        return cls(**options)
+
+
+class TranscriptNormalizer:
+    """Streams transcript lines through the enabled normalization steps.
+
+    Each step is a generator over lines, so a transcript is normalized in a
+    single pass with memory bounded by the duplicate window and the output
+    line being joined. ``stats`` counts what the last run removed.
+    """
+
+    def __init__(self, options: Optional[NormalizationOptions] = None):
+        self.options = options or NormalizationOptions()
+        self.stats: Dict[str, int] = {}
+        filler_words = "|".join(re.escape(word) for word in self.options.fillers)
+        # Hyphens and apostrophes count as part of a word, so "uh-huh" stays
+        self._filler = re.compile(rf"(?<![\w'-])(?:{filler_words})(?![\w'-]),?", re.IGNORECASE)
+
+    def normalize(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield the normalized lines of a transcript given line by line."""
+        self._reset_stats()
+        stream = self._clean(self._strip_cues(self._count_input(lines)))
+        if self.options.collapse_duplicates:
+            stream = self._collapse_duplicates(stream)
+        for line in self._join(stream):
+            self.stats["output_lines"] += 1
+            self.stats["output_chars"] += len(line) + 1
+            yield line
+
+    def normalize_text(self, text: str) -> str:
+        """Normalize a whole transcript."""
+        return "\n".join(self.normalize(text.splitlines()))
+
+    def normalize_segments(self, segments: Iterable[CaptionSegment]) -> Iterator[CaptionSegment]:
+        """Yield parsed caption segments with their text normalized and their times kept.
+
+        Cue timings are already gone, so only the cleaning and duplicate steps
+        run; a duplicate caption line is dropped from its segment and a
+        segment left empty is skipped. Lines are not joined here: that is up
+        to the ``TimedTranscript`` built from the segments.
+        """
+        self._reset_stats()
+        recent = self._duplicate_window()
+        for segment in segments:
+            self.stats["input_lines"] += 1
+            self.stats["input_chars"] += len(segment.text) + 1
+            lines = self._clean((line, True) for line in segment.text.splitlines())
+            if self.options.collapse_duplicates:
+                lines = self._collapse_duplicates(lines, recent)
+            text = " ".join(line for line, _ in lines if line)
+            if text:
+                self.stats["output_lines"] += 1
+                self.stats["output_chars"] += len(text) + 1
+                yield CaptionSegment(text, segment.start_s, segment.end_s)
+
+    def _reset_stats(self):
+        self.stats = {key: 0 for key in (
+            "input_lines", "input_chars", "output_lines", "output_chars",
+            "timestamps", "tags", "duplicates", "fillers"
+        )}
+
+    def _duplicate_window(self) -> collections.deque:
+        return collections.deque(maxlen=max(self.options.duplicate_window, 1))
+
+    def _count_input(self, lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            self.stats["input_lines"] += 1
+            self.stats["input_chars"] += len(line) + 1
+            yield line.rstrip("\r\n")
+
+    def _strip_cues(self, lines: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+        """Pair every line with whether it is caption text.
+
+        Caption text is the text of an SRT/VTT cue, from its timing line to
+        the next blank line (which only separates cues and is dropped), and
+        text following timestamp lines or bracketed timestamps up to the next
+        blank line, as in copied YouTube transcripts. With
+        ``strip_timestamps``, timing lines, cue numbers, the WebVTT header,
+        timestamp lines and bracketed timestamp prefixes are removed.
+        """
+        strip = self.options.strip_timestamps
+        # A bare number is a cue number only if a timing line follows it
+        pending: Optional[str] = None
+        caption = in_header = False
+        for line in lines:
+            if CUE_TIMING.match(line):
+                if strip:
+                    self.stats["timestamps"] += 1 + (pending is not None)
+                else:
+                    if pending is not None:
+                        yield pending, False
+                    yield line, False
+                pending = None
+                caption, in_header = True, False
+                continue
+            if pending is not None:
+                yield pending, False
+                pending = None
+            if not line.strip():
+                if not caption:
+                    yield "", False
+                caption = in_header = False
+                continue
+            if VTT_HEADER.match(line) or (in_header and VTT_HEADER_FIELD.match(line)):
+                in_header = True
+                if strip:
+                    self.stats["timestamps"] += 1
+                else:
+                    yield line, False
+                continue
+            in_header = False
+            if TIMESTAMP_LINE.match(line):
+                caption = True
+                if strip:
+                    self.stats["timestamps"] += 1
+                else:
+                    yield line, False
+                continue
+            if not caption and CUE_INDEX.match(line):
+                pending = line
+                continue
+            if TIMESTAMP_PREFIX.match(line):
+                caption = True
+                if strip:
+                    line = TIMESTAMP_PREFIX.sub("", line, count=1)
+                    self.stats["timestamps"] += 1
+            yield line, caption
+        if pending is not None:
+            yield pending, False
+
+    def _clean(self, lines: Iterable[Tuple[str, bool]]) -> Iterator[Tuple[str, bool]]:
+        """Remove markup, tags and fillers, and collapse whitespace.
+
+        A line left empty is dropped; a blank line is kept as a paragraph
+        break. Lines other than caption text keep their indentation.
+        """
+        options = self.options
+        for line, caption in lines:
+            if not line.strip():
+                yield "", caption
+                continue
+            indent = "" if caption else line[:len(line) - len(line.lstrip())]
+            if caption:
+                line = INLINE_MARKUP.sub("", line)
+            if options.strip_tags:
+                line, count = SOUND_TAG.subn(" ", line)
+                self.stats["tags"] += count
+            if options.remove_fillers and options.fillers:
+                line, count = self._filler.subn(" ", line)
+                self.stats["fillers"] += count
+            line = WHITESPACE.sub(" ", line).strip()
+            if line:
+                yield indent + line, caption
+
+    def _collapse_duplicates(self, lines: Iterable[Tuple[str, bool]],
+                             recent: Optional[collections.deque] = None) -> Iterator[Tuple[str, bool]]:
+        """Drop caption lines repeated within the window and rolling-caption prefixes.
+
+        Only caption text is compared; other lines pass through.
+        """
+        recent = self._duplicate_window() if recent is None else recent
+        for line, caption in lines:
+            if not caption or not line:
+                yield line, caption
+                continue
+            key = line.lower()
+            if key in recent:
+                self.stats["duplicates"] += 1
+                continue
+            if recent and key.startswith(recent[-1] + " "):
+                line = line[len(recent[-1]) + 1:]
+                self.stats["duplicates"] += 1
+            recent.append(key)
+            yield line, caption
+
+    def _join(self, lines: Iterable[Tuple[str, bool]]) -> Iterator[str]:
+        """Join caption text into lines ending at sentence ends or ``max_line_words``.
+
+        Other lines, and every line without ``join_lines``, stay on their own.
+        Runs of blank lines become one blank line between paragraphs.
+        """
+        parts: List[str] = []
+        words = 0
+        started = paragraph_break = False
+        for line, caption in lines:
+            if parts and not (line and caption):
+                yield " ".join(parts)
+                parts, words = [], 0
+            if not line:
+                paragraph_break = started
+                continue
+            if paragraph_break:
+                yield ""
+                paragraph_break = False
+            started = True
+            if not caption:
+                yield line
+                continue
+            parts.append(line)
+            words += line.count(" ") + 1
+            if (not self.options.join_lines or words >= self.options.max_line_words
+                    or SENTENCE_END.search(line)):
+                yield " ".join(parts)
+                parts, words = [], 0
+        if parts:
+            yield " ".join(parts)
@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import openai
 from typing import Dict, List, Optional, Tuple
 import os
 from pathlib import Path
@@ -12,6 +11,12 @@ import click
 import urllib3
 import warnings
 from enum import Enum
+import tiktoken
+
+from sparc_generator.core import get_model_rate_limiter
+from sparc_generator.metrics import MetricsRecorder, get_metrics_recorder
+from sparc_generator.transport import Transport, get_transport
+from sparc_generator.rate_limit import RateLimiter, estimate_request_tokens
 
 # Suppress urllib3 warnings
 warnings.filterwarnings("ignore", category=urllib3.exceptions.NotOpenSSLWarning)
@@ -45,15 +50,28 @@ class ModelConfig:
     presence_penalty: float = 0.0
 
 class SPARCPromptGenerator:
-    def __init__(self, model_config: Optional[ModelConfig] = None):
+    def __init__(self, model_config: Optional[ModelConfig] = None, rate_limiter: Optional[RateLimiter] = None,
+                 metrics: Optional[MetricsRecorder] = None, transport: Optional[Transport] = None):
         self._load_environment()
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+        # Same pooled client, retry policy and usage accounting as core.SPARCPromptGenerator
+        self.transport = transport or get_transport(os.getenv("OPENAI_API_KEY"))
         self.model_config = model_config or ModelConfig()
         self.logger = logging.getLogger(__name__)
         self.context: Dict[str, any] = {}  # Store context between phases
+        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        # Shared with core.SPARCPromptGenerator instances using the same model
+        self.rate_limiter = rate_limiter or get_model_rate_limiter(self.model_config.model_name)
+        self.metrics = metrics or get_metrics_recorder()
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text."""
+        return len(self.tokenizer.encode(text))
 
     def _load_environment(self):
-        """Load environment variables from .env file."""
+        """Load environment variables from .env file.
+
+        The file is optional when ``OPENAI_API_KEY`` is already set.
+        """
         current_dir = Path(__file__).parent.resolve()
         env_path = None
         search_dirs = [current_dir, current_dir.parent, current_dir.parent.parent]
@@ -65,6 +83,8 @@ class SPARCPromptGenerator:
                 break
         
         if env_path is None:
+            if os.getenv("OPENAI_API_KEY"):
+                return
             raise FileNotFoundError(
                 ".env file not found. Please create one with your OpenAI API key. "
                 "Search locations: " + ", ".join(str(d) for d in search_dirs)
@@ -75,10 +95,32 @@ class SPARCPromptGenerator:
         if not os.getenv("OPENAI_API_KEY"):
             raise ValueError("OPENAI_API_KEY not found in .env file")
 
-    async def convert_artifact_to_prompts(self, phase: SPARCPhase, content: str) -> List[Dict[str, str]]:
-        """Convert a single artifact into a sequence of development prompts."""
+    async def convert_artifact_to_prompts(
+        self,
+        phase: SPARCPhase,
+        content: str,
+        context: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, str]]:
+        """Convert a single artifact into a sequence of development prompts.
+
+        ``context`` maps earlier phase names to their artifact content; without
+        it, the context comes from the phases this generator already converted.
+        """
         system_prompt = self._get_system_prompt(phase)
-        
+        model = self.model_config.model_name
+
+        with self.metrics.span(f"prompts:{phase.phase_name}", kind="stage", model=model):
+            return await self._convert_artifact(phase, content, system_prompt, context)
+
+    async def _convert_artifact(
+        self,
+        phase: SPARCPhase,
+        content: str,
+        system_prompt: str,
+        context: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, str]]:
+        """Body of ``convert_artifact_to_prompts``, running inside its stage span."""
+        model = self.model_config.model_name
         try:
             messages = [
                 {"role": "system", "content": system_prompt},
@@ -102,28 +144,28 @@ class SPARCPromptGenerator:
             ]
 
             # Add context from previous phases
-            if self.context and phase != SPARCPhase.SPECIFICATION:
-                context_prompt = self._get_context_prompt()
+            if context is None:
+                context = {name: entry["content"] for name, entry in self.context.items()}
+            if context and phase != SPARCPhase.SPECIFICATION:
+                context_prompt = self._get_context_prompt(context)
                 messages.insert(1, {"role": "user", "content": context_prompt})
 
-            # Make API call with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = await openai.ChatCompletion.acreate(
-                        model=self.model_config.model_name,
-                        messages=messages,
-                        temperature=0.3,
-                        max_tokens=self.model_config.max_tokens,
-                        top_p=1.0,
-                        frequency_penalty=0.0,
-                        presence_penalty=0.0
-                    )
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)
+            # Make API call through the shared transport, metered by the shared rate limiter
+            request_tokens = estimate_request_tokens(messages, self.model_config.max_tokens, self.count_tokens)
+            response = await self.transport.complete(
+                model,
+                messages,
+                temperature=0.3,
+                max_tokens=self.model_config.max_tokens,
+                request_tokens=request_tokens,
+                rate_limiter=self.rate_limiter,
+                metrics=self.metrics,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0
+            )
+            # Latency is already in the request metrics
+            self.transport.latencies.pop(response.id, None)
 
             prompts_text = response.choices[0].message.content
             prompts = self._parse_prompts_response(prompts_text)
@@ -143,10 +185,10 @@ class SPARCPromptGenerator:
                     }
                 
                 # Ensure content is imperative
-                content = prompt["content"]
-                if not any(content.strip().startswith(verb) for verb in ["Implement", "Create", "Develop", "Build", "Configure", "Set up", "Define", "Establish"]):
-                    content = f"Implement {content}"
-                prompt["content"] = content
+                prompt_content = prompt["content"]
+                if not any(prompt_content.strip().startswith(verb) for verb in ["Implement", "Create", "Develop", "Build", "Configure", "Set up", "Define", "Establish"]):
+                    prompt_content = f"Implement {prompt_content}"
+                prompt["content"] = prompt_content
                 
                 validated_prompts.append(prompt)
             
@@ -165,12 +207,12 @@ class SPARCPromptGenerator:
             self.logger.error(f"Error converting {phase.phase_name} to prompts: {str(e)}")
             return []
 
-    def _get_context_prompt(self) -> str:
-        """Generate a context prompt from previous phases."""
+    def _get_context_prompt(self, context: Dict[str, str]) -> str:
+        """Generate a context prompt from previous phases' content."""
         context_parts = []
         for phase in SPARCPhase:
-            if phase.phase_name in self.context:
-                context_parts.append(f"Previous {phase.phase_name} decisions:\n{self.context[phase.phase_name]['content'][:500]}...")
+            if phase.phase_name in context:
+                context_parts.append(f"Previous {phase.phase_name} decisions:\n{context[phase.phase_name][:500]}...")
         
         return "\n\nContext from previous phases:\n" + "\n\n".join(context_parts)
 
@@ -337,9 +379,28 @@ class SPARCPromptGenerator:
             self.logger.error("Failed to parse prompts response as JSON")
             return [{"role": "user", "content": response_text}]
 
-def process_artifacts(artifacts_dir: str, output_dir: str, project_name: str):
-    """Process artifacts and generate prompts in SPARC order."""
+def phase_contexts(contents: Dict[SPARCPhase, str]) -> Dict[SPARCPhase, Dict[str, str]]:
+    """Context of every phase: the content of the earlier phases' artifacts."""
+    contexts = {}
+    earlier: Dict[str, str] = {}
+    for phase in SPARCPhase:
+        if phase in contents:
+            contexts[phase] = dict(earlier)
+            earlier[phase.phase_name] = contents[phase]
+    return contexts
+
+def process_artifacts(artifacts_dir: str, output_dir: str, project_name: str,
+                      metrics_out: Optional[str] = None, parallel: bool = False):
+    """Process artifacts and generate prompts in SPARC order.
+
+    With ``parallel``, every phase's context is built from the artifact files
+    up front and all phases are converted concurrently; each phase's prompts
+    are saved as soon as it finishes, and ``all_prompts.json`` keeps SPARC
+    order. With ``metrics_out``, request metrics and spans are exported there
+    as OTLP JSON (``.json``) or Prometheus text.
+    """
     async def run_processing():
+        generator = None
         try:
             generator = SPARCPromptGenerator()
             
@@ -356,26 +417,46 @@ def process_artifacts(artifacts_dir: str, output_dir: str, project_name: str):
             
             output_path.mkdir(parents=True, exist_ok=True)
             
-            all_prompts = []
+            contents: Dict[SPARCPhase, str] = {}
             missing_phases = []
-            
-            # Process artifacts in SPARC order
             for phase in SPARCPhase:
                 file_path = artifacts_path / phase.filename
                 if file_path.exists():
-                    click.echo(f"\nProcessing {phase.phase_name.upper()} phase from {file_path}")
-                    content = file_path.read_text()
-                    prompts = await generator.convert_artifact_to_prompts(phase, content)
-                    all_prompts.extend(prompts)
-                    
-                    # Save individual phase prompts
-                    artifact_output = output_path / f"{phase.phase_name}_prompts.json"
-                    with open(artifact_output, "w") as f:
-                        json.dump(prompts, f, indent=2)
-                    click.echo(f"✓ Saved {len(prompts)} prompts to {artifact_output}")
+                    contents[phase] = file_path.read_text()
                 else:
                     missing_phases.append(phase.phase_name)
                     click.echo(f"⚠ Warning: Missing {phase.phase_name} artifact")
+
+            def save_phase(phase: SPARCPhase, prompts: List[Dict[str, str]]):
+                """Save individual phase prompts."""
+                artifact_output = output_path / f"{phase.phase_name}_prompts.json"
+                with open(artifact_output, "w") as f:
+                    json.dump(prompts, f, indent=2)
+                click.echo(f"✓ Saved {len(prompts)} {phase.phase_name} prompts to {artifact_output}")
+
+            phase_prompts: Dict[SPARCPhase, List[Dict[str, str]]] = {}
+            if parallel:
+                contexts = phase_contexts(contents)
+
+                async def convert(phase: SPARCPhase) -> Tuple[SPARCPhase, List[Dict[str, str]]]:
+                    prompts = await generator.convert_artifact_to_prompts(phase, contents[phase], contexts[phase])
+                    return phase, prompts
+
+                click.echo(f"\nProcessing {len(contents)} phases concurrently from {artifacts_path}")
+                for finished in asyncio.as_completed([convert(phase) for phase in contents]):
+                    phase, prompts = await finished
+                    phase_prompts[phase] = prompts
+                    save_phase(phase, prompts)
+            else:
+                # Process artifacts in SPARC order
+                for phase, content in contents.items():
+                    click.echo(f"\nProcessing {phase.phase_name.upper()} phase from {artifacts_path / phase.filename}")
+                    phase_prompts[phase] = await generator.convert_artifact_to_prompts(phase, content)
+                    save_phase(phase, phase_prompts[phase])
+
+            all_prompts = []
+            for phase in SPARCPhase:
+                all_prompts.extend(phase_prompts.get(phase, []))
             
             # Save all prompts combined
             combined_output = output_path / "all_prompts.json"
@@ -391,8 +472,17 @@ def process_artifacts(artifacts_dir: str, output_dir: str, project_name: str):
         except Exception as e:
             click.echo(f"\n❌ Error: {str(e)}", err=True)
             raise
+        finally:
+            if generator is not None:
+                await generator.transport.close()
 
-    asyncio.run(run_processing())
+    metrics = get_metrics_recorder()
+    try:
+        with metrics.span("process_artifacts", kind="pipeline"):
+            asyncio.run(run_processing())
+    finally:
+        if metrics_out:
+            metrics.export(Path(metrics_out))
 
 @click.command()
 @click.option('--artifacts-dir', '-a', 
@@ -404,9 +494,15 @@ def process_artifacts(artifacts_dir: str, output_dir: str, project_name: str):
 @click.option('--project-name', '-n',
               type=str,
               help='Project name for organizing outputs')
-def main(artifacts_dir: str, output_dir: str, project_name: str):
+@click.option('--metrics-out',
+              type=click.Path(dir_okay=False),
+              help='Write request metrics and spans here (.json: OTLP JSON, otherwise Prometheus text)')
+@click.option('--parallel',
+              is_flag=True,
+              help='Convert all phases concurrently, with context taken from the artifact files')
+def main(artifacts_dir: str, output_dir: str, project_name: str, metrics_out: Optional[str], parallel: bool):
     """Generate development prompts from SPARC artifacts in sequence."""
-    process_artifacts(artifacts_dir, output_dir, project_name)
+    process_artifacts(artifacts_dir, output_dir, project_name, metrics_out, parallel)
 
 if __name__ == "__main__":
     main()  # pylint: disable=no-value-for-parameter
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""Async rate limiting for model requests."""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Callable
+
+# Tokens added by the chat format around each message and the reply primer
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+
+class RateLimiter:
+    """Token-bucket limiter metering requests and tokens per minute.
+
+    Two buckets refill continuously: one holding ``requests_per_minute``
+    requests and one holding ``tokens_per_minute`` tokens. ``acquire`` waits
+    until both can cover the request, so callers are throttled *before* a
+    request is sent instead of reacting to 429 responses. Waiters are served
+    in arrival order.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("Rate limits must be positive")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+        # Diagnostics
+        self._waiting = 0
+        self.requests = 0
+        self.tokens = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers currently waiting for capacity."""
+        return self._waiting
+
+    def _get_lock(self) -> asyncio.Lock:
+        # A limiter may outlive an event loop (one asyncio.run per command)
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(
+            float(self.requests_per_minute),
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_allowance = min(
+            float(self.tokens_per_minute),
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+        )
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait until one request of ``tokens`` tokens may be sent.
+
+        A request larger than the whole per-minute token budget waits for a
+        full bucket and then drives the allowance negative, delaying later
+        requests accordingly.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._get_lock():
+                needed = min(tokens, self.tokens_per_minute)
+                while True:
+                    self._refill()
+                    if self._request_allowance >= 1 and self._token_allowance >= needed:
+                        break
+                    wait = max(
+                        (1 - self._request_allowance) * 60.0 / self.requests_per_minute,
+                        (needed - self._token_allowance) * 60.0 / self.tokens_per_minute,
+                        0.001
+                    )
+                    await asyncio.sleep(wait)
+                self._request_allowance -= 1
+                self._token_allowance -= tokens
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - start
+        self.requests += 1
+        self.tokens += tokens
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.last_wait = waited
+        if waited >= 1:
+            logging.info(f"Rate limiter delayed request by {waited:.2f}s ({tokens} tokens)")
+        return waited
+
+    def release(self, tokens: int):
+        """Give back the allowance of a request that was admitted but never sent."""
+        self._request_allowance = min(float(self.requests_per_minute), self._request_allowance + 1)
+        self._token_allowance = min(float(self.tokens_per_minute), self._token_allowance + tokens)
+        self.requests -= 1
+        self.tokens -= tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current queue depth and cumulative wait statistics."""
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "total_wait_s": round(self.total_wait, 3),
+            "max_wait_s": round(self.max_wait, 3),
+            "last_wait_s": round(self.last_wait, 3),
+            "avg_wait_s": round(self.total_wait / self.requests, 3) if self.requests else 0.0
+        }
+
+
+# One limiter per model, shared by every generator in the process
+_LIMITERS: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(model: str, requests_per_minute: int, tokens_per_minute: int) -> RateLimiter:
+    """Return the process-wide limiter for ``model``, creating it on first use."""
+    limiter = _LIMITERS.get(model)
+    if limiter is None:
+        limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        _LIMITERS[model] = limiter
+    return limiter
+
+
+def estimate_request_tokens(
+    messages: List[Dict[str, Any]],
+    max_tokens: int,
+    count_tokens: Callable[[str], int]
+) -> int:
+    """Tokens a request counts against TPM: the prompt plus the reserved response."""
+    prompt_tokens = sum(
+        count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+    return prompt_tokens + REPLY_OVERHEAD_TOKENS + max_tokens
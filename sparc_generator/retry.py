@@ -0,0 +1,203 @@
+"""Retry, deadline, circuit breaker and hedging policy for model requests."""
+import collections
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+
+from openai import APIConnectionError
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+
+# Successful attempt latencies kept per model and stage for hedging
+LATENCY_WINDOW = 200
+
+
+class AttemptTimeoutError(TimeoutError):
+    """An attempt got no response within its deadline."""
+    status_code = "timeout"
+
+
+class CircuitOpenError(RuntimeError):
+    """Requests to a model are suspended after repeated failures."""
+    status_code = "circuit_open"
+
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for errors a later attempt may not hit: timeouts, lost
+    connections, 408/409/429 and 5xx responses. Other API errors (bad
+    request, authentication, missing model...) and local errors are fatal.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    # The SDK wraps transport failures in APIConnectionError (APITimeoutError
+    # for timeouts), so the HTTP library's own errors need no check
+    return isinstance(error, (TimeoutError, ConnectionError, APIConnectionError))
+
+
+def is_availability_failure(error: BaseException) -> bool:
+    """True for failures that suggest the model endpoint is unhealthy.
+
+    Rate limiting and client errors mean the server answered, so they do not
+    count against the circuit breaker.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = _status(error)
+    if status is not None:
+        return status >= 500
+    return is_retryable(error)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds to wait that the server asked for, from ``retry-after-ms`` or ``Retry-After``."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """How a request is retried, cut off and hedged.
+
+    Only retryable errors (see ``is_retryable``) are retried, at most
+    ``max_attempts`` attempts in all. The wait before attempt ``n + 1`` is the
+    server's ``Retry-After`` hint when given (capped at
+    ``max_retry_after_s``), otherwise ``backoff_base_s * backoff_factor ** n``
+    capped at ``max_backoff_s``, with the top ``jitter`` fraction of it
+    randomized. Each attempt is cut off after ``attempt_timeout_s`` and no
+    attempt starts after ``deadline_s`` from the first one.
+
+    After ``breaker_threshold`` consecutive availability failures of a model,
+    its requests fail fast for ``breaker_reset_s`` seconds, then a single
+    trial request decides whether the circuit closes again (0 disables the
+    breaker). With ``hedge``, a non-streamed request that has not answered
+    after the ``hedge_quantile`` latency of its model and stage (once
+    ``hedge_min_samples`` latencies are known) is sent a second time and the
+    first response wins.
+    """
+    max_attempts: int = 4
+    backoff_base_s: float = 1.0
+    backoff_factor: float = 2.0
+    max_backoff_s: float = 30.0
+    jitter: float = 1.0
+    max_retry_after_s: float = 60.0
+    attempt_timeout_s: Optional[float] = None
+    deadline_s: Optional[float] = None
+    breaker_threshold: int = 5
+    breaker_reset_s: float = 30.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    # The SDK's own retries within an attempt; the policy does the retrying
+    sdk_retries: int = 0
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Wait before retrying after failed attempt number ``attempt`` (0-based)."""
+        hint = retry_after(error) if error is not None else None
+        if hint is not None:
+            # Up to 10% later, so clients given the same hint do not retry in step
+            return min(hint, self.max_retry_after_s) * (1 + 0.1 * self.jitter * random.random())
+        backoff = min(self.backoff_base_s * self.backoff_factor ** attempt, self.max_backoff_s)
+        return backoff * (1 - self.jitter * random.random())
+
+
+class CircuitBreaker:
+    """Fails requests to one model fast while it keeps failing.
+
+    Closed: requests pass and consecutive failures are counted. Open (after
+    ``threshold`` failures): requests raise ``CircuitOpenError`` until
+    ``reset_s`` have passed. Half-open: one trial request is let through; its
+    success closes the circuit and its failure opens it again.
+    """
+
+    def __init__(self, model: str, threshold: int, reset_s: float):
+        self.model = model
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_s:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        """Raise ``CircuitOpenError`` unless a request may be sent now."""
+        if self.threshold <= 0 or self.opened_at is None:
+            return
+        if self.state == "open" or self.trial_in_flight:
+            raise CircuitOpenError(
+                f"Circuit open for {self.model} after {self.failures} consecutive failures"
+            )
+        self.trial_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.threshold > 0 and self.failures >= self.threshold:
+            if self.opened_at is None:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a trial request that neither proved nor disproved the model's health."""
+        self.trial_in_flight = False
+
+
+class LatencyTracker:
+    """Recent successful attempt latencies, per model and stage."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples: Dict[Any, Deque[float]] = {}
+
+    def observe(self, key: Any, latency_s: float):
+        self.samples.setdefault(key, collections.deque(maxlen=self.window)).append(latency_s)
+
+    def quantile(self, key: Any, q: float, min_samples: int = 1) -> Optional[float]:
+        """The ``q`` quantile of the recorded latencies, or None with fewer than ``min_samples``."""
+        samples = self.samples.get(key)
+        if not samples or len(samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
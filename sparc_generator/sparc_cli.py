@@ -1,43 +1,82 @@
 #!/usr/bin/env python3
-"""SPARC Framework CLI interface."""
+"""SPARC Framework CLI interface.
+
+Heavy dependencies (``openai``, ``tiktoken``, ``rich``, ``yaml`` and the
+generator in ``core``) are imported inside the commands that need them, so
+``sparc --help`` and ``sparc list-models`` start quickly.
+"""
 import click
 import asyncio
 from pathlib import Path
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.panel import Panel
-from rich.table import Table
-from rich import print as rprint
-from dotenv import load_dotenv
 import os
 import json
 from datetime import datetime
 import logging
-from typing import Dict, Any, Optional
-from openai import AsyncOpenAI
-
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+import glob
+import time
 
-from sparc_generator.core import (
-    SPARCPromptGenerator, 
-    validate_model_config, 
-    MODEL_CONFIGS
+from sparc_generator.models import (
+    validate_model_config,
+    get_recommended_model,
+    load_usage_history,
+    learn_model_performance,
+    MODEL_CONFIGS,
+    SPARC_ARTIFACTS,
+    PIPELINE_STAGES,
+    ALL_STAGES
 )
+from sparc_generator.cache import DEFAULT_CACHE_DIR
+from sparc_generator.aggregation import DEFAULT_ANALYSIS_TOKEN_BUDGET
+from sparc_generator.metrics import get_metrics_recorder
+
+if TYPE_CHECKING:
+    from sparc_generator.cache import ResponseCache
+    from sparc_generator.transport import Transport
+
+
+class _LazyConsole:
+    """Rich console created on first use."""
+
+    def __init__(self):
+        self._console = None
+
+    def get(self):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def rprint(*objects, **kwargs):
+    """``rich.print``, imported on first use."""
+    from rich import print as rich_print
+    rich_print(*objects, **kwargs)
+
 
 # Initialize rich console
-console = Console()
+console = _LazyConsole()
 
-def load_config() -> Dict[str, Any]:
+def load_config(require_api_key: bool = True) -> Dict[str, Any]:
     """
     Load configuration from .env file.
     
+    Args:
+        require_api_key: Fail without OPENAI_API_KEY; commands that never
+            call the API pass False.
+
     Returns:
         Dict containing configuration values
     """
+    from dotenv import load_dotenv
     load_dotenv()
     
     # Get required configurations
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not api_key and require_api_key:
         raise ValueError("OPENAI_API_KEY not found in .env file")
     
     # Get model configuration
@@ -54,11 +93,14 @@ def load_config() -> Dict[str, Any]:
         "api_key": api_key,
         "model": model,
         "model_config": model_config,
-        "output_dir": os.getenv("OUTPUT_DIR", "output")
+        "output_dir": os.getenv("OUTPUT_DIR", "output"),
+        "cache_dir": os.getenv("CACHE_DIR", str(DEFAULT_CACHE_DIR))
     }
 
 def display_model_info(model: str, config: Dict[str, Any]):
     """Display model configuration information."""
+    from rich.table import Table
+
     table = Table(title="Model Configuration")
     table.add_column("Setting", style="cyan")
     table.add_column("Value", style="green")
@@ -70,67 +112,309 @@ def display_model_info(model: str, config: Dict[str, Any]):
     
     console.print(table)
 
+def display_stage_models(generator):
+    """Display the model each pipeline stage is routed to."""
+    from rich.table import Table
+
+    table = Table(title="Stage Models")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Model", style="green")
+    for stage in PIPELINE_STAGES:
+        table.add_row(stage, generator.model_for(stage))
+
+    console.print(table)
+
+def display_estimate(estimate: Dict[str, Any], max_tokens_budget: Optional[int] = None):
+    """Display a dry-run estimate of a run."""
+    from rich.table import Table
+
+    table = Table(title="Dry Run Estimate")
+    table.add_column("Stage", style="cyan", no_wrap=True)
+    table.add_column("Model", style="green")
+    table.add_column("Requests", justify="right")
+    table.add_column("Prompt", justify="right")
+    table.add_column("Response", justify="right")
+    table.add_column("Reserved", justify="right")
+    table.add_column("Cost ($)", justify="right")
+    for stage, stats in estimate["stages"].items():
+        table.add_row(stage, stats["model"], str(stats["requests"]), str(stats["prompt_tokens"]),
+                      str(stats["response_tokens"]), str(stats["reserved_tokens"]), f"{stats['cost_usd']:.4f}")
+    table.add_row("total", "", str(estimate["requests"]), str(estimate["prompt_tokens"]),
+                  str(estimate["response_tokens"]), str(estimate["reserved_tokens"]),
+                  f"{estimate['cost_usd']:.4f}", style="bold")
+    console.print(table)
+    if "normalization" in estimate:
+        console.print(
+            f"Normalized transcript: {estimate['normalization']['input_tokens']} -> "
+            f"{estimate['normalization']['output_tokens']} tokens"
+        )
+    console.print(
+        f"Chunks: {estimate['chunks']}  Total tokens: ~{estimate['total_tokens']}  "
+        f"Wall time: ~{estimate['wall_time_s']}s"
+    )
+    if max_tokens_budget and estimate["total_tokens"] > max_tokens_budget:
+        console.print(
+            f"[bold yellow]The estimate exceeds the token budget of {max_tokens_budget}; "
+            f"the run would stop before completing.[/bold yellow]"
+        )
+
+def compile_plan(project_name: str, config: Dict[str, Any], analysis: Dict[str, Any],
+                 artifacts: Dict[str, str], validation: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the development plan saved for a project."""
+    return {
+        "project_name": project_name,
+        "timestamp": datetime.now().isoformat(),
+        "model_info": {
+            "model": config["model"],
+            "config": config["model_config"]
+        },
+        "analysis": analysis,
+        "artifacts": artifacts,
+        "validation": validation
+    }
+
+def resolve_transcripts(source: str, pattern: str) -> List[Path]:
+    """Expand a directory or glob pattern into a sorted list of transcript files."""
+    source_path = Path(source)
+    if source_path.is_dir():
+        files = source_path.glob(pattern)
+    else:
+        files = (Path(match) for match in glob.glob(source, recursive=True))
+    return sorted(path for path in files if path.is_file())
+
+def parse_stage_models(ctx, param, values) -> Dict[str, str]:
+    """Click callback turning repeated STAGE=MODEL options into a dict."""
+    stage_models = {}
+    for value in values:
+        stage, sep, model = value.partition("=")
+        if not sep or not stage.strip() or not model.strip():
+            raise click.BadParameter(f"expected STAGE=MODEL, got '{value}'")
+        if stage.strip() not in PIPELINE_STAGES:
+            raise click.BadParameter(
+                f"unknown stage '{stage.strip()}' (stages: {', '.join(PIPELINE_STAGES)})"
+            )
+        stage_models[stage.strip()] = model.strip()
+    return stage_models
+
+def load_model_performance(output_dir: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Latency/cost table learned from the usage logs of past runs under ``output_dir``."""
+    return learn_model_performance(load_usage_history(Path(output_dir)))
+
+def run_traced(name: str, coro, metrics_out: Optional[str], metrics_format: Optional[str]):
+    """Run a command coroutine inside a pipeline span and export its metrics."""
+    metrics = get_metrics_recorder()
+    try:
+        with metrics.span(name, kind="pipeline"):
+            return asyncio.run(coro)
+    finally:
+        if metrics_out:
+            metrics.export(Path(metrics_out), metrics_format)
+            logging.info(f"Metrics written to {metrics_out}")
+
 @click.group()
 def cli():
     """SPARC Framework Prompt Generator CLI"""
-    pass
+    logging.basicConfig(
+        filename='sparc_generator.log',
+        filemode='a',
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
 
 @cli.command()
-@click.argument('transcript_file', type=click.Path(exists=True))
+@click.argument('transcript_file', type=click.Path(exists=True), required=False)
 @click.option('--output', '-o', default=None, help='Output directory for generated files')
 @click.option('--project-name', '-n', default=None, help='Project name for organization')
 @click.option('--simulate-chat', is_flag=True, help='Simulate chat-based development after generation')
 @click.option('--model', '-m', help='Override model specified in .env')
-def generate(transcript_file, output, project_name, simulate_chat, model):
+@click.option('--concurrency', '-c', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Maximum number of transcript chunks analyzed concurrently')
+@click.option('--chunk-overlap', type=click.IntRange(min=0), default=0, show_default=True,
+              help='Tokens shared between consecutive transcript chunks')
+@click.option('--no-cache', is_flag=True, help='Always call the model instead of reusing cached responses')
+@click.option('--cache-dir', type=click.Path(file_okay=False), default=None,
+              help='Directory for the response cache (defaults to CACHE_DIR or ~/.cache/sparc_generator)')
+@click.option('--stream', is_flag=True,
+              help='Stream artifacts and write them to disk while they are generated')
+@click.option('--resume', type=click.Path(exists=True, file_okay=False), default=None,
+              help='Resume an interrupted run from its project directory')
+@click.option('--chunking', type=click.Choice(['fixed', 'content']), default='fixed', show_default=True,
+              help='Chunk boundaries: fixed token budget, or content-defined so edited '
+                   'transcripts reuse stored chunk analyses')
+@click.option('--reduce', 'analysis_reduce', type=click.Choice(['union', 'tree']), default='union',
+              show_default=True,
+              help='Merge chunk analyses locally, or have the model condense them level by level')
+@click.option('--analysis-budget', type=click.IntRange(min=1), default=DEFAULT_ANALYSIS_TOKEN_BUDGET,
+              show_default=True, help='Token budget of the analysis JSON for --reduce tree')
+@click.option('--reduce-fan-in', type=click.IntRange(min=2), default=2, show_default=True,
+              help='Partial analyses merged per request for --reduce tree')
+@click.option('--validation', 'validation_mode', type=click.Choice(['combined', 'per-artifact']),
+              default='combined', show_default=True,
+              help='Validate all artifacts in one request, or each artifact in its own concurrent request')
+@click.option('--validation-budget', type=click.IntRange(min=1), default=None,
+              help='Prompt token budget of each per-artifact validation request')
+@click.option('--stage-model', 'stage_models', multiple=True, callback=parse_stage_models,
+              metavar='STAGE=MODEL',
+              help='Model for one pipeline stage, e.g. analysis=gpt-4o-mini; MODEL "auto" picks the '
+                   'recommended model (repeatable)')
+@click.option('--auto-route', is_flag=True,
+              help='Send every stage without --stage-model to its recommended model')
+@click.option('--attempt-timeout', type=click.FloatRange(min=0, min_open=True), default=None,
+              help='Cut off and retry a model request attempt after this many seconds')
+@click.option('--hedge', is_flag=True,
+              help='Send a duplicate of a request still running after the p95 latency of its stage; '
+                   'the first response wins')
+@click.option('--normalize/--no-normalize', default=None,
+              help='Strip timestamps, caption tags, repeated caption lines and fillers before chunking '
+                   '(configured in the normalization block of sparc_prompts.yaml). By default only '
+                   'caption files are normalized; --normalize includes plain-text transcripts')
+@click.option('--dry-run', is_flag=True,
+              help='Estimate requests, tokens, cost and wall time without calling the model')
+@click.option('--max-tokens-budget', type=click.IntRange(min=1), default=None,
+              help='Stop the run, resumably, instead of spending more than this many tokens')
+@click.option('--metrics-out', type=click.Path(dir_okay=False), default=None,
+              help='Write request metrics and spans here (.json: OTLP JSON, otherwise Prometheus text)')
+@click.option('--metrics-format', type=click.Choice(['prometheus', 'otlp']), default=None,
+              help='Override the format chosen from the --metrics-out extension')
+def generate(transcript_file, output, project_name, simulate_chat, model, concurrency, chunk_overlap,
+             no_cache, cache_dir, stream, resume, chunking, analysis_reduce, analysis_budget, reduce_fan_in,
+             validation_mode, validation_budget, stage_models, auto_route, attempt_timeout, hedge,
+             normalize, dry_run, max_tokens_budget, metrics_out, metrics_format):
     """Generate development plan from transcript."""
-    asyncio.run(_generate(transcript_file, output, project_name, simulate_chat, model))
+    if not transcript_file and not resume:
+        raise click.UsageError("TRANSCRIPT_FILE is required unless --resume is given")
+    run_traced("generate", _generate(transcript_file, output, project_name, simulate_chat, model, concurrency,
+                                     chunk_overlap, no_cache, cache_dir, stream, resume, chunking,
+                                     analysis_reduce, analysis_budget, reduce_fan_in,
+                                     validation_mode.replace('-', '_'), validation_budget,
+                                     stage_models, auto_route, attempt_timeout, hedge,
+                                     normalize, dry_run, max_tokens_budget),
+               metrics_out, metrics_format)
 
-async def _generate(transcript_file: str, output: Optional[str], project_name: Optional[str], 
-                   simulate_chat: bool, model_override: Optional[str]):
+async def _generate(transcript_file: Optional[str], output: Optional[str], project_name: Optional[str], 
+                   simulate_chat: bool, model_override: Optional[str], concurrency: int = 1,
+                   chunk_overlap: int = 0, no_cache: bool = False, cache_dir: Optional[str] = None,
+                   stream: bool = False, resume: Optional[str] = None, chunking: str = "fixed",
+                   analysis_reduce: str = "union", analysis_budget: int = DEFAULT_ANALYSIS_TOKEN_BUDGET,
+                   reduce_fan_in: int = 2, validation_mode: str = "combined",
+                   validation_budget: Optional[int] = None,
+                   stage_models: Optional[Dict[str, str]] = None, auto_route: bool = False,
+                   attempt_timeout: Optional[float] = None, hedge: bool = False,
+                   normalize: Optional[bool] = None, dry_run: bool = False,
+                   max_tokens_budget: Optional[int] = None):
     """Async logic for the generate command."""
+    from rich.panel import Panel
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from sparc_generator.core import SPARCPromptGenerator
+    from sparc_generator.cache import ResponseCache, ChunkAnalysisStore
+    from sparc_generator.checkpoint import PipelineCheckpoint
+    from sparc_generator.transport import get_transport, retry_policy_from_env
+    from sparc_generator.usage import TokenBudgetExceeded
+
+    cache = None
+    analysis_store = None
+    generator = None
+    checkpoint = None
     try:
-        # Load configuration
-        config = load_config()
+        # Load configuration; a dry run never calls the API
+        config = load_config(require_api_key=not dry_run)
+
+        # Load or start the checkpoint; a resumed run keeps its model and transcript
+        if resume:
+            checkpoint = PipelineCheckpoint.load(Path(resume))
+            output_dir = Path(resume)
+            project_name = output_dir.name
+            transcript_file = transcript_file or checkpoint.data["transcript_file"]
+            if not model_override and checkpoint.data["model"]:
+                model_override = checkpoint.data["model"]
+            console.print(
+                f"[bold blue]Resuming {project_name} from stage: "
+                f"{checkpoint.next_stage(SPARC_ARTIFACTS)}[/bold blue]"
+            )
+            if checkpoint.stopped:
+                console.print(f"[blue]Previous run stopped: {checkpoint.stopped['reason']}[/blue]")
+            checkpoint.record_stop(None)
+        else:
+            if not project_name:
+                project_name = f"sparc_project_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            output_dir = Path(output or config["output_dir"]) / project_name
+            checkpoint = PipelineCheckpoint(output_dir)
 
         # Override model if specified
         if model_override:
             config["model"] = model_override
             config["model_config"] = validate_model_config(model_override)
 
+        checkpoint.data["transcript_file"] = str(Path(transcript_file).resolve()) if transcript_file else None
+        checkpoint.data["model"] = config["model"]
+
         # Display configuration
         console.print("\n[bold cyan]Configuration[/bold cyan]")
         display_model_info(config["model"], config["model_config"])
 
-        if not project_name:
-            project_name = f"sparc_project_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if not no_cache and not dry_run:
+            cache = ResponseCache(Path(cache_dir or config["cache_dir"]))
+            analysis_store = ChunkAnalysisStore(Path(cache_dir or config["cache_dir"]))
 
-        output_dir = Path(output or config["output_dir"]) / project_name
-
-        # Initialize AsyncOpenAI client
+        # Initialize the generator; requests go through the shared pooled client
+        transport = get_transport(
+            config["api_key"] or "dry-run",
+            retry_policy=retry_policy_from_env(attempt_timeout_s=attempt_timeout, hedge=hedge or None)
+        )
         generator = SPARCPromptGenerator(
             api_key=config["api_key"],
+            transport=transport,
             model=config["model"],
-            model_config=config["model_config"]
+            model_config=config["model_config"],
+            max_concurrency=concurrency,
+            chunk_overlap_tokens=chunk_overlap,
+            cache=cache,
+            stream=stream,
+            stream_dir=output_dir,
+            checkpoint=checkpoint,
+            chunking=chunking,
+            analysis_store=analysis_store,
+            analysis_reduce=analysis_reduce,
+            analysis_token_budget=analysis_budget,
+            reduce_fan_in=reduce_fan_in,
+            validation_mode=validation_mode,
+            validation_token_budget=validation_budget,
+            stage_models=stage_models,
+            auto_route=auto_route,
+            model_performance=load_model_performance(config["output_dir"]),
+            usage_log_path=None if dry_run else output_dir / "usage_log.jsonl",
+            max_tokens_budget=max_tokens_budget,
+            normalize=normalize
         )
+        if generator.stage_models:
+            display_stage_models(generator)
 
-        # Read transcript
-        with console.status("[bold green]Reading transcript..."):
-            try:
-                with open(transcript_file) as f:
-                    transcript = f.read()
-            except Exception as e:
-                console.print(f"[bold red]Error reading transcript file: {e}[/bold red]")
-                return
+        # Read transcript (not needed once the analysis is checkpointed)
+        transcript = None
+        if checkpoint.analysis is None:
+            with console.status("[bold green]Reading transcript..."):
+                try:
+                    transcript = generator.read_transcript(Path(transcript_file))
+                except Exception as e:
+                    console.print(f"[bold red]Error reading transcript file: {e}[/bold red]")
+                    return
+
+        if dry_run:
+            display_estimate(generator.estimate_run(transcript, chat_simulation=simulate_chat), max_tokens_budget)
+            return
 
         # Process transcript with progress tracking
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            console=console,
+            console=console.get(),
         ) as progress:
             # Analyze Transcript
             task1 = progress.add_task("[cyan]Analyzing transcript...", total=1)
-            analysis = await generator.analyze_transcript(transcript)
+            if checkpoint.analysis is not None:
+                analysis = checkpoint.analysis
+            else:
+                analysis = await generator.analyze_transcript(transcript)
             if "error" in analysis:
                 progress.update(task1, description="[bold red]Analysis Failed[/bold red]", completed=1)
                 console.print(f"[bold red]Error in analysis: {analysis['error']}[/bold red]")
@@ -138,15 +422,28 @@ async def _generate(transcript_file: str, output: Optional[str], project_name: O
                     console.print(f"[italic red]Raw Response:[/italic red] {analysis['raw_response']}")
                 return
             progress.update(task1, completed=1)
+            if generator.chunk_stats["reused"]:
+                console.print(
+                    f"[cyan]Chunks reused: {generator.chunk_stats['reused']}, "
+                    f"recomputed: {generator.chunk_stats['recomputed']}[/cyan]"
+                )
 
             # Generate SPARC Artifacts
             task2 = progress.add_task("[green]Generating SPARC artifacts...", total=1)
+            if stream:
+                generator.stream_callback = lambda name, tokens: progress.update(
+                    task2, description=f"[green]Generating SPARC artifacts... {name} (~{tokens} tokens)"
+                )
             artifacts = await generator.generate_sparc_artifacts(analysis)
-            progress.update(task2, completed=1)
+            generator.stream_callback = None
+            progress.update(task2, description="[green]Generating SPARC artifacts...", completed=1)
 
             # Validate Artifacts
             task3 = progress.add_task("[yellow]Validating outputs...", total=1)
-            validation = await generator.validate_artifacts(artifacts, analysis)
+            if checkpoint.validation is not None:
+                validation = checkpoint.validation
+            else:
+                validation = await generator.validate_artifacts(artifacts, analysis)
             if "error" in validation:
                 progress.update(task3, description="[bold red]Validation Failed[/bold red]", completed=1)
                 console.print(f"[bold red]Error in validation: {validation['error']}[/bold red]")
@@ -156,22 +453,15 @@ async def _generate(transcript_file: str, output: Optional[str], project_name: O
             progress.update(task3, completed=1)
 
         # Compile plan
-        plan = {
-            "project_name": project_name,
-            "timestamp": datetime.now().isoformat(),
-            "model_info": {
-                "model": config["model"],
-                "config": config["model_config"]
-            },
-            "analysis": analysis,
-            "artifacts": artifacts,
-            "validation": validation
-        }
+        plan = compile_plan(project_name, config, analysis, artifacts, validation)
     
         # Save results
         with console.status("[bold green]Saving results..."):
             try:
                 generator.save_development_plan(plan, output_dir)
+                checkpoint.data["completed"] = True
+                checkpoint.record_usage(generator.usage_log, generator.total_tokens)
+                checkpoint.save()
             except Exception as e:
                 console.print(f"[bold red]Error saving development plan: {e}[/bold red]")
                 logging.error(f"Error saving development plan: {e}")
@@ -231,15 +521,251 @@ Implementation Ready: {validation.get('overall_assessment', {}).get('ready_for_i
             else:
                 console.print("[bold yellow]Chat simulation skipped due to validation issues.[/bold yellow]")
 
+    except TokenBudgetExceeded as e:
+        # Finished work is already checkpointed; record where the run stopped
+        stage = "chat_simulation" if checkpoint.data["completed"] else checkpoint.next_stage(SPARC_ARTIFACTS)
+        checkpoint.record_stop(str(e), stage)
+        checkpoint.record_usage(generator.usage_log, generator.total_tokens)
+        checkpoint.save()
+        logging.warning(f"Stopped at stage {stage}: {str(e)}")
+        console.print(f"\n[bold yellow]Stopped at stage {stage}: {str(e)}[/bold yellow]")
+        console.print(
+            f"Resume with a larger budget: sparc generate --resume {checkpoint.project_dir} "
+            f"--max-tokens-budget N"
+        )
     except Exception as e:
         console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
         logging.error(f"Error in generate command: {str(e)}")
         raise
+    finally:
+        if generator is not None:
+            generator.usage.close()
+            await generator.transport.close()
+        if cache is not None:
+            cache.close()
+        if analysis_store is not None:
+            analysis_store.close()
+
+@cli.command()
+@click.argument('source')
+@click.option('--output', '-o', default=None, help='Output directory for the generated projects')
+@click.option('--pattern', '-p', default='*.txt', show_default=True,
+              help='File pattern used when SOURCE is a directory, e.g. "*.srt" for caption files')
+@click.option('--model', '-m', help='Override model specified in .env')
+@click.option('--concurrency', '-c', type=click.IntRange(min=1), default=4, show_default=True,
+              help='Maximum number of model requests in flight across all transcripts')
+@click.option('--no-cache', is_flag=True, help='Always call the model instead of reusing cached responses')
+@click.option('--cache-dir', type=click.Path(file_okay=False), default=None,
+              help='Directory for the response cache (defaults to CACHE_DIR or ~/.cache/sparc_generator)')
+@click.option('--stage-model', 'stage_models', multiple=True, callback=parse_stage_models,
+              metavar='STAGE=MODEL',
+              help='Model for one pipeline stage, e.g. analysis=gpt-4o-mini; MODEL "auto" picks the '
+                   'recommended model (repeatable)')
+@click.option('--auto-route', is_flag=True,
+              help='Send every stage without --stage-model to its recommended model')
+@click.option('--attempt-timeout', type=click.FloatRange(min=0, min_open=True), default=None,
+              help='Cut off and retry a model request attempt after this many seconds')
+@click.option('--hedge', is_flag=True,
+              help='Send a duplicate of a request still running after the p95 latency of its stage; '
+                   'the first response wins')
+@click.option('--normalize/--no-normalize', default=None,
+              help='Strip timestamps, caption tags, repeated caption lines and fillers before chunking. '
+                   'By default only caption files are normalized; --normalize includes plain-text transcripts')
+@click.option('--metrics-out', type=click.Path(dir_okay=False), default=None,
+              help='Write request metrics and spans here (.json: OTLP JSON, otherwise Prometheus text)')
+@click.option('--metrics-format', type=click.Choice(['prometheus', 'otlp']), default=None,
+              help='Override the format chosen from the --metrics-out extension')
+def batch(source, output, pattern, model, concurrency, no_cache, cache_dir, stage_models, auto_route,
+          attempt_timeout, hedge, normalize, metrics_out, metrics_format):
+    """Generate development plans for a directory or glob of transcripts."""
+    run_traced("batch", _batch(source, output, pattern, model, concurrency, no_cache, cache_dir,
+                               stage_models, auto_route, attempt_timeout, hedge, normalize),
+               metrics_out, metrics_format)
+
+async def _process_batch_file(transcript_file: Path, project_name: str, output_root: Path,
+                              config: Dict[str, Any], transport: "Transport",
+                              request_semaphore: asyncio.Semaphore, concurrency: int,
+                              cache: Optional["ResponseCache"]) -> Dict[str, Any]:
+    """Run one transcript through the pipeline, isolating any failure to this file."""
+    from sparc_generator.core import SPARCPromptGenerator
+
+    start = time.perf_counter()
+    result = {
+        "transcript": str(transcript_file),
+        "project_name": project_name,
+        "output_dir": str(output_root / project_name),
+        "status": "failed",
+        "error": None,
+        "total_tokens": 0,
+        "wall_time_s": 0.0,
+        "ready_for_implementation": False
+    }
+    generator = None
+    try:
+        generator = SPARCPromptGenerator(
+            api_key=config["api_key"],
+            model=config["model"],
+            model_config=config["model_config"],
+            max_concurrency=concurrency,
+            cache=cache,
+            transport=transport,
+            request_semaphore=request_semaphore,
+            stage_models=config["stage_models"],
+            auto_route=config["auto_route"],
+            model_performance=config["model_performance"],
+            usage_log_path=output_root / project_name / "usage_log.jsonl",
+            normalize=config["normalize"]
+        )
+
+        transcript = generator.read_transcript(transcript_file)
+
+        analysis = await generator.analyze_transcript(transcript)
+        if "error" in analysis:
+            raise RuntimeError(f"Error in analysis: {analysis['error']}")
+
+        artifacts = await generator.generate_sparc_artifacts(analysis)
+
+        validation = await generator.validate_artifacts(artifacts, analysis)
+        if "error" in validation:
+            raise RuntimeError(f"Error in validation: {validation['error']}")
+
+        plan = compile_plan(project_name, config, analysis, artifacts, validation)
+        generator.save_development_plan(plan, output_root / project_name)
+
+        result["status"] = "success"
+        result["ready_for_implementation"] = validation.get(
+            "overall_assessment", {}
+        ).get("ready_for_implementation", False)
+    except Exception as e:
+        result["error"] = str(e)
+        logging.error(f"Batch: failed to process {transcript_file}: {str(e)}")
+    finally:
+        if generator is not None:
+            result["total_tokens"] = generator.total_tokens
+            generator.usage.close()
+        result["wall_time_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+async def _batch(source: str, output: Optional[str], pattern: str, model_override: Optional[str],
+                 concurrency: int, no_cache: bool, cache_dir: Optional[str],
+                 stage_models: Optional[Dict[str, str]] = None, auto_route: bool = False,
+                 attempt_timeout: Optional[float] = None, hedge: bool = False,
+                 normalize: Optional[bool] = None):
+    """Async logic for the batch command."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+    from sparc_generator.cache import ResponseCache
+    from sparc_generator.transport import get_transport, retry_policy_from_env
+
+    files = resolve_transcripts(source, pattern)
+    if not files:
+        console.print(f"[bold red]No transcripts found for {source}[/bold red]")
+        return
+
+    config = load_config()
+    if model_override:
+        config["model"] = model_override
+        config["model_config"] = validate_model_config(model_override)
+    # Every transcript routes its stages the same way
+    config["stage_models"] = stage_models
+    config["auto_route"] = auto_route
+    config["model_performance"] = load_model_performance(config["output_dir"])
+    config["normalize"] = normalize
+
+    console.print("\n[bold cyan]Configuration[/bold cyan]")
+    display_model_info(config["model"], config["model_config"])
+
+    output_root = Path(output or config["output_dir"])
+    output_root.mkdir(parents=True, exist_ok=True)
+    batch_start = time.perf_counter()
+    started_at = datetime.now()
+
+    # One pooled client, one cache and one request cap shared by every transcript
+    transport = get_transport(
+        config["api_key"],
+        retry_policy=retry_policy_from_env(attempt_timeout_s=attempt_timeout, hedge=hedge or None)
+    )
+    cache = None if no_cache else ResponseCache(Path(cache_dir or config["cache_dir"]))
+    request_semaphore = asyncio.Semaphore(concurrency)
+    # Limit the transcripts held in memory to the number that can make progress
+    file_semaphore = asyncio.Semaphore(concurrency)
+
+    # Project names follow the file stem, suffixed when two files share a stem
+    project_names = []
+    seen = {}
+    for path in files:
+        count = seen.get(path.stem, 0)
+        seen[path.stem] = count + 1
+        project_names.append(path.stem if count == 0 else f"{path.stem}_{count + 1}")
+
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("{task.completed}/{task.total}"),
+            console=console.get(),
+        ) as progress:
+            task = progress.add_task(f"[cyan]Processing {len(files)} transcripts...", total=len(files))
+
+            async def run_one(path: Path, project_name: str) -> Dict[str, Any]:
+                async with file_semaphore:
+                    with get_metrics_recorder().span(project_name, kind="transcript", file=str(path)):
+                        result = await _process_batch_file(
+                            path, project_name, output_root, config, transport,
+                            request_semaphore, concurrency, cache
+                        )
+                progress.advance(task)
+                return result
+
+            results = await asyncio.gather(*(
+                run_one(path, name) for path, name in zip(files, project_names)
+            ))
+    finally:
+        await transport.close()
+        cache_stats = cache.stats() if cache is not None else None
+        if cache is not None:
+            cache.close()
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    summary = {
+        "source": source,
+        "model": config["model"],
+        "started_at": started_at.isoformat(),
+        "concurrency": concurrency,
+        "files": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "total_tokens": sum(r["total_tokens"] for r in results),
+        "wall_time_s": round(time.perf_counter() - batch_start, 3),
+        "results": results
+    }
+    if cache_stats is not None:
+        summary["cache"] = cache_stats
+
+    summary_path = output_root / f"batch_summary_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+    table = Table(title="Batch Results")
+    table.add_column("Transcript", style="cyan")
+    table.add_column("Status")
+    table.add_column("Tokens", style="green", justify="right")
+    table.add_column("Wall Time (s)", style="blue", justify="right")
+    for r in results:
+        status = "[green]success[/green]" if r["status"] == "success" else f"[red]failed[/red] {r['error']}"
+        table.add_row(Path(r["transcript"]).name, status, str(r["total_tokens"]), f"{r['wall_time_s']:.1f}")
+    console.print(table)
+
+    rprint(f"\n[bold]{succeeded}/{len(results)} transcripts succeeded "
+           f"in {summary['wall_time_s']:.1f}s ({summary['total_tokens']} tokens)[/bold]")
+    rprint(f"[bold green]Batch summary saved to {summary_path}[/bold green]")
 
 @cli.command()
 def list_models():
     """List available models and their configurations."""
     try:
+        from rich.table import Table
+
         config = load_config()
         
         table = Table(title="Available Models")
@@ -265,5 +791,45 @@ def list_models():
     except Exception as e:
         console.print(f"[bold red]Error: {str(e)}[/bold red]")
 
+@cli.command()
+@click.option('--task', '-t', 'task_type', default=None,
+              help='Pipeline stage or task type (e.g. analysis, coding); every stage if omitted')
+@click.option('--require', '-r', 'requirements', multiple=True,
+              help='Capability the model must have, e.g. structured_output (repeatable)')
+@click.option('--history', type=click.Path(file_okay=False), default=None,
+              help='Directory searched for usage_log.json files of past runs (defaults to OUTPUT_DIR)')
+def recommend_model(task_type, requirements, history):
+    """Recommend models from capabilities and the latency/cost of past runs."""
+    from dotenv import load_dotenv
+    from rich.table import Table
+
+    load_dotenv()
+    history = history or os.getenv("OUTPUT_DIR", "output")
+    performance = load_model_performance(history)
+
+    table = Table(title="Recommended Models")
+    table.add_column("Task", style="cyan")
+    table.add_column("Model", style="green")
+    table.add_column("Avg Latency", style="blue")
+    table.add_column("Avg Cost", style="yellow")
+    table.add_column("Requests", style="magenta")
+
+    for task in ([task_type] if task_type else PIPELINE_STAGES):
+        model = get_recommended_model(task, list(requirements), performance)
+        if model is None:
+            table.add_row(task, "[red]none with the required capabilities[/red]", "-", "-", "-")
+            continue
+        stages = performance.get(model, {})
+        stats = stages.get(task) or stages.get(ALL_STAGES)
+        if stats:
+            table.add_row(task, model, f"{stats['latency_s']:.2f}s", f"${stats['cost_usd']:.4f}",
+                          str(stats["requests"]))
+        else:
+            table.add_row(task, model, "-", "-", "0")
+
+    console.print(table)
+    recorded = sum(stages[ALL_STAGES]["requests"] for stages in performance.values())
+    console.print(f"Learned from {recorded} recorded requests under {history}")
+
 if __name__ == '__main__':
     cli()
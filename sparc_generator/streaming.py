@@ -0,0 +1,100 @@
+"""Streaming chat completion helpers."""
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+class StreamWriter:
+    """Write streamed response text to a file as it arrives.
+
+    ``begin`` truncates the file, so a retried request starts over cleanly.
+    ``on_progress`` is called with the number of content deltas received so
+    far, which is close to the number of generated tokens.
+    """
+
+    def __init__(self, path: Optional[Path] = None, on_progress: Optional[Callable[[int], None]] = None):
+        self.path = Path(path) if path else None
+        self.on_progress = on_progress
+        self.deltas = 0
+        self._file = None
+
+    def begin(self):
+        self.close()
+        self.deltas = 0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w")
+
+    def write(self, text: str):
+        self.deltas += 1
+        if self._file is not None:
+            self._file.write(text)
+            self._file.flush()
+        if self.on_progress is not None:
+            self.on_progress(self.deltas)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def consume_stream(stream, writer: StreamWriter, started: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Drain a ``stream=True`` chat completion into ``writer``.
+
+    Args:
+        stream: Async iterator of ``ChatCompletionChunk`` objects.
+        writer: Destination for content deltas.
+        started: ``time.perf_counter()`` value taken when the request was sent.
+
+    Returns:
+        A ``ChatCompletion``-shaped payload of the full response and timing
+        statistics (time to first token, duration, tokens per second).
+    """
+    parts = []
+    first_token_at = None
+    completion_id = None
+    created = int(time.time())
+    model = None
+    finish_reason = None
+    usage = None
+
+    async for chunk in stream:
+        completion_id = completion_id or chunk.id
+        created = chunk.created or created
+        model = model or chunk.model
+        if chunk.usage is not None:
+            usage = chunk.usage.model_dump()
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+        text = choice.delta.content if choice.delta else None
+        if text:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(text)
+            writer.write(text)
+
+    finished = time.perf_counter()
+    completion_tokens = usage["completion_tokens"] if usage else writer.deltas
+    generation_time = finished - (first_token_at or finished)
+    stats = {
+        "time_to_first_token_s": round((first_token_at or finished) - started, 3),
+        "duration_s": round(finished - started, 3),
+        "tokens_per_second": round(completion_tokens / generation_time, 2) if generation_time > 0 else 0.0
+    }
+    payload = {
+        "id": completion_id or f"chatcmpl-stream-{int(started * 1e6)}",
+        "object": "chat.completion",
+        "created": created,
+        "model": model or "",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(parts)},
+            "finish_reason": finish_reason or "stop"
+        }],
+        "usage": usage
+    }
+    return payload, stats
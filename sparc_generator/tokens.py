@@ -0,0 +1,51 @@
+"""Memoized token counting."""
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class TokenCounter:
+    """Count tokens with a ``tiktoken`` encoding, remembering recent results.
+
+    Results are keyed by a BLAKE2 digest of the text rather than the text
+    itself, so the cache does not keep large prompts alive. Hashing is far
+    cheaper than BPE encoding, which makes repeated counts of reused
+    components (prompt templates, artifacts, the analysis JSON) nearly free.
+    """
+
+    def __init__(self, tokenizer, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in ``text``."""
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        cached = self._counts.get(key)
+        if cached is not None:
+            self._counts.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        count = len(self.tokenizer.encode(text))
+        self.misses += 1
+        self._store(key, count)
+        return count
+
+    def remember(self, text: str, count: int):
+        """Record a count obtained elsewhere, e.g. provider-reported usage."""
+        self._store(hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), count)
+
+    def _store(self, key: bytes, count: int):
+        self._counts[key] = count
+        self._counts.move_to_end(key)
+        if len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return memo hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._counts)}
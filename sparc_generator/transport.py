@@ -0,0 +1,459 @@
+"""Shared transport for model requests.
+
+Both generators send chat completions through a ``Transport``: one pooled,
+keep-alive ``AsyncOpenAI`` client per endpoint, the retry, circuit breaker
+and hedging policy of ``retry.RetryPolicy``, rate limiting, usage accounting
+and request metrics.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+from openai.types.chat import ChatCompletion
+
+from .metrics import MetricsRecorder, get_metrics_recorder, status_of
+from .rate_limit import RateLimiter
+from .retry import (
+    RetryPolicy,
+    CircuitBreaker,
+    LatencyTracker,
+    AttemptTimeoutError,
+    is_retryable,
+    is_availability_failure
+)
+from .streaming import StreamWriter, consume_stream
+from .usage import TokenBudget
+
+# Connection pool and timeout defaults; overridden by HTTP_POOL_SIZE,
+# HTTP_TIMEOUT and HTTP_CONNECT_TIMEOUT
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT_S = 120.0
+DEFAULT_CONNECT_TIMEOUT_S = 10.0
+KEEPALIVE_EXPIRY_S = 30.0
+
+# The HTTP library the installed openai SDK is built on (httpx, or httpx2 in
+# newer releases); connection limits must be built with the same one
+_HTTP = sys.modules[DefaultAsyncHttpxClient.__bases__[0].__module__.split(".")[0]]
+
+
+
+def _env_number(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def retry_policy_from_env(**overrides) -> RetryPolicy:
+    """Default retry policy with HTTP_MAX_ATTEMPTS, HTTP_ATTEMPT_TIMEOUT,
+    HTTP_DEADLINE and HTTP_HEDGE applied, then ``overrides`` that are not None.
+    """
+    settings = {
+        "max_attempts": int(_env_number("HTTP_MAX_ATTEMPTS", RetryPolicy.max_attempts)),
+        "attempt_timeout_s": _env_number("HTTP_ATTEMPT_TIMEOUT", None),
+        "deadline_s": _env_number("HTTP_DEADLINE", None),
+        "hedge": os.getenv("HTTP_HEDGE", "").lower() in ("1", "true", "yes"),
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return RetryPolicy(**settings)
+
+
+class Transport:
+    """Pooled chat completion client shared between generators.
+
+    The underlying client is created on first use in each event loop, since
+    pooled connections cannot outlive the loop they were opened in (the CLI
+    runs one ``asyncio.run`` per command). A client passed in is used as is.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        client: Optional[AsyncOpenAI] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.pool_size = int(pool_size or _env_number("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.timeout = timeout or _env_number("HTTP_TIMEOUT", DEFAULT_TIMEOUT_S)
+        self.connect_timeout = connect_timeout or _env_number("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT_S)
+        self.retry_policy = retry_policy or retry_policy_from_env()
+        self.metrics = metrics or get_metrics_recorder()
+
+        self._client = client
+        self._owns_client = client is None
+        self._loop = None
+        self.clients_created = 0
+
+        # Usage accounting per model; latency, streaming stats and the
+        # estimated prompt tokens of a cancelled hedge per response id
+        self.usage: Dict[str, Dict[str, int]] = {}
+        self.latencies: Dict[str, float] = {}
+        self.stream_stats: Dict[str, Dict[str, Any]] = {}
+        self.hedge_tokens: Dict[str, int] = {}
+
+        # Circuit breaker per model, attempt latencies for hedging
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.attempt_latencies = LatencyTracker()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The client for the running event loop."""
+        if not self._owns_client:
+            return self._client
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._client is None or self._loop is not loop:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=self.retry_policy.sdk_retries,
+                timeout=Timeout(self.timeout, connect=self.connect_timeout),
+                http_client=DefaultAsyncHttpxClient(limits=_HTTP.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_S,
+                )),
+            )
+            self._loop = loop
+            self.clients_created += 1
+        return self._client
+
+    async def close(self):
+        """Close the client and its pooled connections."""
+        if self._client is not None:
+            await self._client.close()
+            if self._owns_client:
+                self._client = None
+
+    def _account(self, model: str, usage: Any = None, failed: bool = False, prompt_tokens: int = 0):
+        entry = self.usage.setdefault(
+            model, {"requests": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        entry["requests"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        if failed:
+            entry["failed"] += 1
+        if usage is not None:
+            entry["prompt_tokens"] += usage.prompt_tokens or 0
+            entry["completion_tokens"] += usage.completion_tokens or 0
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """The circuit breaker of a model."""
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(
+                model, self.retry_policy.breaker_threshold, self.retry_policy.breaker_reset_s
+            )
+        return self.breakers[model]
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool settings, retry policy counters and usage per model, for reporting."""
+        return {
+            "pool_size": self.pool_size,
+            "timeout_s": self.timeout,
+            "max_attempts": self.retry_policy.max_attempts,
+            "clients_created": self.clients_created,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "circuits_opened": {
+                model: breaker.times_opened for model, breaker in self.breakers.items() if breaker.times_opened
+            },
+            "usage": {model: dict(entry) for model, entry in self.usage.items()},
+        }
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int,
+        request_tokens: int = 0,
+        rate_limiter: Optional[RateLimiter] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        stream_writer: Optional[StreamWriter] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        max_attempts: Optional[int] = None,
+        token_budget: Optional[TokenBudget] = None,
+        **params
+    ) -> ChatCompletion:
+        """Send a chat completion request under the transport's retry policy.
+
+        Every attempt first waits for ``request_tokens`` of ``rate_limiter``
+        capacity and for ``semaphore``, and is refused while the model's
+        circuit is open. Retryable failures are retried with jittered backoff
+        or the server's ``Retry-After``; fatal ones are raised at once. With a
+        ``stream_writer`` the response is streamed into it (and never hedged);
+        the return value is still a complete ``ChatCompletion`` and its
+        streaming stats are kept in ``stream_stats`` under the response id,
+        like its latency in ``latencies``. Every call is traced as a request
+        span and recorded in ``metrics``.
+
+        A hedge is a request of its own. It is sent only if ``request_tokens``
+        fit in ``token_budget``, and when the attempt succeeds after both
+        requests were sent, the cancelled one is recorded in the usage and
+        ``metrics`` (status "hedge_cancelled") and charged to the budget with
+        its estimated prompt tokens; they are kept in ``hedge_tokens`` under
+        the response id for the caller's usage log. Output the provider
+        generated before the cancellation is not known and not counted.
+        """
+        metrics = metrics or self.metrics
+        policy = self.retry_policy
+        max_attempts = max_attempts or policy.max_attempts
+        breaker = self.breaker(model)
+        latency_key = (model, metrics.current_stage())
+        deadline = time.monotonic() + policy.deadline_s if policy.deadline_s else None
+        request = (model, messages, temperature, max_tokens, stream_writer, params)
+        with metrics.span("request", kind="request", model=model) as span:
+            # Latency covers every attempt, backoff included, but not rate-limit
+            # or semaphore waits
+            latency = 0.0
+            for attempt in range(max_attempts):
+                timing: Dict[str, float] = {}
+                allowed = False
+                try:
+                    breaker.allow()
+                    allowed = True
+                    if rate_limiter is not None:
+                        await rate_limiter.acquire(request_tokens)
+                    timeout = policy.attempt_timeout_s
+                    if deadline is not None:
+                        remaining = max(deadline - time.monotonic(), 0.001)
+                        timeout = min(timeout, remaining) if timeout else remaining
+                    hedge_after = None
+                    if policy.hedge and stream_writer is None:
+                        hedge_after = self.attempt_latencies.quantile(
+                            latency_key, policy.hedge_quantile, policy.hedge_min_samples
+                        )
+                    response, elapsed, hedged, cancelled = await self._attempt(
+                        request, semaphore, timeout, hedge_after, timing, rate_limiter, request_tokens,
+                        token_budget
+                    )
+                    latency += time.perf_counter() - timing["started"]
+                except asyncio.CancelledError:
+                    # A cancelled half-open trial must not keep the circuit shut
+                    if allowed:
+                        breaker.release()
+                    raise
+                except Exception as e:
+                    if "started" in timing:
+                        latency += time.perf_counter() - timing["started"]
+                    if is_availability_failure(e):
+                        breaker.record_failure()
+                    elif allowed:
+                        breaker.release()
+                    wait_time = policy.delay(attempt, e)
+                    out_of_time = deadline is not None and time.monotonic() + wait_time >= deadline
+                    if not is_retryable(e) or attempt == max_attempts - 1 or out_of_time:
+                        span.attributes.update({"retries": attempt, "http.status_code": status_of(e)})
+                        metrics.record_request(model, latency, status_of(e), retries=attempt)
+                        self._account(model, failed=True)
+                        raise
+                    self.retries += 1
+                    logging.warning(f"Attempt {attempt + 1} failed: {str(e)}. Waiting {wait_time:.2f}s...")
+                    await asyncio.sleep(wait_time)
+                    latency += wait_time
+                    continue
+
+                breaker.record_success()
+                self.attempt_latencies.observe(latency_key, elapsed)
+                usage = response.usage
+                span.attributes.update({"retries": attempt, "http.status_code": "200"})
+                if hedged:
+                    span.attributes["hedged"] = True
+                metrics.record_request(
+                    model, latency, "200", retries=attempt,
+                    prompt_tokens=usage.prompt_tokens if usage else None,
+                    completion_tokens=usage.completion_tokens if usage else None
+                )
+                self._account(model, usage)
+                if cancelled is not None:
+                    metrics.record_request(model, cancelled["latency_s"], "hedge_cancelled",
+                                           prompt_tokens=cancelled["prompt_tokens"])
+                    self._account(model, prompt_tokens=cancelled["prompt_tokens"])
+                    self.hedge_tokens[response.id] = cancelled["prompt_tokens"]
+                self.latencies[response.id] = latency
+                return response
+
+    async def _attempt(
+        self,
+        request: Tuple,
+        semaphore: Optional[asyncio.Semaphore],
+        timeout: Optional[float],
+        hedge_after: Optional[float],
+        timing: Dict[str, float],
+        rate_limiter: Optional[RateLimiter],
+        request_tokens: int,
+        token_budget: Optional[TokenBudget] = None
+    ) -> Tuple[ChatCompletion, float, bool, Optional[Dict[str, float]]]:
+        """One attempt, hedged with a duplicate request after ``hedge_after`` seconds.
+
+        Returns the first successful response, its own latency, whether a
+        hedge was sent and, if both requests were sent, the estimated prompt
+        tokens and latency of the cancelled one. ``timing["started"]`` is set
+        when the first request is sent, and ``hedge_after`` counts from then.
+        """
+        if hedge_after is None:
+            response, elapsed = await self._timed_send(request, semaphore, timeout, timing)
+            return response, elapsed, False, None
+
+        # The hedge delay runs from when the primary request is sent, not
+        # from when it started waiting for a semaphore slot
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._timed_send(request, semaphore, timeout, timing, sent))
+        waiting = asyncio.ensure_future(sent.wait())
+        await asyncio.wait({primary, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        waiting.cancel()
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if not done and token_budget is not None and not token_budget.try_reserve(request_tokens):
+            logging.info(f"Not hedging request to {request[0]}: no room left in the token budget")
+            done, _ = await asyncio.wait({primary})
+        if done:
+            response, elapsed = primary.result()
+            return response, elapsed, False, None
+
+        backup_timing: Dict[str, float] = {}
+
+        async def hedge() -> Tuple[ChatCompletion, float]:
+            acquired = False
+            try:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire(request_tokens)
+                    acquired = True
+                return await self._timed_send(request, semaphore, timeout, backup_timing)
+            finally:
+                if acquired and "started" not in backup_timing:
+                    rate_limiter.release(request_tokens)
+
+        self.hedges += 1
+        logging.info(f"Hedging request to {request[0]} after {hedge_after:.2f}s without a response")
+        backup = asyncio.ensure_future(hedge())
+        pending = {primary, backup}
+        winner = None
+        cancelled = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+            loser_timing = timing if winner is backup else backup_timing
+            if winner is not None and "started" in loser_timing:
+                cancelled = {
+                    "prompt_tokens": max(request_tokens - request[3], 0),
+                    "latency_s": time.perf_counter() - loser_timing["started"]
+                }
+        finally:
+            primary.cancel()
+            backup.cancel()
+            if token_budget is not None:
+                token_budget.settle(request_tokens, cancelled["prompt_tokens"] if cancelled else 0)
+        if winner is None:
+            # Both failed; report the original request's error
+            raise primary.exception()
+        if winner is backup:
+            self.hedge_wins += 1
+        response, elapsed = winner.result()
+        return response, elapsed, True, cancelled
+
+    async def _timed_send(
+        self,
+        request: Tuple,
+        semaphore: Optional[asyncio.Semaphore],
+        timeout: Optional[float],
+        timing: Dict[str, float],
+        sent: Optional[asyncio.Event] = None
+    ) -> Tuple[ChatCompletion, float]:
+        """Send a request once a ``semaphore`` slot is free, cut off after ``timeout``.
+
+        Returns the response and its latency; ``sent`` is set when it is sent.
+        """
+        if semaphore is not None:
+            async with semaphore:
+                return await self._timed_send(request, None, timeout, timing, sent)
+
+        started = time.perf_counter()
+        timing.setdefault("started", started)
+        if sent is not None:
+            sent.set()
+        if timeout is None:
+            response = await self._send(*request)
+        else:
+            try:
+                response = await asyncio.wait_for(self._send(*request), timeout)
+            except asyncio.TimeoutError:
+                raise AttemptTimeoutError(f"No response from {request[0]} within {timeout:.1f}s") from None
+        return response, time.perf_counter() - started
+
+    async def _send(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int,
+        stream_writer: Optional[StreamWriter],
+        params: Dict[str, Any]
+    ) -> ChatCompletion:
+        """Send a single request, streaming it if a writer is given."""
+        if stream_writer is None:
+            return await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                n=1,
+                **params
+            )
+
+        started = time.perf_counter()
+        stream_writer.begin()
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                n=1,
+                stream=True,
+                stream_options={"include_usage": True},
+                **params
+            )
+            payload, stats = await consume_stream(stream, stream_writer, started)
+        finally:
+            stream_writer.close()
+
+        response = ChatCompletion.model_validate(payload)
+        self.stream_stats[response.id] = stats
+        logging.info(
+            f"Streamed response: first token after {stats['time_to_first_token_s']}s, "
+            f"{stats['tokens_per_second']} tokens/s"
+        )
+        return response
+
+
+# One transport per API key and endpoint, shared by every generator
+_TRANSPORTS: Dict[Tuple[Optional[str], Optional[str]], Transport] = {}
+
+
+def get_transport(api_key: Optional[str] = None, base_url: Optional[str] = None, **settings) -> Transport:
+    """Return the process-wide transport for an API key and endpoint.
+
+    ``settings`` (pool size, timeouts, retry policy) apply when the transport
+    is first created.
+    """
+    key = (api_key, base_url)
+    transport = _TRANSPORTS.get(key)
+    if transport is None:
+        transport = Transport(api_key=api_key, base_url=base_url, **settings)
+        _TRANSPORTS[key] = transport
+    return transport
@@ -0,0 +1,293 @@
+"""Usage records, running aggregates, the append-only usage journal and token budgets."""
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional
+
+from .models import SPARC_ARTIFACTS, stage_of_context
+
+# Usage report category of each pipeline stage
+STAGE_CATEGORIES = {
+    "analysis": "Transcript Analysis",
+    "reduce": "Analysis Reduce",
+    **{name: "Artifact Generation" for name in SPARC_ARTIFACTS},
+    "validation": "Validation",
+    "chat_simulation": "Chat Simulation"
+}
+
+# Journal lines buffered before a write is handed to the writer thread
+JOURNAL_BATCH_SIZE = 16
+
+# Streaming stats kept on a record (see streaming.consume_stream)
+STREAM_FIELDS = ("time_to_first_token_s", "duration_s", "tokens_per_second")
+
+# Completion tokens a request keeps when its max_tokens is cut to fit the
+# rest of a token budget
+MIN_COMPLETION_TOKENS = 256
+
+
+def usage_category(context: str) -> str:
+    """Report category of a usage context such as ``chunk_3`` or ``validation_architecture``."""
+    return STAGE_CATEGORIES.get(stage_of_context(context), context.capitalize())
+
+
+class UsageRecord:
+    """One model request (or cache hit) in the usage log.
+
+    Cached responses bill zero prompt and response tokens; their size is kept
+    in ``cached_tokens``.
+    """
+
+    __slots__ = ("context", "model", "prompt_tokens", "response_tokens", "cached", "cached_tokens",
+                 "timestamp", "latency_s", "time_to_first_token_s", "duration_s", "tokens_per_second",
+                 "category")
+
+    def __init__(
+        self,
+        context: str,
+        model: str,
+        prompt_tokens: int,
+        response_tokens: int,
+        cached: bool = False,
+        cached_tokens: Optional[int] = None,
+        timestamp: Optional[str] = None,
+        latency_s: Optional[float] = None,
+        time_to_first_token_s: Optional[float] = None,
+        duration_s: Optional[float] = None,
+        tokens_per_second: Optional[float] = None
+    ):
+        self.context = context
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+        self.cached = cached
+        self.cached_tokens = cached_tokens
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.latency_s = latency_s
+        self.time_to_first_token_s = time_to_first_token_s
+        self.duration_s = duration_s
+        self.tokens_per_second = tokens_per_second
+        self.category = usage_category(context)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.response_tokens
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "UsageRecord":
+        """Rebuild a record from its ``to_dict`` form (a usage log entry)."""
+        return cls(
+            entry["context"],
+            entry.get("model"),
+            entry.get("prompt_tokens", 0),
+            entry.get("response_tokens", 0),
+            cached=entry.get("cached", False),
+            cached_tokens=entry.get("cached_tokens"),
+            timestamp=entry.get("timestamp"),
+            latency_s=entry.get("latency_s"),
+            **{field: entry.get(field) for field in STREAM_FIELDS}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The usage log entry of this record; unset optional fields are left out."""
+        entry = {
+            "context": self.context,
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "total_tokens": self.total_tokens,
+            "cached": self.cached,
+            "timestamp": self.timestamp
+        }
+        for field in ("cached_tokens", "latency_s") + STREAM_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                entry[field] = value
+        return entry
+
+
+class UsageAggregate:
+    """Running totals of a group of usage records, updated in O(1) per record."""
+
+    __slots__ = ("count", "cached", "prompt_tokens", "response_tokens",
+                 "latency_count", "latency_sum", "latency_min", "latency_max")
+
+    def __init__(self):
+        self.count = 0
+        self.cached = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_min = None
+        self.latency_max = None
+
+    def add(self, record: UsageRecord):
+        self.count += 1
+        self.cached += record.cached
+        self.prompt_tokens += record.prompt_tokens
+        self.response_tokens += record.response_tokens
+        if record.latency_s is not None:
+            self.latency_count += 1
+            self.latency_sum += record.latency_s
+            self.latency_min = record.latency_s if self.latency_min is None else min(self.latency_min, record.latency_s)
+            self.latency_max = record.latency_s if self.latency_max is None else max(self.latency_max, record.latency_s)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.response_tokens
+
+    @property
+    def mean_latency_s(self) -> Optional[float]:
+        return self.latency_sum / self.latency_count if self.latency_count else None
+
+
+class UsageLog:
+    """Usage records of a run, aggregated by report category and by model.
+
+    With a ``journal_path`` every record is also appended to that JSONL file.
+    Lines are buffered and handed to a writer thread in batches of
+    ``batch_size`` (and on ``flush``), so the event loop never waits for the
+    disk; ``close`` writes what is left and waits for the writer.
+    """
+
+    def __init__(self, journal_path: Optional[Path] = None, batch_size: int = JOURNAL_BATCH_SIZE):
+        self.records: List[UsageRecord] = []
+        self.total_tokens = 0
+        self.by_category: Dict[str, UsageAggregate] = {}
+        self.by_model: Dict[str, UsageAggregate] = {}
+        self.journal_path = Path(journal_path) if journal_path else None
+        self.batch_size = batch_size
+        self._pending: List[str] = []
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    def add(self, record: UsageRecord, journal: bool = True):
+        """Record a request; ``journal=False`` for records already in the journal."""
+        self.records.append(record)
+        self.total_tokens += record.total_tokens
+        self.by_category.setdefault(record.category, UsageAggregate()).add(record)
+        self.by_model.setdefault(record.model, UsageAggregate()).add(record)
+        if journal and self.journal_path is not None:
+            self._pending.append(json.dumps(record.to_dict()))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def extend(self, records: Iterable[UsageRecord]):
+        """Add records of an earlier run without journaling them again."""
+        for record in records:
+            self.add(record, journal=False)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """All records as usage log entries."""
+        return [record.to_dict() for record in self.records]
+
+    def flush(self):
+        """Hand buffered journal lines to the writer thread."""
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="usage-journal")
+        self._writer.submit(self._write, lines)
+
+    def _write(self, lines: List[str]):
+        try:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logging.error(f"Could not write usage journal {self.journal_path}: {str(e)}")
+
+    def close(self):
+        """Write buffered lines and wait until the journal is on disk."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def reset_journal(self):
+        """Start an empty journal, dropping one left by an earlier run."""
+        if self.journal_path is not None and self.journal_path.exists():
+            self.journal_path.unlink()
+
+    def read_journal(self) -> List[UsageRecord]:
+        """Records in the journal; a line cut off by a crash is skipped."""
+        if self.journal_path is None or not self.journal_path.exists():
+            return []
+        records = []
+        with open(self.journal_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(UsageRecord.from_dict(json.loads(line)))
+                except (ValueError, KeyError):
+                    logging.warning(f"Skipping unreadable line in {self.journal_path}")
+        return records
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """A request would take the run past its token budget."""
+    status_code = "token_budget"
+
+
+class TokenBudget:
+    """Hard cap on the tokens a run may spend.
+
+    Before a request is sent, its prompt plus ``max_tokens`` are reserved;
+    once it finishes, the reservation is replaced by the tokens actually
+    billed. A request that does not fit next to the requests in flight waits
+    for them. One that does not fit even alone gives up the ``flexible``
+    part of its reservation (its completion allowance) it cannot have, and
+    raises ``TokenBudgetExceeded`` if the rest does not fit either, so the
+    budget is never overspent.
+    """
+
+    def __init__(self, limit: int, spent: int = 0):
+        self.limit = limit
+        self.spent = spent
+        self.reserved = 0
+        self._released: Optional[asyncio.Event] = None
+
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.spent
+
+    async def reserve(self, tokens: int, flexible: int = 0) -> int:
+        """Reserve ``tokens`` for a request, waiting for requests in flight if needed.
+
+        Up to ``flexible`` of them are dropped when the request does not fit
+        alone; returns the tokens reserved.
+        """
+        while self.spent + self.reserved + tokens > self.limit:
+            if not self.reserved:
+                if self.remaining < tokens - flexible:
+                    raise TokenBudgetExceeded(
+                        f"Token budget of {self.limit} reached: {self.spent} tokens spent, "
+                        f"next request needs at least {tokens - flexible}"
+                    )
+                tokens = self.remaining
+                break
+            if self._released is None:
+                self._released = asyncio.Event()
+            await self._released.wait()
+        self.reserved += tokens
+        return tokens
+
+    def try_reserve(self, tokens: int) -> bool:
+        """Reserve ``tokens`` if they fit next to the requests in flight, without waiting."""
+        if self.spent + self.reserved + tokens > self.limit:
+            return False
+        self.reserved += tokens
+        return True
+
+    def settle(self, reserved: int, spent: int):
+        """Replace a reservation with the tokens the request was billed."""
+        self.reserved -= reserved
+        self.spent += spent
+        if self._released is not None:
+            self._released.set()
+            self._released = None
@@ -0,0 +1,95 @@
+"""Merging of per-artifact validation verdicts."""
+from typing import Dict, Any, List
+
+from .aggregation import OrderedItemSet
+
+
+def _union(values: List[List[Any]]) -> List[Any]:
+    items = OrderedItemSet()
+    for value in values:
+        for item in value or []:
+            items.add(item)
+    return items.items()
+
+
+def _tagged(name: str, items: List[Any]) -> List[str]:
+    """Prefix items with the artifact they came from."""
+    return [f"[{name}] {item}" for item in items or []]
+
+
+def merge_validations(verdicts: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-artifact validations into one validation.
+
+    ``verdicts`` maps artifact names to validation JSON in the combined
+    validation shape; an entry with an ``"error"`` key is a failed check.
+    A feature or requirement counts as covered if any artifact covers it and
+    as missing only if no artifact covers it. Concerns, gaps and
+    recommendations are kept per artifact, and the plan is ready for
+    implementation only if every artifact passed.
+    """
+    coverage = [v.get("coverage_analysis", {}) for v in verdicts.values() if "error" not in v]
+    technical = {name: v.get("technical_validation", {}) for name, v in verdicts.items() if "error" not in v}
+    overall = {name: v.get("overall_assessment", {}) for name, v in verdicts.items() if "error" not in v}
+    failed = [name for name, v in verdicts.items() if "error" in v]
+
+    def covered_and_missing(covered_key: str, missing_key: str):
+        covered = _union([c.get(covered_key, []) for c in coverage])
+        covered_set = OrderedItemSet()
+        for item in covered:
+            covered_set.add(item)
+        # add() is true only for items no artifact covers (or listed earlier)
+        missing = [item for item in _union([c.get(missing_key, []) for c in coverage]) if covered_set.add(item)]
+        return covered, missing
+
+    features_covered, missing_features = covered_and_missing("features_covered", "missing_features")
+    requirements_covered, missing_requirements = covered_and_missing("requirements_covered", "missing_requirements")
+
+    concerns = [f"[{name}] Validation failed: {verdicts[name]['error']}" for name in failed]
+    recommendations = []
+    critical_gaps = []
+    suggested_improvements = []
+    for name in technical:
+        concerns += _tagged(name, technical[name].get("concerns"))
+        recommendations += _tagged(name, technical[name].get("recommendations"))
+        critical_gaps += _tagged(name, overall[name].get("critical_gaps"))
+        suggested_improvements += _tagged(name, overall[name].get("suggested_improvements"))
+
+    # The architecture artifact's verdict decides completeness when it was checked
+    if "architecture" in verdicts:
+        architecture_complete = "architecture" in technical and bool(
+            technical["architecture"].get("architecture_completeness")
+        )
+    else:
+        architecture_complete = bool(technical) and not failed and all(
+            t.get("architecture_completeness") for t in technical.values()
+        )
+
+    return {
+        "coverage_analysis": {
+            "features_covered": features_covered,
+            "missing_features": missing_features,
+            "requirements_covered": requirements_covered,
+            "missing_requirements": missing_requirements
+        },
+        "technical_validation": {
+            "architecture_completeness": architecture_complete,
+            "implementation_feasibility": bool(technical) and not failed and all(
+                t.get("implementation_feasibility") for t in technical.values()
+            ),
+            "concerns": concerns,
+            "recommendations": recommendations
+        },
+        "overall_assessment": {
+            "ready_for_implementation": bool(overall) and not failed and all(
+                o.get("ready_for_implementation") for o in overall.values()
+            ),
+            "critical_gaps": critical_gaps,
+            "suggested_improvements": suggested_improvements
+        },
+        "artifact_verdicts": {
+            name: "failed" if "error" in v else (
+                "ready" if v.get("overall_assessment", {}).get("ready_for_implementation") else "not ready"
+            )
+            for name, v in verdicts.items()
+        }
+    }